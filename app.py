@@ -1,17 +1,39 @@
 import os
 import logging
-from flask import Flask, request, render_template, redirect, url_for
+from flask import (
+    Flask,
+    Response,
+    request,
+    render_template,
+    redirect,
+    url_for,
+    abort,
+    make_response,
+    stream_with_context,
+)
 
-from storage import init_db, add_fragment, list_fragments
-from ingestion import ingest_files
+from storage import init_db, add_fragment, max_fragment_id
+from http_cache import not_modified, request_etag, validated
+from result_cache import fetch_page
+import ingestion_jobs
+from recombulator import EXPORT_FORMATS, iter_all_fragments, stream_export
+import metrics
 
 app = Flask(__name__)
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+PAGE_SIZE = 25
+
+# How long a browser form POST waits for its ingestion job before
+# returning the progress page instead of the result.
+INLINE_WAIT_SECONDS = float(os.environ.get("INLINE_WAIT_SECONDS", "2"))
+
 @app.before_first_request
 def startup():
     init_db()
+    ingestion_jobs.init_jobs_db()
+    ingestion_jobs.start_workers()
     logger.info("Database initialized")
 
 @app.route("/")
@@ -21,41 +43,117 @@ def index():
 @app.route("/disassembler", methods=["GET", "POST"])
 def disassembler():
     if request.method == "POST":
-        files = request.files.getlist("files")
-        fragment_count = 0
-        file_count = 0
-
-        if files:
-            result = ingest_files(files)
-            fragment_count = result.get("fragment_count", 0)
-            file_count = result.get("file_count", 0)
-
-        logger.info(
-            "Ingestion complete: %s fragments from %s files",
-            fragment_count,
-            file_count,
-        )
+        files = [f for f in request.files.getlist("files") if f.filename]
+
+        if not files:
+            return render_template(
+                "ingestion_complete.html", fragment_count=0, file_count=0
+            )
+
+        # Ingestion runs on a background worker; the request only spools
+        # the uploads and queues the job.
+        job_id = ingestion_jobs.submit(files)
+        ingestion_jobs.start_workers()
+        logger.info("Queued ingestion job %s (%s files)", job_id, len(files))
+
+        if _wants_json():
+            return {
+                "job_id": job_id,
+                "status_url": url_for("job_status", job_id=job_id),
+            }, 202
+        # Small uploads usually finish within a moment; show the result
+        # directly then, otherwise hand over to the progress page.
+        job = ingestion_jobs.wait_for(job_id, timeout=INLINE_WAIT_SECONDS)
+        if job["status"] == ingestion_jobs.DONE:
+            return job_status(job_id)
+        return redirect(url_for("job_status", job_id=job_id))
+
+    return render_template("disassembler.html")
+
+def _wants_json():
+    best = request.accept_mimetypes.best_match(["text/html", "application/json"])
+    return request.args.get("format") == "json" or best == "application/json"
 
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = ingestion_jobs.get_job(job_id)
+    if job is None:
+        abort(404)
+    if _wants_json():
+        return job
+    if job["status"] == ingestion_jobs.DONE:
         return render_template(
             "ingestion_complete.html",
-            fragment_count=fragment_count,
-            file_count=file_count,
+            fragment_count=job["fragment_count"],
+            file_count=job["file_count"],
+            skipped_files=job["skipped_files"],
+            duplicate_count=job["duplicate_fragment_count"],
+            rejected_archives=job["rejected_archives"],
         )
-
-    return render_template("disassembler.html")
+    return render_template("job.html", job=job)
 
 @app.route("/fragments")
 def fragments():
     q = request.args.get("q")
-    page = int(request.args.get("page", 1))
-    fragments = list_fragments(query=q, page=page)
-    return render_template("fragments.html", fragments=fragments, page=page)
+    cursor = request.args.get("cursor")
+    # The page is read at the same watermark the ETag names.
+    watermark = max_fragment_id()
+    tag = request_etag(watermark)
+    unchanged = not_modified(tag)
+    if unchanged is not None:
+        return unchanged
+    try:
+        # ?page= is the legacy offset path; new links carry an opaque cursor.
+        page = int(request.args.get("page", 1))
+        fragments, next_cursor = fetch_page(
+            query=q,
+            cursor=cursor,
+            limit=PAGE_SIZE,
+            offset=(page - 1) * PAGE_SIZE,
+            max_id=watermark,
+        )
+    except ValueError:
+        abort(400)
+    return validated(make_response(render_template(
+        "fragments.html",
+        fragments=fragments,
+        page=page,
+        query=q or "",
+        next_cursor=next_cursor,
+    )), tag)
+
+def export_all_fragments(format="zip"):
+    """
+    Stream the whole archive. Rows come straight off the cursor and the
+    response is sent chunked, so worker memory stays flat.
+    """
+    if format not in EXPORT_FORMATS:
+        abort(400)
+    # Rows appended while the export streams are left out, so the body is
+    # exactly the store at the watermark the ETag names.
+    watermark = max_fragment_id()
+    tag = request_etag(watermark, format)
+    unchanged = not_modified(tag)
+    if unchanged is not None:
+        return unchanged
+    _, mimetype, extension = EXPORT_FORMATS[format]
+    return validated(Response(
+        stream_with_context(stream_export(iter_all_fragments(max_id=watermark), format)),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f'attachment; filename="fragments.{extension}"'
+        },
+    ), tag)
 
 @app.route("/export/all")
 def export_all():
     format = request.args.get("format", "zip")
     return export_all_fragments(format=format)
 
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
 @app.route("/health")
 def health():
     return {"status": "ok"}
@@ -0,0 +1,59 @@
+"""
+Benchmark: ANN index recall vs exact Stage 1 signals
+
+Builds AnnIndex over a synthetic clustered corpus for a grid of
+(n_tables, n_bits) settings and reports, against exact all-pairs signals:
+recall, build time and per-query latency.
+
+Usage:
+    python -m benchmarks.bench_ann_recall [N] [DIM] [THRESHOLD]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from concept_emergence.ann_index import AnnIndex
+from concept_emergence.stage1 import generate_ann_signals, generate_similarity_signals
+
+GRID = [(4, 12), (8, 12), (16, 12), (8, 16), (16, 16), (32, 16)]
+
+
+def clustered_embeddings(n: int, dim: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(1, n // 10), dim))
+    vectors = centres[rng.integers(0, len(centres), n)]
+    vectors = vectors + 0.15 * rng.standard_normal((n, dim))
+    return [{"fragment_id": i, "embedding": v} for i, v in enumerate(vectors.tolist())]
+
+
+def main(n: int = 20000, dim: int = 32, threshold: float = 0.9):
+    embeddings = clustered_embeddings(n, dim)
+
+    start = time.perf_counter()
+    exact = {(s["a"], s["b"]) for s in generate_similarity_signals(embeddings, threshold)}
+    exact_time = time.perf_counter() - start
+    print(f"exact: {len(exact):,} signals in {exact_time:.2f}s")
+
+    print(f"{'tables':>6} {'bits':>5} {'recall':>7} {'total s':>8} {'query us':>9}")
+    for n_tables, n_bits in GRID:
+        index = AnnIndex(dim=dim, n_tables=n_tables, n_bits=n_bits)
+        start = time.perf_counter()
+        ann = generate_ann_signals(embeddings, threshold, index)
+        elapsed = time.perf_counter() - start
+        found = {(s["a"], s["b"]) for s in ann}
+        recall = len(found & exact) / len(exact) if exact else 1.0
+        print(
+            f"{n_tables:>6} {n_bits:>5} {recall:>7.3f} {elapsed:>8.2f} "
+            f"{elapsed / n * 1e6:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    main(
+        int(args[0]) if len(args) > 0 else 20000,
+        int(args[1]) if len(args) > 1 else 32,
+        float(args[2]) if len(args) > 2 else 0.9,
+    )
@@ -0,0 +1,52 @@
+"""
+Benchmark: per-row add_fragment() vs bulk add_fragments()
+
+Writes N synthetic fragments into a throwaway database with each API and
+reports rows/sec. Never touches data/fragments.db.
+
+Usage:
+    python -m benchmarks.bench_bulk_insert [N]
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import storage
+
+
+def synthetic_fragments(n: int):
+    for i in range(n):
+        yield {
+            "content": f"Synthetic fragment {i} " + "lorem ipsum " * 8,
+            "source": "bench.csv",
+            "source_type": "csv",
+            "source_page": i + 2,
+        }
+
+
+def bench_single(n: int) -> float:
+    start = time.perf_counter()
+    for f in synthetic_fragments(n):
+        storage.add_fragment(**f)
+    return n / (time.perf_counter() - start)
+
+
+def bench_bulk(n: int) -> float:
+    start = time.perf_counter()
+    storage.add_fragments(synthetic_fragments(n))
+    return n / (time.perf_counter() - start)
+
+
+def main(n: int = 2000):
+    for label, fn in (("add_fragment", bench_single), ("add_fragments", bench_bulk)):
+        with tempfile.TemporaryDirectory() as tmp:
+            storage.DB_PATH = Path(tmp) / "bench.db"
+            storage.init_db()
+            rate = fn(n)
+        print(f"{label:<14} {n:>8} rows  {rate:>12,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
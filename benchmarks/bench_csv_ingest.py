@@ -0,0 +1,79 @@
+"""
+Benchmark: whole-file vs streaming CSV ingestion
+
+Writes a synthetic CSV of N rows, then ingests it into a throwaway database
+with each extractor, each in a fresh process so peak RSS is measured
+independently. Reports rows/sec and peak RSS. Never touches
+data/fragments.db.
+
+Usage:
+    python -m benchmarks.bench_csv_ingest [N]
+"""
+
+import csv
+import multiprocessing
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import storage
+from csv_ingestion import extract_csv_fragments, iter_csv_fragments
+
+
+def write_csv(path: Path, n: int):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "body"])
+        for i in range(n):
+            writer.writerow([i, f"Row {i}", "lorem ipsum dolor sit amet " * 4])
+
+
+def whole_file(path: Path):
+    return extract_csv_fragments(path.read_bytes(), path.name)
+
+
+def streaming(path: Path):
+    return iter_csv_fragments(path, path.name)
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def run(mode: str, csv_path: str, db_path: str, results):
+    storage.DB_PATH = Path(db_path)
+    storage.init_db()
+    extractor = {"whole-file": whole_file, "streaming": streaming}[mode]
+
+    start = time.perf_counter()
+    first, last = storage.add_fragments(extractor(Path(csv_path)))
+    elapsed = time.perf_counter() - start
+    results.put((mode, last - first + 1, elapsed, peak_rss_mb()))
+
+
+def main(n: int = 200_000):
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "bench.csv"
+        write_csv(csv_path, n)
+        size_mb = csv_path.stat().st_size / (1024 * 1024)
+        print(f"{n:,} rows, {size_mb:,.1f} MiB")
+
+        for mode in ("whole-file", "streaming"):
+            results = ctx.Queue()
+            proc = ctx.Process(
+                target=run, args=(mode, str(csv_path), str(Path(tmp) / f"{mode}.db"), results)
+            )
+            proc.start()
+            label, rows, elapsed, rss = results.get()
+            proc.join()
+            print(f"{label:<11} {rows:>10,} rows  {rows / elapsed:>10,.0f} rows/sec  "
+                  f"peak RSS {rss:>8,.1f} MiB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,74 @@
+"""
+Benchmark: per-call cost of runtime.logging.logger.log_event
+
+Compares the previous synchronous write-per-event logger with the queued
+logger when the event is written, sampled out, rate limited, and filtered
+by severity. Output goes to /dev/null; the background flush is included
+in the "enabled" figure by flushing inside the timed region.
+
+Usage:
+    python -m benchmarks.bench_logger [N]
+"""
+
+import datetime
+import json
+import os
+import sys
+import time
+import uuid
+
+from runtime.logging import logger
+
+
+def sync_log_event(event_type, severity, source, message, context=None):
+    """The logger as it was: format and write on the caller's thread."""
+    sys.stdout.write(json.dumps({
+        "event_id": str(uuid.uuid4()),
+        "timestamp": datetime.datetime.utcnow().isoformat(),
+        "event_type": event_type,
+        "severity": severity,
+        "source": source,
+        "message": message,
+        "context": context or {}
+    }) + "\n")
+
+
+def per_call_ns(fn, n, severity="info", event_type="bench.event", drain=False):
+    context = {"fragment": 1}
+    start = time.perf_counter_ns()
+    for _ in range(n):
+        fn(event_type, severity, "bench", "fragment stored", context)
+    caller = time.perf_counter_ns() - start
+    if drain:
+        logger.flush()
+    total = time.perf_counter_ns() - start
+    return caller / n, total / n
+
+
+def main(n: int = 200_000):
+    logger.configure(min_severity="info")
+    logger.sample("bench.sampled", 0.01)
+    logger.rate_limit("bench.limited", 1000)
+
+    real_stdout = sys.stdout
+    with open(os.devnull, "w") as devnull:
+        sys.stdout = devnull
+        try:
+            rows = [
+                ("synchronous (before)", per_call_ns(sync_log_event, n)),
+                ("queued, enabled", per_call_ns(logger.log_event, n, drain=True)),
+                ("queued, sampled 1%", per_call_ns(logger.log_event, n, event_type="bench.sampled", drain=True)),
+                ("queued, rate limited", per_call_ns(logger.log_event, n, event_type="bench.limited", drain=True)),
+                ("filtered (debug)", per_call_ns(logger.log_event, n, severity="debug")),
+            ]
+        finally:
+            sys.stdout = real_stdout
+
+    print(f"{n:,} calls")
+    print(f"{'':<22} {'caller ns/call':>15} {'incl. flush':>12}")
+    for label, (caller, total) in rows:
+        print(f"{label:<22} {caller:>15,.0f} {total:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
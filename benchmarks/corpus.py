@@ -0,0 +1,120 @@
+"""
+Deterministic synthetic corpus for the benchmark suite.
+
+The same (n, seed) always produces the same fragments and files, so runs
+on different commits measure the same work.
+
+- fragments(n): short prose-like texts drawn from a fixed vocabulary, with
+  a Zipf-ish word distribution so search has common and rare terms
+- write_txt / write_csv / write_pdf / write_docx: one file per format
+  holding those fragments in the shape each extractor expects
+"""
+
+import csv
+import io
+import random
+from pathlib import Path
+from typing import Iterator, List
+
+# Fixed vocabulary; earlier words are drawn far more often than later ones.
+VOCABULARY = (
+    "the of and to in archive fragment record source page text memory "
+    "library scribe ledger index letter margin note copy draft volume folio "
+    "chapter witness account river harbour winter lantern orchard quarry "
+    "granary foundry meridian cipher parchment vellum codex palimpsest "
+    "colophon incipit rubric gloss marginalia catchword quire stemma lacuna "
+    "apparatus recension exemplar scriptorium illumination provenance "
+    "accession manuscript ostracon papyrus stylus tablet cuneiform"
+).split()
+
+# Words that occur in a known small share of fragments, for search.
+COMMON_TERM = "archive"
+RARE_TERM = "palimpsest"
+
+
+def _weights():
+    return [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def fragments(n: int, seed: int = 0, words: int = 24) -> Iterator[str]:
+    rng = random.Random(seed)
+    weights = _weights()
+    for i in range(n):
+        body = rng.choices(VOCABULARY, weights, k=words)
+        yield f"Record {i}. " + " ".join(body).capitalize() + "."
+
+
+def fragment_list(n: int, seed: int = 0) -> List[str]:
+    return list(fragments(n, seed))
+
+
+def write_txt(path: Path, n: int, seed: int = 0) -> Path:
+    path.write_text("\n\n".join(fragments(n, seed)), encoding="utf-8")
+    return path
+
+
+def write_csv(path: Path, n: int, seed: int = 0) -> Path:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "text"])
+        for i, text in enumerate(fragments(n, seed)):
+            writer.writerow([i, text])
+    return path
+
+
+def text_pdf(pages: List[str]) -> bytes:
+    """Minimal PDF with one line of Helvetica text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None,
+               "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        text = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        stream = f"BT /F1 10 Tf 36 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for num, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{num} 0 obj\n{body}\nendobj\n".encode("latin-1"))
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(
+        f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\n"
+        f"startxref\n{xref}\n%%EOF\n".encode()
+    )
+    return out.getvalue()
+
+
+def write_pdf(path: Path, n: int, seed: int = 0) -> Path:
+    """One fragment per page."""
+    path.write_bytes(text_pdf(fragment_list(n, seed)))
+    return path
+
+
+def write_docx(path: Path, n: int, seed: int = 0) -> Path:
+    """One fragment per paragraph."""
+    from docx import Document
+
+    doc = Document()
+    for text in fragments(n, seed):
+        doc.add_paragraph(text)
+    doc.save(path)
+    return path
+
+
+WRITERS = {
+    "txt": write_txt,
+    "csv": write_csv,
+    "pdf": write_pdf,
+    "docx": write_docx,
+}
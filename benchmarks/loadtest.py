@@ -0,0 +1,358 @@
+"""
+Load test: concurrent traffic against the Flask app.
+
+Starts app.py in-process on a threaded local server backed by a throwaway
+store seeded from the synthetic corpus (or targets --url), then runs
+groups of simulated users for a fixed duration. Never touches
+data/fragments.db.
+
+Each user group is a count of users plus a weighted mix of actions:
+- read     GET /fragments, following the next-page cursor a few pages deep
+- search   GET /fragments?q=<term>
+- upload   POST /disassembler (JSON), then poll /jobs/<id> until done;
+           the poll-to-completion time is reported as "upload.job"
+- export   GET /export/all?format=<fmt>, body read to the end
+
+Reported per action: requests, errors, SQLite lock errors ("database is
+locked", counted from the server's exception log in-process), p50 / p95 /
+p99 latency and throughput.
+
+Scenarios are JSON files (or the built-in names in SCENARIOS):
+    {"duration": 30, "seed_fragments": 20000,
+     "upload": {"format": "pdf", "fragments": 2000},
+     "groups": [{"users": 50, "mix": {"read": 3, "search": 1}},
+                {"users": 2, "mix": {"upload": 1}}]}
+
+Usage:
+    python -m benchmarks.loadtest [SCENARIO] [--duration S] [--url URL]
+                                  [--json OUT]
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+from benchmarks import corpus
+
+SCENARIOS = {
+    "browse": {
+        "duration": 20,
+        "seed_fragments": 20_000,
+        "groups": [{"users": 50, "mix": {"read": 3, "search": 1}}],
+    },
+    "browse_with_uploads": {
+        "duration": 30,
+        "seed_fragments": 20_000,
+        "upload": {"format": "pdf", "fragments": 2_000},
+        "groups": [
+            {"users": 50, "mix": {"read": 3, "search": 1}},
+            {"users": 2, "mix": {"upload": 1}},
+        ],
+    },
+    "mixed": {
+        "duration": 30,
+        "seed_fragments": 20_000,
+        "upload": {"format": "csv", "fragments": 5_000},
+        "groups": [
+            {"users": 20, "mix": {"read": 4, "search": 2, "export": 1}},
+            {"users": 2, "mix": {"upload": 1}},
+        ],
+    },
+}
+
+SEARCH_TERMS = (corpus.COMMON_TERM, corpus.RARE_TERM, "ledger", "harbour winter")
+
+EXPORT_FORMATS = ("md", "json")
+
+# Pages a reader follows before starting again from the first page.
+READ_DEPTH = 5
+
+JOB_POLL_SECONDS = 0.25
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock_errors = defaultdict(int)
+
+    def record(self, action, seconds, ok=True):
+        with self.lock:
+            self.latencies[action].append(seconds)
+            if not ok:
+                self.errors[action] += 1
+
+    def lock_error(self, action):
+        with self.lock:
+            self.lock_errors[action] += 1
+
+    def report(self, duration):
+        rows = {}
+        for action in sorted(set(self.latencies) | set(self.lock_errors)):
+            samples = sorted(self.latencies.get(action, []))
+            rows[action] = {
+                "requests": len(samples),
+                "errors": self.errors.get(action, 0),
+                "lock_errors": self.lock_errors.get(action, 0),
+                "p50_ms": _percentile(samples, 50),
+                "p95_ms": _percentile(samples, 95),
+                "p99_ms": _percentile(samples, 99),
+                "throughput_rps": len(samples) / duration,
+            }
+        return rows
+
+
+def _percentile(samples, pct):
+    if not samples:
+        return None
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index] * 1000
+
+
+# Route a failing request's path to the action that issued it.
+def _action_for(path):
+    if path.startswith("/fragments"):
+        return "search" if "q=" in path else "read"
+    if path.startswith("/disassembler"):
+        return "upload"
+    if path.startswith("/export"):
+        return "export"
+    if path.startswith("/jobs"):
+        return "upload.job"
+    return path
+
+
+class LockErrorHandler(logging.Handler):
+    """
+    Counts "database is locked" exceptions that reach the root logger:
+    Flask's unhandled-exception log (attributed to the request's route)
+    and the ingestion job workers' failures (attributed to upload.job).
+    """
+
+    def __init__(self, recorder):
+        super().__init__(logging.ERROR)
+        self.recorder = recorder
+
+    def emit(self, record):
+        exc = record.exc_info[1] if record.exc_info else None
+        if isinstance(exc, sqlite3.OperationalError) and "locked" in str(exc):
+            path = ""
+            try:
+                from flask import has_request_context, request
+
+                if has_request_context():
+                    path = request.full_path
+            except ImportError:
+                pass
+            self.recorder.lock_error(_action_for(path) if path else "upload.job")
+
+
+class Client:
+    def __init__(self, base_url, recorder, upload_file=None):
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self.upload_file = upload_file
+
+    def _request(self, action, path, data=None, headers=None, read=True):
+        request = urllib.request.Request(self.base_url + path, data=data, headers=headers or {})
+        start = time.perf_counter()
+        ok, body = True, b""
+        try:
+            with urllib.request.urlopen(request, timeout=300) as response:
+                body = response.read() if read else b""
+        except urllib.error.HTTPError as exc:
+            ok = False
+            body = exc.read()
+        except (urllib.error.URLError, OSError):
+            ok = False
+        self.recorder.record(action, time.perf_counter() - start, ok)
+        return ok, body
+
+    def read(self, rng):
+        path = "/fragments"
+        for _ in range(rng.randint(1, READ_DEPTH)):
+            ok, body = self._request("read", path)
+            cursor = _next_cursor(body) if ok else None
+            if cursor is None:
+                break
+            path = "/fragments?" + urllib.parse.urlencode({"cursor": cursor})
+
+    def search(self, rng):
+        term = rng.choice(SEARCH_TERMS)
+        self._request("search", "/fragments?" + urllib.parse.urlencode({"q": term}))
+
+    def export(self, rng):
+        fmt = rng.choice(EXPORT_FORMATS)
+        self._request("export", f"/export/all?format={fmt}")
+
+    def upload(self, rng):
+        body, content_type = _multipart(
+            "files", self.upload_file.name, self.upload_file.read_bytes()
+        )
+        ok, response = self._request(
+            "upload", "/disassembler", data=body,
+            headers={"Content-Type": content_type, "Accept": "application/json"},
+        )
+        if not ok:
+            return
+        job_id = json.loads(response)["job_id"]
+        start = time.perf_counter()
+        while True:
+            ok, status = self._request("job_status", f"/jobs/{job_id}?format=json")
+            state = json.loads(status).get("status") if ok else "failed"
+            if state in ("done", "failed"):
+                break
+            time.sleep(JOB_POLL_SECONDS)
+        self.recorder.record("upload.job", time.perf_counter() - start, state == "done")
+
+
+def _next_cursor(body):
+    marker = b"cursor="
+    at = body.find(marker)
+    if at < 0:
+        return None
+    end = at + len(marker)
+    while end < len(body) and body[end:end + 1] not in b"\"'&< ":
+        end += 1
+    return urllib.parse.unquote(body[at + len(marker):end].decode())
+
+
+def _multipart(field, filename, data):
+    boundary = uuid.uuid4().hex
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    return head + data + tail, f"multipart/form-data; boundary={boundary}"
+
+
+def _user(client, mix, deadline, seed):
+    rng = random.Random(seed)
+    actions = list(mix)
+    weights = [mix[a] for a in actions]
+    while time.monotonic() < deadline:
+        getattr(client, rng.choices(actions, weights)[0])(rng)
+
+
+@contextlib.contextmanager
+def local_server(tmp: Path, seed_fragments: int):
+    """
+    Serve app.py from a thread on a random local port, backed by a fresh
+    store and job queue under ``tmp``. Yields the base URL.
+    """
+    from werkzeug.serving import make_server
+
+    import ingestion_jobs
+    import storage
+    from app import app
+
+    previous = storage.DB_PATH, ingestion_jobs.JOBS_DB_PATH, ingestion_jobs.JOBS_DIR
+    storage.DB_PATH = tmp / "fragments.db"
+    ingestion_jobs.JOBS_DB_PATH = tmp / "jobs.db"
+    ingestion_jobs.JOBS_DIR = tmp / "jobs"
+    storage.init_db()
+    storage.add_fragments(
+        {"content": text, "source": "corpus", "source_type": "txt"}
+        for text in corpus.fragments(seed_fragments)
+    )
+    storage.close_connections()
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        ingestion_jobs.stop_workers(timeout=60)
+        storage.close_connections()
+        storage.DB_PATH, ingestion_jobs.JOBS_DB_PATH, ingestion_jobs.JOBS_DIR = previous
+
+
+def run(scenario: dict, url: str | None = None) -> dict:
+    recorder = Recorder()
+    handler = LockErrorHandler(recorder)
+    logging.getLogger().addHandler(handler)
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    with contextlib.ExitStack() as stack:
+        tmp = Path(stack.enter_context(tempfile.TemporaryDirectory(prefix="loadtest-")))
+        if url is None:
+            url = stack.enter_context(
+                local_server(tmp, scenario.get("seed_fragments", 10_000))
+            )
+
+        upload = scenario.get("upload", {"format": "txt", "fragments": 500})
+        upload_file = corpus.WRITERS[upload["format"]](
+            tmp / f"upload.{upload['format']}", upload["fragments"]
+        )
+
+        start = time.monotonic()
+        deadline = start + scenario["duration"]
+        threads = []
+        for g, group in enumerate(scenario["groups"]):
+            for u in range(group["users"]):
+                client = Client(url, recorder, upload_file)
+                thread = threading.Thread(
+                    target=_user, args=(client, group["mix"], deadline, g * 1000 + u)
+                )
+                thread.start()
+                threads.append(thread)
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - start
+
+    logging.getLogger().removeHandler(handler)
+    return {"scenario": scenario, "elapsed_s": elapsed, "routes": recorder.report(elapsed)}
+
+
+def print_report(result):
+    print(f"{'action':<12} {'reqs':>7} {'err':>5} {'locked':>6} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8}")
+    fmt = lambda v: f"{v:>9.1f}" if v is not None else f"{'-':>9}"
+    for action, row in result["routes"].items():
+        print(f"{action:<12} {row['requests']:>7} {row['errors']:>5} {row['lock_errors']:>6} "
+              f"{fmt(row['p50_ms'])} {fmt(row['p95_ms'])} {fmt(row['p99_ms'])} "
+              f"{row['throughput_rps']:>8.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest")
+    parser.add_argument("scenario", nargs="?", default="browse_with_uploads",
+                        help=f"JSON file or one of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--duration", type=float, help="override the scenario duration")
+    parser.add_argument("--url", help="target an already running local server")
+    parser.add_argument("--json", type=Path, help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.scenario in SCENARIOS:
+        scenario = dict(SCENARIOS[args.scenario])
+    else:
+        scenario = json.loads(Path(args.scenario).read_text())
+    if args.duration:
+        scenario["duration"] = args.duration
+
+    result = run(scenario, args.url)
+    print_report(result)
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
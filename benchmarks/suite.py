@@ -0,0 +1,300 @@
+"""
+Benchmark suite with JSON baselines.
+
+Runs each scenario against a throwaway store built from the deterministic
+synthetic corpus (benchmarks.corpus) and writes one JSON result file.
+Never touches data/fragments.db.
+
+Scenarios:
+- ingest.<format>          fragments/sec through ingestion.ingest_files
+- list.<size>.*            list_fragments first-page / deep-cursor latency
+- search.<size>.*          search_fragments latency, common and rare term
+- similarity.<size>        similarity.compute_similarity wall time
+- stage1.<mode>.<size>     concept_emergence.stage1.run_stage1 wall time
+                           (cold embedding cache)
+- export.<format>          bytes/sec through recombulator.stream_export
+
+Usage:
+    python -m benchmarks.suite run [--scale small|medium|large]
+                                   [--only PREFIX ...] [--out FILE]
+    python -m benchmarks.suite compare BASELINE CURRENT [--tolerance 0.2]
+
+compare exits with status 1 when any shared metric is worse than the
+baseline by more than the tolerance (a fraction, default 20%).
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import storage
+from benchmarks import corpus
+
+# Fragment counts per scale.
+SCALES = {
+    "small": {
+        "ingest": 2_000,
+        "query": (10_000,),
+        "similarity": (1_000, 2_000, 4_000),
+        "stage1": (1_000, 2_000, 4_000),
+        "export": 10_000,
+    },
+    "medium": {
+        "ingest": 10_000,
+        "query": (10_000, 100_000),
+        "similarity": (2_000, 4_000, 8_000, 16_000),
+        "stage1": (2_000, 4_000, 8_000),
+        "export": 100_000,
+    },
+    "large": {
+        "ingest": 50_000,
+        "query": (10_000, 100_000, 1_000_000),
+        "similarity": (4_000, 8_000, 16_000, 32_000),
+        "stage1": (4_000, 8_000, 16_000),
+        "export": 1_000_000,
+    },
+}
+
+# Timed repetitions per latency measurement.
+QUERY_REPEATS = 50
+
+BASELINE_DIR = Path(__file__).with_name("baselines")
+
+
+class _Results:
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name: str, value: float, unit: str, better: str):
+        self.metrics[name] = {"value": value, "unit": unit, "better": better}
+        print(f"  {name:<40} {value:>14,.4f} {unit}", flush=True)
+
+
+@contextlib.contextmanager
+def _store(directory: Path, name: str = "bench.db"):
+    """Point storage at a fresh database for the duration of the block."""
+    previous = storage.DB_PATH
+    storage.DB_PATH = directory / name
+    storage.init_db()
+    try:
+        yield storage.DB_PATH
+    finally:
+        storage.close_connections()
+        storage.DB_PATH = previous
+
+
+def _populate(n: int, seed: int = 0):
+    storage.add_fragments(
+        {"content": text, "source": "corpus", "source_type": "txt"}
+        for text in corpus.fragments(n, seed)
+    )
+
+
+def _latency_ms(fn, repeats: int = QUERY_REPEATS) -> dict:
+    fn()  # warm the page cache
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "p50": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+    }
+
+
+class _Upload:
+    def __init__(self, path: Path):
+        self.filename = path.name
+        self.stream = open(path, "rb")
+
+
+def bench_ingest(results: _Results, scale: dict, tmp: Path):
+    from ingestion import ingest_files
+
+    n = scale["ingest"]
+    for fmt, write in corpus.WRITERS.items():
+        path = write(tmp / f"corpus.{fmt}", n)
+        with _store(tmp, f"ingest-{fmt}.db"):
+            upload = _Upload(path)
+            start = time.perf_counter()
+            result = ingest_files([upload], workers=1)
+            elapsed = time.perf_counter() - start
+            upload.stream.close()
+        results.add(f"ingest.{fmt}", result["fragment_count"] / elapsed, "fragments/s", "higher")
+
+
+def bench_queries(results: _Results, scale: dict, tmp: Path):
+    for n in scale["query"]:
+        with _store(tmp, f"query-{n}.db"):
+            _populate(n)
+            deep_id = storage.list_fragments(limit=1, offset=n // 2)[0]["id"]
+            deep = storage.encode_cursor({"id": deep_id})
+
+            for label, fn in (
+                ("list.first_page", lambda: storage.fetch_page(limit=25)),
+                ("list.deep_cursor", lambda: storage.fetch_page(cursor=deep, limit=25)),
+                ("search.common", lambda: storage.fetch_page(query=corpus.COMMON_TERM, limit=25)),
+                ("search.rare", lambda: storage.fetch_page(query=corpus.RARE_TERM, limit=25)),
+            ):
+                kind, _, case = label.partition(".")
+                latency = _latency_ms(fn)
+                for stat, value in latency.items():
+                    results.add(f"{kind}.{n}.{case}.{stat}", value, "ms", "lower")
+
+
+def bench_similarity(results: _Results, scale: dict, tmp: Path):
+    from similarity import compute_similarity
+
+    for n in scale["similarity"]:
+        fragments = list(enumerate(corpus.fragments(n)))
+        start = time.perf_counter()
+        compute_similarity(fragments)
+        results.add(f"similarity.{n}", time.perf_counter() - start, "s", "lower")
+
+
+def bench_stage1(results: _Results, scale: dict, tmp: Path):
+    from concept_emergence import stage1
+
+    cwd = os.getcwd()
+    for mode in ("exact", "ann"):
+        for n in scale["stage1"]:
+            # stage1 and its caches use relative paths; run in a fresh dir.
+            work = tmp / f"stage1-{mode}-{n}"
+            work.mkdir()
+            os.chdir(work)
+            try:
+                with _store(work, "fragments.db"):
+                    _populate(n)
+                    start = time.perf_counter()
+                    stage1.run_stage1(
+                        output_path=None,
+                        mode=mode,
+                        ann_index_path=work / "ann.npz",
+                        adjacency_dir=work / "adjacency",
+                    )
+                    elapsed = time.perf_counter() - start
+            finally:
+                os.chdir(cwd)
+            results.add(f"stage1.{mode}.{n}", elapsed, "s", "lower")
+
+
+def bench_export(results: _Results, scale: dict, tmp: Path):
+    from recombulator import EXPORT_FORMATS, iter_all_fragments, stream_export
+
+    n = scale["export"]
+    with _store(tmp, "export.db"):
+        _populate(n)
+        for fmt in EXPORT_FORMATS:
+            start = time.perf_counter()
+            size = sum(len(chunk) for chunk in stream_export(iter_all_fragments(), fmt))
+            elapsed = time.perf_counter() - start
+            results.add(f"export.{fmt}", size / elapsed / 1e6, "MB/s", "higher")
+
+
+SCENARIOS = {
+    "ingest": bench_ingest,
+    "query": bench_queries,
+    "similarity": bench_similarity,
+    "stage1": bench_stage1,
+    "export": bench_export,
+}
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scale_name: str = "small", only=None) -> dict:
+    scale = SCALES[scale_name]
+    results = _Results()
+    for name, scenario in SCENARIOS.items():
+        if only and not any(name.startswith(prefix) for prefix in only):
+            continue
+        print(f"{name}:", flush=True)
+        with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as tmp:
+            scenario(results, scale, Path(tmp))
+    return {
+        "meta": {
+            "scale": scale_name,
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "commit": _commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "metrics": results.metrics,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float = 0.2):
+    """
+    ``[(name, baseline, current, change, regressed), ...]`` for metrics in
+    both runs. ``change`` is the relative change, positive when worse.
+    """
+    rows = []
+    for name, base in sorted(baseline["metrics"].items()):
+        cur = current["metrics"].get(name)
+        if cur is None or not base["value"]:
+            continue
+        change = (cur["value"] - base["value"]) / base["value"]
+        if base["better"] == "higher":
+            change = -change
+        rows.append((name, base["value"], cur["value"], change, change > tolerance))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="run scenarios and write a JSON result")
+    run_p.add_argument("--scale", choices=SCALES, default="small")
+    run_p.add_argument("--only", nargs="*", help="scenario name prefixes to run")
+    run_p.add_argument("--out", type=Path, help="result file (default: baselines/<scale>.json)")
+
+    cmp_p = sub.add_parser("compare", help="compare a result against a baseline")
+    cmp_p.add_argument("baseline", type=Path)
+    cmp_p.add_argument("current", type=Path)
+    cmp_p.add_argument("--tolerance", type=float, default=0.2)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        result = run(args.scale, args.only)
+        out = args.out or BASELINE_DIR / f"{args.scale}.json"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"wrote {out}")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    rows = compare(baseline, current, args.tolerance)
+    for name, base, cur, change, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{name:<40} {base:>12,.4f} {cur:>12,.4f} {change:>+8.1%} {flag}")
+    regressions = [row for row in rows if row[4]]
+    print(f"{len(rows)} metrics compared, {len(regressions)} regressed "
+          f"beyond {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
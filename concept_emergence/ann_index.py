@@ -0,0 +1,204 @@
+"""
+Approximate Nearest-Neighbour Index (Stage 1)
+
+Random-hyperplane LSH forest over fragment embeddings (cosine similarity).
+
+Design goals:
+- Incremental: fragments are added as they are appended, nothing is rebuilt
+- Derived: the on-disk file is a cache, safe to delete and regenerate;
+  it records the embedding model, and is discarded when that changes
+- Exact re-ranking: candidates from the hash tables are scored exactly, so
+  reported similarities are true cosine values; only recall is approximate
+- Safe for Stage 1 (signals only, no concepts)
+"""
+
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+import numpy as np
+
+from concept_emergence.embeddings_offline import EMBEDDING_DIM, MODEL_ID
+
+DEFAULT_INDEX_PATH = "logs/stage1_ann.npz"
+
+DEFAULT_TABLES = 8
+DEFAULT_BITS = 16
+
+
+class AnnIndex:
+    """
+    ``n_tables`` independent hash tables, each keyed by the sign pattern of
+    a vector against ``n_bits`` random hyperplanes. A query probes its own
+    bucket in every table plus, with ``probes=1``, every bucket one bit away.
+    """
+
+    def __init__(
+        self,
+        dim: int = EMBEDDING_DIM,
+        n_tables: int = DEFAULT_TABLES,
+        n_bits: int = DEFAULT_BITS,
+        seed: int = 0,
+        model_id: str = MODEL_ID,
+    ):
+        self.dim = dim
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self.seed = seed
+        self.model_id = model_id
+        rng = np.random.default_rng(seed)
+        self._planes = rng.standard_normal((n_tables * n_bits, dim)).astype(np.float32)
+        self._weights = 1 << np.arange(n_bits, dtype=np.int64)
+
+        self._ids = np.empty(0, dtype=np.int64)
+        self._vectors = np.empty((0, dim), dtype=np.float32)
+        self._size = 0
+        self._rows = {}
+        self._buckets = [{} for _ in range(n_tables)]
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, fragment_id):
+        return fragment_id in self._rows
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self._ids[: self._size]
+
+    def _normalize(self, vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        return vectors / norms
+
+    def _codes(self, vectors: np.ndarray) -> np.ndarray:
+        """(len(vectors), n_tables) bucket keys."""
+        bits = (vectors @ self._planes.T > 0).reshape(-1, self.n_tables, self.n_bits)
+        return bits @ self._weights
+
+    def _grow(self, needed: int):
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity, 1024)
+        ids = np.empty(capacity, dtype=np.int64)
+        vectors = np.empty((capacity, self.dim), dtype=np.float32)
+        ids[: self._size] = self.ids
+        vectors[: self._size] = self._vectors[: self._size]
+        self._ids, self._vectors = ids, vectors
+
+    def add_many(self, fragment_ids: Iterable[int], vectors) -> int:
+        """
+        Append vectors. Ids already in the index are skipped (fragments are
+        immutable, so their embedding cannot have changed). Returns the
+        number added.
+        """
+        fragment_ids = list(fragment_ids)
+        vectors = self._normalize(vectors)
+        fresh = []
+        for pos, fid in enumerate(fragment_ids):
+            if fid not in self._rows:
+                self._rows[fid] = -1  # reserve; also dedups within the call
+                fresh.append(pos)
+        if not fresh:
+            return 0
+
+        vectors = vectors[fresh]
+        start = self._size
+        self._grow(start + len(fresh))
+        self._vectors[start : start + len(fresh)] = vectors
+        for offset, pos in enumerate(fresh):
+            fid = fragment_ids[pos]
+            self._ids[start + offset] = fid
+            self._rows[fid] = start + offset
+
+        for offset, codes in enumerate(self._codes(vectors).tolist()):
+            for table, code in zip(self._buckets, codes):
+                table.setdefault(code, []).append(start + offset)
+
+        self._size += len(fresh)
+        return len(fresh)
+
+    def add(self, fragment_id: int, vector) -> bool:
+        return self.add_many([fragment_id], [vector]) == 1
+
+    def _candidates(self, codes, probes: int) -> np.ndarray:
+        rows = []
+        flips = [0] + ([1 << b for b in range(self.n_bits)] if probes else [])
+        for table, code in zip(self._buckets, codes):
+            for flip in flips:
+                bucket = table.get(code ^ flip)
+                if bucket:
+                    rows.extend(bucket)
+        return np.unique(np.array(rows, dtype=np.int64))
+
+    def query(
+        self,
+        vector,
+        k: int = 10,
+        min_sim: float = 0.0,
+        probes: int = 1,
+    ) -> List[Tuple[int, float]]:
+        """
+        Up to ``k`` indexed fragments most similar to ``vector`` with cosine
+        similarity ≥ ``min_sim``, best first, as ``[(fragment_id, sim), ...]``.
+        """
+        q = self._normalize(vector)
+        rows = self._candidates(self._codes(q)[0].tolist(), probes)
+        if not rows.size:
+            return []
+
+        sims = self._vectors[rows] @ q[0]
+        keep = sims >= min_sim
+        rows, sims = rows[keep], sims[keep]
+        if rows.size > k:
+            top = np.argpartition(-sims, k - 1)[:k]
+            rows, sims = rows[top], sims[top]
+        order = np.lexsort((rows, -sims))
+        return [
+            (int(self._ids[r]), float(s))
+            for r, s in zip(rows[order].tolist(), sims[order].tolist())
+        ]
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        """
+        Persist vectors, hashing parameters and the embedding model id.
+        Buckets are rebuilt on load.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                ids=self.ids,
+                vectors=self._vectors[: self._size],
+                params=np.array([self.dim, self.n_tables, self.n_bits, self.seed]),
+                model_id=np.array(self.model_id),
+            )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH) -> "AnnIndex":
+        with np.load(path) as data:
+            dim, n_tables, n_bits, seed = (int(v) for v in data["params"])
+            index = cls(dim, n_tables, n_bits, seed, str(data["model_id"]))
+            index.add_many(data["ids"].tolist(), data["vectors"])
+        return index
+
+    @classmethod
+    def open(cls, path=DEFAULT_INDEX_PATH, **params) -> "AnnIndex":
+        """
+        Load the index at ``path``, or start an empty one if it is missing or
+        was built with different parameters or another embedding model
+        (``model_id``, MODEL_ID unless given).
+        """
+        params.setdefault("model_id", MODEL_ID)
+        try:
+            index = cls.load(path)
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            return cls(**params)
+        for name, value in params.items():
+            if getattr(index, name) != value:
+                return cls(**params)
+        return index
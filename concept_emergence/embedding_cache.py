@@ -0,0 +1,144 @@
+"""
+Content-Addressed Embedding Cache (Stage 1)
+
+Stores one embedding per distinct fragment text, keyed by the SHA-256 of
+the text, for a single embedding model.
+
+Layout (all derived, safe to delete):
+- vectors.f32  row-major float32 vectors, appended, read via np.memmap
+- hashes.bin   32-byte content hash per row, same order as vectors.f32
+- meta.json    {"model_id", "dim", "rows"}; rows beyond "rows" are ignored
+
+A different model id or dimension discards the cache on open.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Callable, Iterable, List
+
+import numpy as np
+
+from concept_emergence.embeddings_offline import EMBEDDING_DIM, MODEL_ID, embed_many
+
+DEFAULT_CACHE_DIR = "data/embedding_cache"
+
+HASH_BYTES = 32
+
+
+def content_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        directory=DEFAULT_CACHE_DIR,
+        model_id: str = MODEL_ID,
+        dim: int = EMBEDDING_DIM,
+        embed_fn: Callable[[List[str]], np.ndarray] = embed_many,
+    ):
+        self.directory = Path(directory)
+        self.model_id = model_id
+        self.dim = dim
+        self.embed_fn = embed_fn
+        self._vectors_path = self.directory / "vectors.f32"
+        self._hashes_path = self.directory / "hashes.bin"
+        self._meta_path = self.directory / "meta.json"
+        self._rows = {}
+        self._count = 0
+        self._mmap = None
+        self._open()
+
+    def __len__(self):
+        return self._count
+
+    def _open(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            meta = json.loads(self._meta_path.read_text())
+        except (FileNotFoundError, ValueError):
+            meta = None
+
+        if not meta or meta.get("model_id") != self.model_id or meta.get("dim") != self.dim:
+            self._reset()
+            return
+
+        count = int(meta["rows"])
+        sizes = (
+            (self._vectors_path, self.dim * 4),
+            (self._hashes_path, HASH_BYTES),
+        )
+        if any(not path.exists() or path.stat().st_size < count * width
+               for path, width in sizes):
+            self._reset()
+            return
+
+        # Drop any tail written after the last committed meta.json.
+        for path, width in sizes:
+            with open(path, "r+b") as f:
+                f.truncate(count * width)
+
+        hashes = self._hashes_path.read_bytes()
+        self._rows = {
+            hashes[i * HASH_BYTES : (i + 1) * HASH_BYTES]: i for i in range(count)
+        }
+        self._count = count
+
+    def _reset(self):
+        self._vectors_path.write_bytes(b"")
+        self._hashes_path.write_bytes(b"")
+        self._rows = {}
+        self._count = 0
+        self._mmap = None
+        self._write_meta()
+
+    def _write_meta(self):
+        tmp = self._meta_path.with_name("meta.json.tmp")
+        tmp.write_text(json.dumps({
+            "model_id": self.model_id,
+            "dim": self.dim,
+            "rows": self._count,
+        }))
+        tmp.replace(self._meta_path)
+
+    def _matrix(self) -> np.ndarray:
+        if self._mmap is None or len(self._mmap) != self._count:
+            if not self._count:
+                return np.empty((0, self.dim), dtype=np.float32)
+            self._mmap = np.memmap(
+                self._vectors_path, dtype=np.float32, mode="r",
+                shape=(self._count, self.dim),
+            )
+        return self._mmap
+
+    def _append(self, hashes: List[bytes], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with open(self._vectors_path, "ab") as f:
+            f.write(vectors.tobytes())
+        with open(self._hashes_path, "ab") as f:
+            f.write(b"".join(hashes))
+        for h in hashes:
+            self._rows[h] = self._count
+            self._count += 1
+        self._write_meta()
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        (len(texts), dim) float32 embeddings. Only texts whose content hash
+        is not cached yet are passed to ``embed_fn``, in one batch.
+        """
+        # One pass; only texts that still need embedding are kept, so a lazy
+        # source (e.g. FragmentSnapshot.texts()) is never held all at once.
+        hashes = []
+        missing = {}
+        for t in texts:
+            h = content_hash(t)
+            hashes.append(h)
+            if h not in self._rows and h not in missing:
+                missing[h] = t
+        if missing:
+            self._append(list(missing), self.embed_fn(list(missing.values())))
+
+        rows = np.fromiter((self._rows[h] for h in hashes), dtype=np.int64, count=len(hashes))
+        return np.asarray(self._matrix()[rows])
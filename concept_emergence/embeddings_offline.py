@@ -11,10 +11,16 @@ Design goals:
 """
 
 import hashlib
-from typing import List
+from typing import Iterable, List
+
+import numpy as np
 
 EMBEDDING_DIM = 8
 
+# Identifies the embedding function. Change it whenever embed() changes so
+# cached vectors are invalidated (see embedding_cache).
+MODEL_ID = "offline_hash_v1"
+
 
 def embed(text: str) -> List[float]:
     """Create a deterministic vector from text using hashing.
@@ -24,3 +30,12 @@ def embed(text: str) -> List[float]:
     h = hashlib.sha256(text.encode("utf-8")).digest()
     # Convert first bytes into a small numeric vector
     return [h[i] / 255.0 for i in range(EMBEDDING_DIM)]
+
+
+def embed_many(texts: Iterable[str]) -> np.ndarray:
+    """Embed a batch of texts as a (len(texts), EMBEDDING_DIM) float32 array.
+
+    A real local model would run one batched forward pass here.
+    """
+    rows = [embed(t) for t in texts]
+    return np.array(rows, dtype=np.float32).reshape(len(rows), EMBEDDING_DIM)
@@ -0,0 +1,137 @@
+"""
+Stage 1 Signal Adjacency Store
+
+Compact, read-only CSR layout of Stage 1 similarity signals, so a reader can
+look up the neighbours of a handful of fragments without parsing every
+signal.
+
+Layout (derived, regenerated by every run_stage1):
+- manifest.json          {"version", "fragments", "signals"}; written last
+- <version>.ids.npy      sorted fragment ids that have at least one signal
+- <version>.offsets.npy  row i spans neighbours[offsets[i]:offsets[i + 1]]
+- <version>.neighbours.npy  neighbour ids, ascending within each row
+- <version>.scores.npy   float32 similarity per neighbour
+
+Signals are undirected: each {a, b} appears in both rows.
+Arrays are memory-mapped; readers reopen when manifest.json changes.
+"""
+
+import json
+import os
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+DEFAULT_ADJACENCY_DIR = "logs/concept_stage1_adjacency"
+
+_ARRAYS = ("ids", "offsets", "neighbours", "scores")
+
+
+def write_adjacency(signals, directory=DEFAULT_ADJACENCY_DIR) -> Path:
+    """
+    Write ``[{a, b, similarity}, ...]`` as a new CSR version and switch the
+    manifest to it. Files of older versions are removed best-effort.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+
+    a = np.fromiter((s["a"] for s in signals), dtype=np.int64)
+    b = np.fromiter((s["b"] for s in signals), dtype=np.int64)
+    sim = np.fromiter((s["similarity"] for s in signals), dtype=np.float32)
+
+    src = np.concatenate([a, b])
+    dst = np.concatenate([b, a])
+    scores = np.concatenate([sim, sim])
+    order = np.lexsort((dst, src))
+    src, dst, scores = src[order], dst[order], scores[order]
+
+    ids, counts = np.unique(src, return_counts=True)
+    offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    version = uuid.uuid4().hex
+    arrays = {"ids": ids, "offsets": offsets, "neighbours": dst, "scores": scores}
+    for name in _ARRAYS:
+        np.save(directory / f"{version}.{name}.npy", arrays[name])
+
+    tmp = directory / "manifest.json.tmp"
+    tmp.write_text(json.dumps({
+        "version": version,
+        "fragments": int(len(ids)),
+        "signals": int(len(sim)),
+    }))
+    tmp.replace(directory / "manifest.json")
+
+    for path in directory.glob("*.npy"):
+        if not path.name.startswith(version):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+    return directory
+
+
+class SignalAdjacency:
+    """
+    Memory-mapped view of one adjacency version.
+    """
+
+    def __init__(self, directory=DEFAULT_ADJACENCY_DIR):
+        directory = Path(directory)
+        manifest = json.loads((directory / "manifest.json").read_text())
+        self.version = manifest["version"]
+        arrays = {
+            name: np.load(directory / f"{self.version}.{name}.npy", mmap_mode="r")
+            for name in _ARRAYS
+        }
+        self.ids = arrays["ids"]
+        self.offsets = arrays["offsets"]
+        self.neighbours = arrays["neighbours"]
+        self.scores = arrays["scores"]
+
+    def related(self, fragment_id: int, min_sim: float | None = None) -> List[int]:
+        """Neighbour ids of ``fragment_id`` (ascending), optionally ≥ min_sim."""
+        row = int(np.searchsorted(self.ids, fragment_id))
+        if row >= len(self.ids) or self.ids[row] != fragment_id:
+            return []
+        start, stop = int(self.offsets[row]), int(self.offsets[row + 1])
+        neighbours = self.neighbours[start:stop]
+        if min_sim is not None:
+            neighbours = neighbours[self.scores[start:stop] >= min_sim]
+        return neighbours.tolist()
+
+    def related_many(
+        self, fragment_ids: Iterable[int], min_sim: float | None = None
+    ) -> Dict[int, List[int]]:
+        return {fid: self.related(fid, min_sim) for fid in fragment_ids}
+
+
+_loaded: Dict[str, tuple] = {}
+
+
+def load_adjacency(directory=DEFAULT_ADJACENCY_DIR) -> SignalAdjacency | None:
+    """
+    Process-wide SignalAdjacency for ``directory``, reopened only when its
+    manifest's mtime changes. None if no adjacency has been written.
+    """
+    key = os.fspath(directory)
+    try:
+        mtime = os.stat(os.path.join(key, "manifest.json")).st_mtime_ns
+    except FileNotFoundError:
+        _loaded.pop(key, None)
+        return None
+
+    cached = _loaded.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    try:
+        adjacency = SignalAdjacency(directory)
+    except FileNotFoundError:
+        # A newer version replaced the files between stat() and open.
+        adjacency = SignalAdjacency(directory)
+        mtime = os.stat(os.path.join(key, "manifest.json")).st_mtime_ns
+    _loaded[key] = (mtime, adjacency)
+    return adjacency
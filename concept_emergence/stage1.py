@@ -4,31 +4,63 @@ Stage 1 Concept Emergence — Similarity Signals Only
 UPDATED:
 - Uses real offline deterministic embeddings
 - Still no concepts, labels, or hierarchies
+- All-pairs signals are computed with blocked NumPy matrix products
+- Fragments are loaded as a columnar FragmentSnapshot, not a list of rows,
+  and embeddings are kept as an (ids, matrix) pair of arrays
 """
 
 import sqlite3
 import json
-from typing import List, Tuple
-from concept_emergence.embeddings_offline import embed
+from typing import List
+
+import numpy as np
+
+import metrics
+from concept_emergence.ann_index import DEFAULT_INDEX_PATH, AnnIndex
+from concept_emergence.embedding_cache import EmbeddingCache
+from concept_emergence.embeddings_offline import EMBEDDING_DIM, MODEL_ID
+from concept_emergence.signal_store import DEFAULT_ADJACENCY_DIR, write_adjacency
+from fragment_snapshot import FragmentSnapshot
 
 DB_PATH = "fragments.db"
 
+# Rows of the embedding matrix compared against the rest per step.
+SIGNAL_BLOCK_ROWS = 1024
 
-def load_fragments() -> List[Tuple[int, str]]:
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("SELECT id, content FROM fragments")
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+# Neighbours requested per fragment in "ann" mode.
+ANN_NEIGHBOURS = 20
 
 
-def generate_embeddings():
-    fragments = load_fragments()
-    return [
-        {"fragment_id": fid, "embedding": embed(content)}
-        for fid, content in fragments
-    ]
+def load_fragments() -> FragmentSnapshot:
+    """
+    Every fragment, in id order. Iterates as (id, content) tuples.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return FragmentSnapshot.from_connection(conn)
+    finally:
+        conn.close()
+
+
+def generate_embeddings(cache=None, fragments=None):
+    """
+    Embed every fragment (or the given snapshot / (id, content) pairs),
+    reusing vectors from the content-addressed cache; only texts never seen
+    by the current model are embedded.
+
+    Returns ``(ids, matrix)``: an int64 id array and the (n, dim) float32
+    embeddings in the same order.
+    """
+    if cache is None:
+        cache = EmbeddingCache()
+    if fragments is None:
+        fragments = load_fragments()
+    if isinstance(fragments, FragmentSnapshot):
+        ids, texts = fragments.ids, fragments.texts()
+    else:
+        ids = np.array([fid for fid, _ in fragments], dtype=np.int64)
+        texts = (content for _, content in fragments)
+    return ids, cache.embed(texts)
 
 
 def cosine_similarity(a: List[float], b: List[float]) -> float:
@@ -38,29 +70,124 @@ def cosine_similarity(a: List[float], b: List[float]) -> float:
     return dot / (na * nb) if na and nb else 0.0
 
 
-def generate_similarity_signals(embeddings, threshold=0.75):
+def pack_embeddings(embeddings, dtype=np.float32):
+    """
+    (ids, matrix) with each matrix row L2-normalized once. ``embeddings`` is
+    an ``(ids, matrix)`` pair as generate_embeddings() returns, or a list of
+    ``{fragment_id, embedding}`` dicts. Zero vectors stay zero, so they
+    score 0.0 against everything, as cosine_similarity() does.
+    """
+    if isinstance(embeddings, tuple):
+        ids = np.asarray(embeddings[0], dtype=np.int64)
+        matrix = np.array(embeddings[1], dtype=dtype)
+    else:
+        ids = np.array([e["fragment_id"] for e in embeddings], dtype=np.int64)
+        matrix = np.array([e["embedding"] for e in embeddings], dtype=dtype)
+    if not len(ids):
+        return ids, matrix.reshape(0, 0)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    matrix /= norms
+    return ids, np.ascontiguousarray(matrix)
+
+
+def generate_similarity_signals(embeddings, threshold=0.75, block_rows=SIGNAL_BLOCK_ROWS):
+    """
+    Emit ``{a, b, similarity}`` for every pair (a before b in input order)
+    whose cosine similarity is ≥ threshold. ``embeddings`` is anything
+    pack_embeddings() accepts.
+
+    Each block of rows is multiplied only against itself and later rows, and
+    the strict upper triangle is thresholded with np.nonzero, so signals come
+    out in the same (i, j) order as a nested pairwise loop.
+    """
+    ids, matrix = pack_embeddings(embeddings)
+    n = len(ids)
+
+    # Diagonal and below of a block's leading square: pairs already emitted.
+    lower = np.tri(min(block_rows, n), dtype=bool)
+
     signals = []
-    for i in range(len(embeddings)):
-        for j in range(i + 1, len(embeddings)):
-            sim = cosine_similarity(
-                embeddings[i]["embedding"], embeddings[j]["embedding"]
-            )
-            if sim >= threshold:
-                signals.append({
-                    "a": embeddings[i]["fragment_id"],
-                    "b": embeddings[j]["fragment_id"],
-                    "similarity": round(sim, 4),
-                })
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        size = stop - start
+        sims = matrix[start:stop] @ matrix[start:].T
+        # Keep j > i only: column c of this block is row start + c.
+        sims[:, :size][lower[:size, :size]] = -np.inf
+        rows, cols = np.nonzero(sims >= threshold)
+        values = sims[rows, cols]
+        a_ids = ids[start + rows].tolist()
+        b_ids = ids[start + cols].tolist()
+        for a, b, sim in zip(a_ids, b_ids, values.tolist()):
+            signals.append({"a": a, "b": b, "similarity": round(sim, 4)})
     return signals
 
 
-def run_stage1(output_path="logs/concept_stage1.json", threshold=0.75):
-    embeddings = generate_embeddings()
-    signals = generate_similarity_signals(embeddings, threshold)
+def generate_ann_signals(embeddings, threshold=0.75, index=None, k=ANN_NEIGHBOURS):
+    """
+    Like generate_similarity_signals(), but each fragment is only compared
+    with up to ``k`` candidates from an ANN index instead of every other
+    fragment. Fragments missing from ``index`` are added to it first.
+
+    Recall is approximate: a pair is found if either side retrieves the
+    other. Reported similarities are exact.
+    """
+    if index is None:
+        index = AnnIndex()
+    ids, matrix = pack_embeddings(embeddings)
+    index.add_many(ids.tolist(), matrix)
+
+    position = {fid: pos for pos, fid in enumerate(ids.tolist())}
+    pairs = {}
+    for pos, fid in enumerate(ids.tolist()):
+        # k + 1 because the fragment itself is always its best match.
+        for other, sim in index.query(matrix[pos], k + 1, min_sim=threshold):
+            other_pos = position.get(other)
+            if other_pos is None or other_pos == pos:
+                continue
+            key = (pos, other_pos) if pos < other_pos else (other_pos, pos)
+            pairs[key] = sim
+
+    return [
+        {"a": int(ids[i]), "b": int(ids[j]), "similarity": round(sim, 4)}
+        for (i, j), sim in sorted(pairs.items())
+    ]
+
+
+def run_stage1(
+    output_path="logs/concept_stage1.json",
+    threshold=0.75,
+    mode="exact",
+    ann_index_path=DEFAULT_INDEX_PATH,
+    adjacency_dir=DEFAULT_ADJACENCY_DIR,
+    fragments=None,
+):
+    """
+    mode="exact" compares every pair; mode="ann" uses (and incrementally
+    updates) the derived ANN index at ``ann_index_path``. ``fragments`` (a
+    FragmentSnapshot) defaults to a fresh snapshot of the store.
+
+    Signals are always written to the CSR adjacency store in
+    ``adjacency_dir``, which is what readers use. The JSON document at
+    ``output_path`` is an audit export; pass None to skip it.
+    """
+    if mode not in ("exact", "ann"):
+        raise ValueError(f"unknown Stage 1 mode: {mode!r}")
+
+    with metrics.timed("stage1_seconds", mode=mode):
+        embeddings = generate_embeddings(fragments=fragments)
+        if mode == "ann":
+            index = AnnIndex.open(ann_index_path, dim=EMBEDDING_DIM, model_id=MODEL_ID)
+            signals = generate_ann_signals(embeddings, threshold, index)
+            index.save(ann_index_path)
+        else:
+            signals = generate_similarity_signals(embeddings, threshold)
+    metrics.count("stage1_signals_total", len(signals), mode=mode)
 
     output = {
         "stage": 1,
-        "embedding_model": "offline_hash_v1",
+        "embedding_model": MODEL_ID,
+        "signal_mode": mode,
         "threshold": threshold,
         "signals": signals,
         "constraints": {
@@ -70,8 +197,11 @@ def run_stage1(output_path="logs/concept_stage1.json", threshold=0.75):
         },
     }
 
-    with open(output_path, "w") as f:
-        json.dump(output, f, indent=2)
+    write_adjacency(signals, adjacency_dir)
+
+    if output_path is not None:
+        with open(output_path, "w") as f:
+            json.dump(output, f, indent=2)
 
     return output
 
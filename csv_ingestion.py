@@ -6,33 +6,50 @@ Rules:
 - Each non-header row becomes one fragment
 - No column semantics inferred
 - Header preserved as provenance text
+
+Rows are decoded and yielded one at a time (iter_csv_fragments), so memory
+does not grow with file size.
 """
 
+import codecs
 import csv
 import io
+import os
 
 
-def extract_csv_fragments(csv_bytes: bytes, filename: str):
-    text = csv_bytes.decode("utf-8", errors="ignore")
-    reader = csv.reader(io.StringIO(text))
-    rows = list(reader)
-
-    if not rows:
-        return []
+def _iter_rows(binary, filename: str):
+    lines = codecs.iterdecode(binary, "utf-8", errors="ignore")
+    reader = csv.reader(lines)
 
-    header = rows[0]
-    fragments = []
+    header = next(reader, None)
+    if header is None:
+        return
+    header = ", ".join(header)
 
-    for i, row in enumerate(rows[1:], start=2):
+    for i, row in enumerate(reader, start=2):
         content = ", ".join(row).strip()
         if not content:
             continue
-        fragments.append({
+        yield {
             "content": content,
             "source": filename,
             "source_type": "csv",
             "source_page": i,
-            "header": ", ".join(header),
-        })
+            "header": header,
+        }
+
 
-    return fragments
+def iter_csv_fragments(source, filename: str):
+    """
+    Yield row fragments lazily from a path or a binary file object, decoding
+    UTF-8 incrementally.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as binary:
+            yield from _iter_rows(binary, filename)
+    else:
+        yield from _iter_rows(source, filename)
+
+
+def extract_csv_fragments(csv_bytes: bytes, filename: str):
+    return list(iter_csv_fragments(io.BytesIO(csv_bytes), filename))
@@ -8,11 +8,12 @@ Rules:
 - Conservative paragraph-level fragmentation
 """
 
+from io import BytesIO
 from docx import Document
 
 
 def extract_docx_fragments(docx_bytes: bytes, filename: str):
-    doc = Document(docx_bytes)
+    doc = Document(BytesIO(docx_bytes))
     fragments = []
 
     for para in doc.paragraphs:
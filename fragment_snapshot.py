@@ -0,0 +1,169 @@
+"""
+Columnar Fragment Snapshot
+--------------------------
+
+Read-only, in-memory copy of the fragment store for analysis passes
+(similarity, Stage 1), laid out as a few flat arrays instead of one
+Python object per fragment:
+
+- ids            int64, one per fragment, in store order
+- offsets        int64, n + 1; fragment i's text is data[offsets[i]:offsets[i + 1]]
+- data           one UTF-8 buffer holding every text back to back
+- source_codes / source_type_codes
+                 int32 indexes into the interned ``sources`` /
+                 ``source_types`` tables; -1 for NULL
+
+Rules:
+- Built in a single streamed scan; no per-fragment objects are kept
+- Texts are decoded only when asked for (text(i), texts(), iteration)
+- Slicing (snapshot[a:b]) is zero-copy: the slice shares every array
+- Iterating yields ``(id, text)`` tuples, so code written for
+  ``List[Tuple[int, str]]`` accepts a snapshot unchanged
+- Snapshots are never written back; the database is only read
+"""
+
+import sqlite3
+from array import array
+from typing import Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+# Rows fetched from the cursor per step while building.
+FETCH_ROWS = 10_000
+
+SNAPSHOT_SQL = "SELECT id, content, source, source_type FROM fragments ORDER BY id"
+
+
+class _Interner:
+    def __init__(self):
+        self.values: List[str] = []
+        self._codes = {}
+
+    def code(self, value) -> int:
+        if value is None:
+            return -1
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class FragmentSnapshot:
+    def __init__(
+        self,
+        ids: np.ndarray,
+        offsets: np.ndarray,
+        data,
+        source_codes: np.ndarray,
+        source_type_codes: np.ndarray,
+        sources: List[str],
+        source_types: List[str],
+    ):
+        self.ids = ids
+        self.offsets = offsets
+        self.data = memoryview(data)
+        self.source_codes = source_codes
+        self.source_type_codes = source_type_codes
+        self.sources = sources
+        self.source_types = source_types
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> "FragmentSnapshot":
+        """
+        Build from ``(id, content[, source[, source_type]])`` rows in one
+        pass. Texts are encoded straight into the shared buffer.
+        """
+        ids, offsets = array("q"), array("q", [0])
+        source_codes, source_type_codes = array("i"), array("i")
+        sources, source_types = _Interner(), _Interner()
+        data = bytearray()
+        for row in rows:
+            ids.append(row[0])
+            data += row[1].encode("utf-8")
+            offsets.append(len(data))
+            source_codes.append(sources.code(row[2] if len(row) > 2 else None))
+            source_type_codes.append(source_types.code(row[3] if len(row) > 3 else None))
+        return cls(
+            np.frombuffer(ids, dtype=np.int64),
+            np.frombuffer(offsets, dtype=np.int64),
+            data,
+            np.frombuffer(source_codes, dtype=np.int32),
+            np.frombuffer(source_type_codes, dtype=np.int32),
+            sources.values,
+            source_types.values,
+        )
+
+    @classmethod
+    def from_connection(cls, conn: sqlite3.Connection, batch_rows: int = FETCH_ROWS):
+        """Snapshot every fragment visible to ``conn``, in id order."""
+        cur = conn.execute(SNAPSHOT_SQL)
+
+        def rows():
+            while True:
+                batch = cur.fetchmany(batch_rows)
+                if not batch:
+                    return
+                yield from batch
+
+        return cls.from_rows(rows())
+
+    @classmethod
+    def from_store(cls) -> "FragmentSnapshot":
+        """Snapshot the application store (storage.DB_PATH)."""
+        from storage import reader
+
+        return cls.from_connection(reader())
+
+    def __len__(self):
+        return len(self.ids)
+
+    def text(self, i: int) -> str:
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def texts(self) -> Iterator[str]:
+        bounds = self.offsets.tolist()
+        data = self.data
+        for start, stop in zip(bounds, bounds[1:]):
+            yield str(data[start:stop], "utf-8")
+
+    def source(self, i: int) -> str | None:
+        code = self.source_codes[i]
+        return self.sources[code] if code >= 0 else None
+
+    def source_type(self, i: int) -> str | None:
+        code = self.source_type_codes[i]
+        return self.source_types[code] if code >= 0 else None
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                raise ValueError("snapshot slices must be contiguous")
+            stop = max(start, stop)
+            return FragmentSnapshot(
+                self.ids[start:stop],
+                self.offsets[start:stop + 1],
+                self.data,
+                self.source_codes[start:stop],
+                self.source_type_codes[start:stop],
+                self.sources,
+                self.source_types,
+            )
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("snapshot index out of range")
+        return int(self.ids[key]), self.text(key)
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        return zip(self.ids.tolist(), self.texts())
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by this snapshot's slice of the columns and text."""
+        text = int(self.offsets[-1] - self.offsets[0]) if len(self.offsets) else 0
+        return (
+            self.ids.nbytes + self.offsets.nbytes + text
+            + self.source_codes.nbytes + self.source_type_codes.nbytes
+        )
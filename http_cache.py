@@ -0,0 +1,54 @@
+"""
+HTTP Revalidation
+-----------------
+
+Strong ETags for views over the append-only store.
+
+A fragment page or export is fully determined by the newest fragment id,
+the request's query parameters and (for views showing Stage 1 relations)
+the signal file version. Hashing those gives a validator that can be
+checked before any page query or template render; a matching
+If-None-Match gets an empty 304.
+
+Rules:
+- Responses are marked "Cache-Control: no-cache": clients and proxies may
+  store them but must revalidate every time
+- ETags are computed from request inputs only, never from the response
+  body, so streamed responses can carry one too
+- Views read the store only up to the watermark their tag names
+  (``id <= watermark``), so one tag never labels two different bodies
+"""
+
+import hashlib
+
+from flask import Response, request
+
+CACHE_CONTROL = "no-cache"
+
+
+def etag(*parts) -> str:
+    """Strong ETag value (unquoted) for ``parts``."""
+    digest = hashlib.sha256(repr(parts).encode("utf-8")).hexdigest()
+    return digest[:32]
+
+
+def request_etag(watermark: int, *extra) -> str:
+    """
+    ETag for the current request: ``watermark``, the request path, its
+    query parameters (order-insensitive) and ``extra``.
+    """
+    params = sorted(request.args.items(multi=True))
+    return etag(watermark, request.path, params, *extra)
+
+
+def not_modified(tag: str) -> Response | None:
+    """A 304 response if the client already holds ``tag``, else None."""
+    if request.if_none_match.contains(tag):
+        return Response(status=304, headers={"ETag": f'"{tag}"', "Cache-Control": CACHE_CONTROL})
+    return None
+
+
+def validated(response: Response, tag: str) -> Response:
+    response.set_etag(tag)
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
@@ -0,0 +1,538 @@
+"""
+Ingestion Dispatch — Stage 1 Safe
+--------------------------------
+
+Routes uploaded files to the format-specific extractors and appends the
+resulting fragments to the store.
+
+Uploads are spooled to a temporary directory on disk, never read into
+memory whole.
+
+Rules:
+- Each file is processed independently
+- Unsupported or unreadable files are logged and skipped, never fatal
+- All fragments of one upload share an ingestion_batch_id
+- Writes are append-only (storage.add_fragments)
+- An upload identical to one already ingested is skipped before extraction;
+  a ZIP counts as ingested once fragments from any of its members are stored
+- ZIP members are independent uploads; unsupported members are logged and
+  skipped, and archives past the size / member limits are rejected
+
+Parallel mode (workers > 1):
+- Files, and page ranges of large PDFs, are extracted in a process pool
+- Results are merged back in upload / page order; only this process writes
+- A file that fails, or kills its worker, is logged and skipped; a broken
+  pool is replaced
+"""
+
+import hashlib
+import logging
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from pathlib import Path, PurePath, PurePosixPath
+
+from csv_ingestion import extract_csv_fragments, iter_csv_fragments
+from docx_ingestion import extract_docx_fragments
+from pdf_ingestion import (
+    count_pdf_pages,
+    extract_pdf_fragments,
+    extract_pdf_page_range,
+    iter_pdf_fragments,
+)
+import metrics
+from storage import add_fragments, batch_source_counts, existing_source_hashes
+
+logger = logging.getLogger(__name__)
+
+# Extraction processes per ingest: one per core, at most 8 unless set
+# explicitly. INGEST_WORKERS=1 keeps everything in-process.
+INGEST_WORKERS = int(os.environ.get("INGEST_WORKERS", str(min(os.cpu_count() or 1, 8))))
+
+# Smallest PDF page range handed to one worker.
+MIN_PAGES_PER_TASK = 8
+
+# Copy buffer used when spooling uploads to disk.
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+# Spooled files checked against the store with one query.
+DEDUP_WINDOW = 64
+
+# Zip-bomb guards for ZIP uploads: member count and total uncompressed bytes.
+MAX_ZIP_MEMBERS = int(os.environ.get("MAX_ZIP_MEMBERS", "10000"))
+MAX_ZIP_BYTES = int(os.environ.get("MAX_ZIP_BYTES", str(2 * 1024 ** 3)))
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def extract_text_fragments(text_bytes: bytes, filename: str):
+    """
+    Plain text / Markdown: verbatim, chunked only on blank lines.
+    """
+    text = text_bytes.decode("utf-8", errors="ignore")
+    fragments = []
+    for block in text.split("\n\n"):
+        block = block.strip()
+        if not block:
+            continue
+        fragments.append({
+            "content": block,
+            "source": filename,
+        })
+    return fragments
+
+
+EXTRACTORS = {
+    "txt": extract_text_fragments,
+    "md": extract_text_fragments,
+    "csv": extract_csv_fragments,
+    "docx": extract_docx_fragments,
+    "pdf": extract_pdf_fragments,
+}
+
+# Extractors that read from a path and yield fragments lazily.
+PATH_EXTRACTORS = {
+    "csv": iter_csv_fragments,
+    "pdf": iter_pdf_fragments,
+}
+
+
+def source_type_for(filename: str) -> str:
+    return PurePath(filename).suffix.lower().lstrip(".")
+
+
+def iter_file_fragments(path, filename: str, batch_id: str):
+    """
+    Yield stamped fragments for the spooled file at ``path``. Formats in
+    PATH_EXTRACTORS are streamed from disk; the rest are read whole.
+    Unsupported or unreadable files yield nothing.
+    """
+    source_type = source_type_for(filename)
+    if source_type in PATH_EXTRACTORS:
+        extractor, source = PATH_EXTRACTORS[source_type], path
+    elif source_type in EXTRACTORS:
+        extractor, source = EXTRACTORS[source_type], None
+    else:
+        logger.info("Skipping unsupported file: %s", filename)
+        return
+
+    def extracted():
+        yield from extractor(Path(path).read_bytes() if source is None else source, filename)
+
+    try:
+        for f in metrics.timed_iter(extracted(), "extraction_seconds", format=source_type):
+            f.setdefault("source_type", source_type)
+            f["ingestion_batch_id"] = batch_id
+            yield f
+    except Exception:
+        logger.exception("Failed to extract %s", filename)
+
+
+def extract_file(path, filename: str, batch_id: str):
+    """
+    List form of iter_file_fragments(); the unit of work for pool workers.
+    """
+    return list(iter_file_fragments(path, filename, batch_id))
+
+
+def _stamp(fragments, source_type: str, batch_id: str):
+    for f in fragments:
+        f.setdefault("source_type", source_type)
+        f["ingestion_batch_id"] = batch_id
+    return fragments
+
+
+def extract_pdf_range(path, filename: str, batch_id: str, start: int, stop: int):
+    """
+    One worker's share of a PDF. Per-page failures are already isolated by
+    the extractor; a failure to open the document yields no fragments.
+    """
+    try:
+        fragments = extract_pdf_page_range(path, filename, start, stop)
+    except Exception:
+        logger.exception("Failed to extract %s pages %s-%s", filename, start, stop)
+        return []
+    return _stamp(fragments, "pdf", batch_id)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Long-lived extraction pool. Workers are spawned, not forked, so they are
+    safe to start from a threaded web server.
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(
+                workers, mp_context=multiprocessing.get_context("spawn")
+            )
+            _pool_workers = workers
+        return _pool
+
+
+def _plan(path, filename: str, batch_id: str, workers: int):
+    """
+    Extraction tasks for one file, as (callable, args), in output order.
+    """
+    if source_type_for(filename) == "pdf":
+        try:
+            pages = count_pdf_pages(path)
+        except Exception:
+            pages = 0
+        if pages > MIN_PAGES_PER_TASK:
+            step = max(MIN_PAGES_PER_TASK, math.ceil(pages / workers))
+            return [
+                (extract_pdf_range, (path, filename, batch_id, start, start + step - 1))
+                for start in range(1, pages + 1, step)
+            ]
+    return [(extract_file, (path, filename, batch_id))]
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """
+    Drop ``pool`` after one of its workers died, so the next _get_pool()
+    call starts a fresh one. A pool already replaced is left alone.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def extract_files_parallel(items, batch_id: str, workers: int):
+    """
+    Extract spooled ``(filename, path, ...)`` items across a process pool.
+    Workers open the files by path. Up to ``2 * workers`` items are in
+    flight at once, so a lazy item stream (ZIP members) is never spooled
+    far ahead. Yields ``(item, fragments)`` in item order, pages in page
+    order.
+
+    A file whose extraction raises in a worker is logged and yields no
+    fragments. If a worker dies, the pool is replaced and the files that
+    were in flight are extracted again one at a time, so only the file
+    that kills a worker is skipped.
+    """
+    pending = deque()
+
+    def submit(item):
+        filename, path = item[:2]
+        pool = _get_pool(workers)
+        tasks = _plan(path, filename, batch_id, workers)
+        try:
+            return pool, [pool.submit(fn, *args) for fn, args in tasks]
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            pool = _get_pool(workers)
+            return pool, [pool.submit(fn, *args) for fn, args in tasks]
+
+    def collect(item, futures):
+        try:
+            return [f for future in futures for f in future.result()]
+        except BrokenProcessPool:
+            raise
+        except Exception:
+            logger.exception("Failed to extract %s", item[0])
+            return []
+
+    def isolated(item):
+        pool, futures = submit(item)
+        try:
+            return collect(item, futures)
+        except BrokenProcessPool:
+            logger.exception("Extraction worker died on %s; skipping it", item[0])
+            _discard_pool(pool)
+            return []
+
+    def drain(limit):
+        while len(pending) > limit:
+            item, pool, futures = pending.popleft()
+            try:
+                fragments = collect(item, futures)
+            except BrokenProcessPool:
+                logger.warning("Extraction pool broke; retrying %s files one by one",
+                               len(pending) + 1)
+                _discard_pool(pool)
+                retry = [item, *(other for other, _, _ in pending)]
+                pending.clear()
+                for other in retry:
+                    yield other, isolated(other)
+                continue
+            yield item, fragments
+
+    for item in items:
+        pending.append((item, *submit(item)))
+        yield from drain(2 * workers)
+    yield from drain(0)
+
+
+class SpoolLimitExceeded(Exception):
+    pass
+
+
+def spool_upload(upload, directory, limit: int | None = None) -> tuple[Path, str]:
+    """
+    Copy an upload to a file in ``directory`` in fixed-size chunks, so the
+    upload is never held in memory whole. Returns the path and the upload's
+    SHA-256, computed on the way through.
+
+    Raises SpoolLimitExceeded (and removes the partial file) once more than
+    ``limit`` bytes have been read.
+    """
+    stream = getattr(upload, "stream", upload)
+    digest = hashlib.sha256()
+    size = 0
+    fd, name = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, "wb") as out:
+        while chunk := stream.read(SPOOL_CHUNK_BYTES):
+            size += len(chunk)
+            if limit is not None and size > limit:
+                out.close()
+                os.unlink(name)
+                raise SpoolLimitExceeded(name)
+            digest.update(chunk)
+            out.write(chunk)
+    return Path(name), digest.hexdigest()
+
+
+def flatten_member_name(archive: str, member: str) -> str:
+    """
+    Provenance name for a ZIP member: ``archive.zip/dir/file.txt``. Absolute
+    and ``..`` components are dropped; the name is never used as a path.
+    """
+    parts = [
+        part for part in PurePosixPath(member.replace("\\", "/")).parts
+        if part not in ("/", ".", "..")
+    ]
+    return "/".join([archive, *parts])
+
+
+def iter_zip_members(path, archive: str, directory, rejected: list):
+    """
+    Spool the supported members of the ZIP at ``path`` one at a time,
+    yielding ``(flattened_name, member_path, member_hash)``.
+
+    Archives over MAX_ZIP_MEMBERS or MAX_ZIP_BYTES (as declared in the
+    central directory) are rejected without reading any member. Inflated
+    bytes are also counted as they are spooled; if they run past
+    MAX_ZIP_BYTES the rest of the archive is abandoned. Rejected archives
+    are appended to ``rejected``.
+    """
+    try:
+        zf = zipfile.ZipFile(path)
+    except Exception:
+        logger.exception("Failed to open archive %s", archive)
+        return
+
+    with zf:
+        members = [info for info in zf.infolist() if not info.is_dir()]
+        declared = sum(info.file_size for info in members)
+        if len(members) > MAX_ZIP_MEMBERS or declared > MAX_ZIP_BYTES:
+            logger.warning(
+                "Rejecting archive %s: %s members, %s bytes uncompressed",
+                archive, len(members), declared,
+            )
+            rejected.append(archive)
+            return
+
+        budget = MAX_ZIP_BYTES
+        for info in members:
+            name = flatten_member_name(archive, info.filename)
+            if source_type_for(name) not in EXTRACTORS:
+                logger.info("Skipping unsupported file: %s", name)
+                continue
+            try:
+                with zf.open(info) as member:
+                    member_path, member_hash = spool_upload(member, directory, budget)
+            except SpoolLimitExceeded:
+                logger.warning(
+                    "Abandoning archive %s: more than %s bytes uncompressed",
+                    archive, MAX_ZIP_BYTES,
+                )
+                rejected.append(archive)
+                return
+            except Exception:
+                logger.exception("Failed to read %s", name)
+                continue
+            budget -= member_path.stat().st_size
+            yield name, member_path, member_hash
+
+
+def _first_seen(items, seen: set, skipped: list, transient: bool = False, resume=None):
+    """
+    Drop spooled ``(filename, path, hash, ...)`` items already ingested, or
+    repeated earlier in this request. One indexed lookup per DEDUP_WINDOW
+    items. Dropped ``transient`` spool files are removed straight away.
+    Rows of batch ``resume`` do not count as ingested.
+    """
+    items = iter(items)
+    while window := list(islice(items, DEDUP_WINDOW)):
+        stored = existing_source_hashes(
+            {item[2] for item in window} - seen, exclude_batch=resume
+        )
+        for item in window:
+            filename, path, source_hash = item[:3]
+            if source_hash in seen or source_hash in stored:
+                skipped.append(filename)
+                if transient:
+                    path.unlink(missing_ok=True)
+            else:
+                seen.add(source_hash)
+                yield item
+
+
+def ingest_spooled(
+    spooled,
+    workers: int | None = None,
+    skip_duplicates: bool = False,
+    batch_id: str | None = None,
+    on_file_done=None,
+    resume: bool = False,
+):
+    """
+    Ingest files already on disk, given as ``[(filename, path, sha256), ...]``
+    (see spool_upload). Fragments are appended per file in
+    storage.INSERT_BATCH_SIZE chunks, each committed in its own short
+    transaction. The files themselves are left in place.
+
+    ZIP files are expanded member by member; each supported member is
+    ingested as an independent upload under its flattened path.
+
+    Dedup: a file whose bytes match an already-ingested upload (or an
+    earlier file in this call) is not extracted at all and is listed in
+    ``skipped_files``. Fragments of ZIP members also record the archive's
+    hash, so re-uploading the same archive is skipped as a whole.
+    Fragments whose text is already stored are counted in
+    ``duplicate_fragment_count``, and left out if ``skip_duplicates``.
+
+    ``on_file_done(files_done, result)`` is called whenever the first
+    ``files_done`` entries of ``spooled`` are fully stored, with the result
+    so far. ``resume`` continues an interrupted run of ``batch_id``: files
+    partly stored under that batch are not skipped as duplicates, and the
+    fragments already stored from them are not written again.
+    """
+    if workers is None:
+        workers = INGEST_WORKERS
+    batch_id = batch_id or str(uuid.uuid4())
+    spooled = list(spooled)
+    counts = {"fragment_count": 0, "file_count": 0}
+    report = {}
+    seen, skipped, rejected = set(), [], []
+    members_spooled = set()
+    stored = {}
+
+    def result():
+        duplicates = report.get("duplicate_count", 0)
+        return {
+            "fragment_count": counts["fragment_count"] - (duplicates if skip_duplicates else 0),
+            "file_count": counts["file_count"],
+            "ingestion_batch_id": batch_id,
+            "skipped_file_count": len(skipped),
+            "skipped_files": list(skipped),
+            "duplicate_fragment_count": duplicates,
+            "rejected_archives": list(rejected),
+        }
+
+    files_done = 0
+
+    def finished(upto: int):
+        nonlocal files_done
+        if upto > files_done:
+            files_done = upto
+            if on_file_done is not None:
+                on_file_done(files_done, result())
+
+    def fresh(item, fragments):
+        filename, path, source_hash, index = item
+        # ZIP members also record the hash of the archive they came from.
+        archive_hash = spooled[index][2] if path in members_spooled else None
+        # Fragments stored before an interruption come first, in order.
+        already = stored.get(source_hash, 0)
+        produced = 0
+        for f in fragments:
+            produced += 1
+            if produced <= already:
+                continue
+            f["source_hash"] = source_hash
+            f["archive_hash"] = archive_hash
+            yield f
+        metrics.count(
+            "fragments_extracted_total", produced, format=source_type_for(filename)
+        )
+        counts["fragment_count"] += produced
+        counts["file_count"] += bool(produced)
+
+    with tempfile.TemporaryDirectory(prefix="ingest-") as member_dir:
+        resume_batch = batch_id if resume else None
+
+        def expanded():
+            top_level = ((*item[:3], index) for index, item in enumerate(spooled))
+            for filename, path, source_hash, index in _first_seen(
+                top_level, seen, skipped, resume=resume_batch
+            ):
+                if source_type_for(filename) != "zip":
+                    yield filename, path, source_hash, index
+                    continue
+                members = iter_zip_members(path, filename, member_dir, rejected)
+                for member in _first_seen(members, seen, skipped, transient=True,
+                                          resume=resume_batch):
+                    members_spooled.add(member[1])
+                    yield (*member, index)
+
+        def checked(items):
+            # Look up what an interrupted run already stored, per window.
+            items = iter(items)
+            while window := list(islice(items, DEDUP_WINDOW)):
+                stored.update(batch_source_counts(batch_id, {item[2] for item in window}))
+                yield from window
+
+        items = checked(expanded()) if resume else expanded()
+        if workers > 1:
+            per_file = extract_files_parallel(items, batch_id, workers)
+        else:
+            per_file = (
+                (item, iter_file_fragments(item[1], item[0], batch_id))
+                for item in items
+            )
+        for item, fragments in per_file:
+            finished(item[3])
+            add_fragments(
+                fresh(item, fragments), skip_duplicates=skip_duplicates, report=report,
+                atomic=False,
+            )
+            if item[1] in members_spooled:
+                item[1].unlink(missing_ok=True)
+        finished(len(spooled))
+
+    if skipped:
+        logger.info("Skipped %s previously ingested files: %s", len(skipped), skipped)
+    return result()
+
+
+def ingest_files(files, workers: int | None = None, skip_duplicates: bool = False):
+    """
+    Ingest uploaded files (werkzeug FileStorage or any object exposing
+    ``filename`` and a binary ``read()``) as one append-only ingestion batch.
+
+    Uploads are spooled to a temporary directory, then handed to
+    ingest_spooled(); fragments stream from the extractors straight into
+    storage.add_fragments in batches. ``workers`` > 1 extracts in parallel
+    (default: INGEST_WORKERS).
+    """
+    with tempfile.TemporaryDirectory(prefix="ingest-") as spool_dir:
+        spooled = [
+            (upload.filename or "", *spool_upload(upload, spool_dir)) for upload in files
+        ]
+        return ingest_spooled(spooled, workers, skip_duplicates)
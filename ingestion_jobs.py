@@ -0,0 +1,359 @@
+"""
+Background Ingestion Jobs
+-------------------------
+
+Moves ingestion out of the request: uploads are spooled into a job
+directory, a row is queued in the job table, and a local pool of worker
+threads drains the queue through ingestion.ingest_spooled().
+
+Guarantees:
+- The job table lives in its own database (data/jobs.db); the fragment
+  store is untouched apart from the fragments a job appends
+- A job's files are extracted together across the ingestion pool; their
+  fragments are committed in short chunks, and the job row records how
+  many files are fully stored
+- A job left "running" by a process that no longer exists is requeued on
+  start-up and resumes at its first unfinished file; fragments of that
+  file committed before the crash are not written twice
+"""
+
+import json
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from ingestion import ingest_spooled, spool_upload
+
+logger = logging.getLogger(__name__)
+
+JOBS_DB_PATH = Path("data/jobs.db")
+
+# Uploads of queued and running jobs, one sub-directory per job.
+JOBS_DIR = Path("data/jobs")
+
+# Worker threads per process. Extraction itself fans out to INGEST_WORKERS
+# processes, so one thread is usually enough to keep every core busy.
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))
+
+# Seconds an idle worker sleeps before polling the queue again.
+POLL_INTERVAL = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    started_at TEXT,
+    updated_at TEXT,
+    finished_at TEXT,
+    owner TEXT,
+    files TEXT NOT NULL,
+    files_done INTEGER NOT NULL DEFAULT 0,
+    fragment_count INTEGER NOT NULL DEFAULT 0,
+    file_count INTEGER NOT NULL DEFAULT 0,
+    duplicate_fragment_count INTEGER NOT NULL DEFAULT 0,
+    skipped_files TEXT NOT NULL DEFAULT '[]',
+    rejected_archives TEXT NOT NULL DEFAULT '[]',
+    error TEXT
+);
+"""
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+_wakeup = threading.Event()
+_stopping = threading.Event()
+_workers = []
+_workers_lock = threading.Lock()
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def _connect() -> sqlite3.Connection:
+    JOBS_DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(JOBS_DB_PATH, timeout=5.0, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_jobs_db():
+    conn = _connect()
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(SCHEMA)
+    finally:
+        conn.close()
+
+
+def submit(files) -> str:
+    """
+    Spool uploads into a new job directory and queue the job. Returns the
+    job id; ingestion happens later on a worker thread.
+    """
+    init_jobs_db()
+    job_id = str(uuid.uuid4())
+    job_dir = JOBS_DIR / job_id
+    job_dir.mkdir(parents=True)
+    spooled = []
+    for upload in files:
+        path, source_hash = spool_upload(upload, job_dir)
+        spooled.append({
+            "filename": upload.filename or "",
+            "path": str(path),
+            "hash": source_hash,
+        })
+
+    conn = _connect()
+    try:
+        conn.execute(
+            "INSERT INTO ingestion_jobs (id, status, created_at, files) VALUES (?, ?, ?, ?)",
+            (job_id, QUEUED, _now(), json.dumps(spooled)),
+        )
+    finally:
+        conn.close()
+    _wakeup.set()
+    return job_id
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def recover() -> int:
+    """
+    Requeue running jobs whose owning process on this host has exited.
+    Returns the number requeued.
+    """
+    init_jobs_db()
+    host = socket.gethostname()
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "SELECT id, owner FROM ingestion_jobs WHERE status = ?", (RUNNING,)
+        ).fetchall()
+        orphaned = []
+        for row in rows:
+            owner_host, _, pid = (row["owner"] or "").rpartition(":")
+            if owner_host == host and pid.isdigit() and not _pid_alive(int(pid)):
+                orphaned.append(row["id"])
+        for job_id in orphaned:
+            conn.execute(
+                "UPDATE ingestion_jobs SET status = ?, owner = NULL "
+                "WHERE id = ? AND status = ?",
+                (QUEUED, job_id, RUNNING),
+            )
+    finally:
+        conn.close()
+    for job_id in orphaned:
+        logger.info("Requeued interrupted ingestion job %s", job_id)
+    return len(orphaned)
+
+
+def _claim():
+    """
+    Atomically move the oldest queued job to running and return its row.
+    """
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT * FROM ingestion_jobs WHERE status = ? ORDER BY created_at, rowid LIMIT 1",
+            (QUEUED,),
+        ).fetchone()
+        if row is not None:
+            now = _now()
+            conn.execute(
+                "UPDATE ingestion_jobs SET status = ?, owner = ?, "
+                "started_at = COALESCE(started_at, ?), updated_at = ? WHERE id = ?",
+                (RUNNING, _OWNER, now, now, row["id"]),
+            )
+        conn.execute("COMMIT")
+        return row
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def _update(job_id: str, **fields):
+    fields["updated_at"] = _now()
+    assignments = ", ".join(f"{name} = ?" for name in fields)
+    conn = _connect()
+    try:
+        conn.execute(
+            f"UPDATE ingestion_jobs SET {assignments} WHERE id = ?",
+            (*fields.values(), job_id),
+        )
+    finally:
+        conn.close()
+
+
+def run_job(row):
+    """
+    Ingest the remaining files of a claimed job in one ingest_spooled()
+    call, so they share its extraction pool. The job row is advanced as
+    each file's fragments are committed.
+    """
+    job_id = row["id"]
+    files = json.loads(row["files"])
+    done = row["files_done"]
+    base = {
+        "fragment_count": row["fragment_count"],
+        "file_count": row["file_count"],
+        "duplicate_fragment_count": row["duplicate_fragment_count"],
+    }
+    skipped = json.loads(row["skipped_files"])
+    rejected = json.loads(row["rejected_archives"])
+    totals = dict(base)
+
+    def progress(files_done, result):
+        totals.update({name: base[name] + result[name] for name in base})
+        _update(
+            job_id,
+            files_done=done + files_done,
+            skipped_files=json.dumps(skipped + result["skipped_files"]),
+            rejected_archives=json.dumps(rejected + result["rejected_archives"]),
+            **totals,
+        )
+
+    try:
+        ingest_spooled(
+            [(f["filename"], Path(f["path"]), f["hash"]) for f in files[done:]],
+            batch_id=job_id,
+            on_file_done=progress,
+            # Set by a previous claim: this job was interrupted mid-run.
+            resume=row["started_at"] is not None,
+        )
+    except Exception as exc:
+        logger.exception("Ingestion job %s failed", job_id)
+        _update(job_id, status=FAILED, finished_at=_now(), error=str(exc))
+    else:
+        _update(job_id, status=DONE, finished_at=_now())
+        logger.info(
+            "Ingestion job %s complete: %s fragments from %s files",
+            job_id, totals["fragment_count"], totals["file_count"],
+        )
+    shutil.rmtree(JOBS_DIR / job_id, ignore_errors=True)
+
+
+def run_pending() -> int:
+    """
+    Drain the queue on the calling thread. Returns the number of jobs run.
+    """
+    ran = 0
+    while (row := _claim()) is not None:
+        run_job(row)
+        ran += 1
+    return ran
+
+
+def _worker_loop():
+    while not _stopping.is_set():
+        try:
+            run_pending()
+        except Exception:
+            logger.exception("Ingestion worker error")
+        _wakeup.wait(POLL_INTERVAL)
+        _wakeup.clear()
+
+
+def start_workers(count: int = JOB_WORKERS):
+    """
+    Start the worker threads for this process (once), after requeueing
+    jobs interrupted by an earlier shutdown.
+    """
+    with _workers_lock:
+        if _workers:
+            return
+        recover()
+        _stopping.clear()
+        for n in range(count):
+            thread = threading.Thread(
+                target=_worker_loop, name=f"ingest-job-{n}", daemon=True
+            )
+            thread.start()
+            _workers.append(thread)
+
+
+def stop_workers(timeout: float | None = None):
+    """
+    Stop this process's worker threads after their current job. A job
+    interrupted by process exit instead is resumed by the next start.
+    """
+    with _workers_lock:
+        _stopping.set()
+        _wakeup.set()
+        for thread in _workers:
+            thread.join(timeout)
+        _workers.clear()
+
+
+def get_job(job_id: str) -> dict | None:
+    """
+    Progress snapshot of a job, or None if unknown. ``fragments_per_sec`` is
+    measured from when the job was first started.
+    """
+    init_jobs_db()
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT * FROM ingestion_jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+
+    files = json.loads(row["files"])
+    elapsed = None
+    if row["started_at"]:
+        start = datetime.fromisoformat(row["started_at"].rstrip("Z"))
+        end = datetime.fromisoformat((row["finished_at"] or _now()).rstrip("Z"))
+        elapsed = max((end - start).total_seconds(), 0.0)
+    return {
+        "id": row["id"],
+        "status": row["status"],
+        "created_at": row["created_at"],
+        "started_at": row["started_at"],
+        "finished_at": row["finished_at"],
+        "files_total": len(files),
+        "files_done": row["files_done"],
+        "fragment_count": row["fragment_count"],
+        "file_count": row["file_count"],
+        "duplicate_fragment_count": row["duplicate_fragment_count"],
+        "skipped_files": json.loads(row["skipped_files"]),
+        "rejected_archives": json.loads(row["rejected_archives"]),
+        "elapsed_seconds": elapsed,
+        "fragments_per_sec": row["fragment_count"] / elapsed if elapsed else None,
+        "error": row["error"],
+    }
+
+
+def wait_for(job_id: str, timeout: float = 60.0) -> dict | None:
+    """
+    Poll until a job reaches done / failed (or ``timeout``), returning its
+    last snapshot.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        job = get_job(job_id)
+        if job is None or job["status"] in (DONE, FAILED) or time.monotonic() > deadline:
+            return job
+        time.sleep(0.05)
@@ -0,0 +1,198 @@
+"""
+Process Metrics
+---------------
+
+Minimal counters and latency histograms, rendered in the Prometheus text
+exposition format for the /metrics route.
+
+Usage:
+    with metrics.timed("similarity_seconds"):
+        ...
+    @metrics.timer("query_seconds", query="search")
+    def search_fragments(...): ...
+    metrics.count("fragments_inserted_total", len(batch))
+    for item in metrics.timed_iter(gen, "extraction_seconds", format="pdf"):
+        ...
+
+Rules:
+- Metrics are in-memory and per process; nothing is persisted
+- Observing is a lock, a bisect and a few additions, cheap enough to
+  leave on in production
+- Metric names are registered on first use; HELP text comes from HELP
+"""
+
+import functools
+import threading
+import time
+from bisect import bisect_left
+from typing import Iterable, Iterator
+
+# Histogram bucket upper bounds, in seconds.
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+HELP = {
+    "extraction_seconds": "Time spent extracting one file in this process, by format.",
+    "fragments_extracted_total": "Fragments produced by the extractors, by format.",
+    "db_insert_batch_seconds": "Time per executemany() batch in add_fragments.",
+    "fragments_inserted_total": "Fragments appended to the store.",
+    "query_seconds": "Fragment listing / search query time.",
+    "similarity_seconds": "compute_similarity() wall time.",
+    "similarity_fragments_total": "Fragments compared by compute_similarity().",
+    "stage1_seconds": "run_stage1() wall time, by signal mode.",
+    "stage1_signals_total": "Similarity signals emitted by run_stage1().",
+    "export_seconds": "Time spent producing one export, by format.",
+    "export_bytes_total": "Bytes produced by exports, by format.",
+    "result_cache_total": "Fragment page cache lookups, by outcome.",
+    "near_duplicates_seconds": "run_near_duplicates() wall time.",
+    "near_duplicate_fragments_signed_total": "Fragments MinHashed by run_near_duplicates().",
+}
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted(labels.items()))
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+
+def count(name: str, value: float = 1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, seconds: float, **labels):
+    key = _key(name, labels)
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = _Histogram()
+        hist.counts[bisect_left(hist.buckets, seconds)] += 1
+        hist.sum += seconds
+        hist.count += 1
+
+
+class timed:
+    """Context manager: observe the block's wall time in histogram ``name``."""
+
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name: str, **labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def timer(name: str, **labels):
+    """Decorator form of timed()."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(name, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def timed_iter(iterable: Iterable, name: str, **labels) -> Iterator:
+    """
+    Pass ``iterable`` through, observing only the time spent producing its
+    items (not the consumer's time between items), once it is exhausted
+    or closed.
+    """
+    iterator = iter(iterable)
+    spent = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                spent += time.perf_counter() - start
+                return
+            spent += time.perf_counter() - start
+            yield item
+    finally:
+        observe(name, spent, **labels)
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def _labels(pairs, extra=()) -> str:
+    pairs = (*pairs, *extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for k, v in pairs
+    )
+    return "{" + body + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render() -> str:
+    """
+    All metrics in the Prometheus text format (version 0.0.4).
+    """
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(
+            (key, (h.buckets, list(h.counts), h.sum, h.count))
+            for key, h in _histograms.items()
+        )
+
+    lines = []
+    typed = set()
+
+    def header(name, kind):
+        if name not in typed:
+            typed.add(name)
+            if name in HELP:
+                lines.append(f"# HELP {name} {HELP[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in counters:
+        header(name, "counter")
+        lines.append(f"{name}{_labels(labels)} {_format_value(value)}")
+
+    for (name, labels), (buckets, counts, total, n) in histograms:
+        header(name, "histogram")
+        cumulative = 0
+        for bound, bucket_count in zip((*buckets, float("inf")), counts):
+            cumulative += bucket_count
+            le = (("le", _format_value(float(bound))),)
+            lines.append(f"{name}_bucket{_labels(labels, le)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(labels)} {_format_value(total)}")
+        lines.append(f"{name}_count{_labels(labels)} {n}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,359 @@
+"""
+Near-Duplicate Report — Derived, Read-Only
+------------------------------------------
+
+Finds groups of near-identical fragments (repeated PDF headers, re-exported
+drafts, CSV rows differing by a cell) with MinHash and banded LSH.
+
+Guarantees:
+- Read-only access to fragments; nothing is written to the database
+- The signature index and the JSON report are derived files, safe to
+  delete and regenerate
+- Fragments are referenced only by id; groups are not named or persisted
+  anywhere but the report
+
+Method:
+- Each fragment is a set of word shingles (SHINGLE_WORDS consecutive
+  lowercased words; shorter fragments are one shingle)
+- Shingles are hashed and MinHashed for a whole batch in one vectorized
+  pass: NUM_PERM multiply-add-shift hash functions, minimum per fragment
+  via np.minimum.reduceat
+- Signatures are split into BANDS bands; fragments sharing any band are
+  candidates. Each is checked against the first (oldest) fragment of the
+  bucket, and kept when the estimated Jaccard similarity (share of equal
+  signature positions) reaches the threshold
+- Kept pairs are joined into groups with connected components
+
+Incremental: the index remembers the newest fragment id it has seen and
+only signs fragments appended since. The store is append-only, so older
+signatures never go stale. Bucketing is a sort per band over all
+signatures and is redone on every run.
+"""
+
+import json
+import re
+import zlib
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+import metrics
+from storage import max_fragment_id, reader
+
+DEFAULT_INDEX_PATH = "logs/near_duplicates.npz"
+DEFAULT_REPORT_PATH = "logs/near_duplicates.json"
+
+DEFAULT_THRESHOLD = 0.8
+
+SHINGLE_WORDS = 3
+NUM_PERM = 64
+BANDS = 16
+
+# Hash values (shingles × permutations) materialized per vectorized step.
+BLOCK_ELEMENTS = 1 << 23
+
+# Fragments read from the store per batch.
+FETCH_ROWS = 50_000
+
+_TOKEN = re.compile(r"\w+")
+
+# Odd 64-bit multiplier used to mix several values into one hash.
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+_MAX_HASH = np.uint32(0xFFFFFFFF)
+
+
+def _tokens(texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Word hashes for all ``texts`` back to back, and the word count of each.
+    Each distinct word is hashed (CRC-32, stable across processes) once.
+    """
+    words = []
+    lengths = np.empty(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        found = _TOKEN.findall(text.lower())
+        lengths[i] = len(found)
+        words.extend(found)
+    vocabulary = {word: zlib.crc32(word.encode("utf-8")) for word in set(words)}
+    hashes = np.fromiter(map(vocabulary.__getitem__, words), dtype=np.uint64, count=len(words))
+    return hashes, lengths
+
+
+def shingles(texts: List[str], k: int = SHINGLE_WORDS) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    32-bit hashes of every k-word shingle of every text (back to back, as
+    uint64) and the shingle count of each text. A text with fewer than k
+    words is a single shingle; a text without words has none.
+    """
+    words, lengths = _tokens(texts)
+    word_offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=word_offsets[1:])
+
+    counts = np.where(lengths > 0, np.maximum(lengths - k + 1, 1), 0)
+    total = int(counts.sum())
+    doc = np.repeat(np.arange(len(texts)), counts)
+    first = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=first[1:])
+    position = word_offsets[doc] + (np.arange(total) - first[doc])
+    end = word_offsets[doc + 1]
+
+    padded = np.concatenate([words, np.zeros(k, dtype=np.uint64)])
+    hashed = np.zeros(total, dtype=np.uint64)
+    for j in range(k):
+        index = position + j
+        word = np.where(index < end, padded[index], np.uint64(0))
+        hashed = hashed * _MIX + word
+    hashed ^= hashed >> np.uint64(32)
+    return hashed & np.uint64(0xFFFFFFFF), counts
+
+
+class MinHashIndex:
+    """
+    MinHash signatures (one uint32 row of ``num_perm`` values per fragment)
+    with the ids they belong to, in id order.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = NUM_PERM,
+        bands: int = BANDS,
+        shingle_words: int = SHINGLE_WORDS,
+        seed: int = 0,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_words = shingle_words
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, size=num_perm, dtype=np.uint64)
+
+        self.ids = np.empty(0, dtype=np.int64)
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+        # Newest fragment id signed so far, including empty fragments.
+        self.watermark = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def sign(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (signatures, has_shingles) for ``texts``. Texts without words get an
+        all-max signature and has_shingles False.
+        """
+        hashed, counts = shingles(texts, self.shingle_words)
+        n = len(texts)
+        signatures = np.full((n, self.num_perm), _MAX_HASH, dtype=np.uint32)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        step = max(BLOCK_ELEMENTS // self.num_perm, 1)
+        start = 0
+        while start < n:
+            stop = int(np.searchsorted(offsets, offsets[start] + step, side="right")) - 1
+            stop = min(max(stop, start + 1), n)
+            lo, hi = offsets[start], offsets[stop]
+            if hi > lo:
+                values = (hashed[lo:hi, None] * self._a + self._b) >> np.uint64(32)
+                present = counts[start:stop] > 0
+                block = signatures[start:stop]
+                block[present] = np.minimum.reduceat(
+                    values, offsets[start:stop][present] - lo, axis=0
+                )
+            start = stop
+        return signatures, counts > 0
+
+    def add_many(self, fragment_ids: Iterable[int], texts: List[str]) -> int:
+        """
+        Sign and append fragments newer than the watermark (ids ascending).
+        Fragments without words advance the watermark but are not indexed.
+        """
+        ids = np.fromiter(fragment_ids, dtype=np.int64)
+        fresh = ids > self.watermark
+        if not fresh.any():
+            return 0
+        texts = [t for t, keep in zip(texts, fresh.tolist()) if keep]
+        ids = ids[fresh]
+        signatures, present = self.sign(texts)
+        self.ids = np.concatenate([self.ids, ids[present]])
+        self.signatures = np.concatenate([self.signatures, signatures[present]])
+        self.watermark = int(ids.max())
+        return int(present.sum())
+
+    def _band_keys(self) -> np.ndarray:
+        rows = self.num_perm // self.bands
+        bands = self.signatures.reshape(len(self), self.bands, rows).astype(np.uint64)
+        keys = np.zeros((len(self), self.bands), dtype=np.uint64)
+        for r in range(rows):
+            keys = keys * _MIX + bands[:, :, r]
+        return keys
+
+    def candidate_pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row pairs (first, other) sharing at least one band bucket, where
+        ``first`` is the oldest fragment of that bucket. Deduplicated.
+        """
+        n = len(self)
+        if n < 2:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty
+        firsts, others = [], []
+        positions = np.arange(n)
+        for keys in self._band_keys().T:
+            order = np.argsort(keys, kind="stable")
+            ordered = keys[order]
+            new_bucket = np.ones(n, dtype=bool)
+            new_bucket[1:] = ordered[1:] != ordered[:-1]
+            bucket_start = np.maximum.accumulate(np.where(new_bucket, positions, 0))
+            firsts.append(order[bucket_start][~new_bucket])
+            others.append(order[~new_bucket])
+        codes = np.unique(np.concatenate(firsts) * n + np.concatenate(others))
+        return codes // n, codes % n
+
+    def estimated_jaccard(self, rows_a: np.ndarray, rows_b: np.ndarray) -> np.ndarray:
+        """Share of equal signature positions for each row pair."""
+        out = np.empty(len(rows_a), dtype=np.float32)
+        step = max(BLOCK_ELEMENTS // self.num_perm, 1)
+        for start in range(0, len(rows_a), step):
+            a = self.signatures[rows_a[start:start + step]]
+            b = self.signatures[rows_b[start:start + step]]
+            out[start:start + step] = (a == b).mean(axis=1)
+        return out
+
+    def groups(self, threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+        """
+        ``[{"fragment_ids": [...], "estimated_jaccard": [...]}, ...]``, one
+        entry per group of two or more near-duplicates, ordered by oldest
+        member. Similarities are estimated against the group's oldest
+        fragment, which is listed first (1.0).
+        """
+        first, other = self.candidate_pairs()
+        keep = self.estimated_jaccard(first, other) >= threshold
+        first, other = first[keep], other[keep]
+        if not len(first):
+            return []
+
+        n = len(self)
+        graph = coo_matrix((np.ones(len(first), dtype=np.int8), (first, other)), shape=(n, n))
+        _, labels = connected_components(graph, directed=False)
+        sizes = np.bincount(labels)
+        rows = np.flatnonzero(sizes[labels] > 1)
+        # Rows are in id order, so a stable sort keeps members oldest first.
+        rows = rows[np.argsort(labels[rows], kind="stable")]
+        labels = labels[rows]
+        new_group = np.r_[True, labels[1:] != labels[:-1]]
+        starts = np.flatnonzero(new_group)
+        oldest = rows[starts][np.cumsum(new_group) - 1]
+        similarity = self.estimated_jaccard(oldest, rows)
+
+        groups = [
+            {
+                "fragment_ids": self.ids[rows[s:e]].tolist(),
+                "estimated_jaccard": [round(v, 4) for v in similarity[s:e].tolist()],
+            }
+            for s, e in zip(starts.tolist(), np.r_[starts[1:], len(rows)].tolist())
+        ]
+        groups.sort(key=lambda g: g["fragment_ids"][0])
+        return groups
+
+    def save(self, path=DEFAULT_INDEX_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                ids=self.ids,
+                signatures=self.signatures,
+                params=np.array([self.num_perm, self.bands, self.shingle_words, self.seed]),
+                watermark=np.array(self.watermark),
+            )
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_INDEX_PATH) -> "MinHashIndex":
+        with np.load(path) as data:
+            num_perm, bands, shingle_words, seed = (int(v) for v in data["params"])
+            index = cls(num_perm, bands, shingle_words, seed)
+            index.ids = data["ids"]
+            index.signatures = data["signatures"]
+            index.watermark = int(data["watermark"])
+        return index
+
+    @classmethod
+    def open(cls, path=DEFAULT_INDEX_PATH, **params) -> "MinHashIndex":
+        """
+        Load the index at ``path``, or start an empty one if it is missing or
+        was built with different parameters.
+        """
+        try:
+            index = cls.load(path)
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            return cls(**params)
+        for name, value in params.items():
+            if getattr(index, name) != value:
+                return cls(**params)
+        return index
+
+
+def iter_new_fragments(after_id: int, batch_rows: int = FETCH_ROWS):
+    """(ids, texts) batches of fragments with id > ``after_id``, in id order."""
+    cur = reader().execute(
+        "SELECT id, content FROM fragments WHERE id > ? ORDER BY id", (after_id,)
+    )
+    while True:
+        rows = cur.fetchmany(batch_rows)
+        if not rows:
+            return
+        yield [r[0] for r in rows], [r[1] for r in rows]
+
+
+def run_near_duplicates(
+    report_path=DEFAULT_REPORT_PATH,
+    index_path=DEFAULT_INDEX_PATH,
+    threshold: float = DEFAULT_THRESHOLD,
+):
+    """
+    Sign fragments appended since the last run, then write the report of
+    near-duplicate groups to ``report_path`` (None to skip) and return it.
+    """
+    with metrics.timed("near_duplicates_seconds"):
+        index = MinHashIndex.open(index_path, num_perm=NUM_PERM, bands=BANDS,
+                                  shingle_words=SHINGLE_WORDS)
+        # A different (e.g. rebuilt) store: its ids mean something else.
+        if index.watermark > max_fragment_id():
+            index = MinHashIndex(NUM_PERM, BANDS, SHINGLE_WORDS)
+        added = 0
+        for ids, texts in iter_new_fragments(index.watermark):
+            added += index.add_many(ids, texts)
+        if index_path is not None:
+            index.save(index_path)
+        groups = index.groups(threshold)
+    metrics.count("near_duplicate_fragments_signed_total", added)
+
+    report = {
+        "threshold": threshold,
+        "method": {
+            "shingle_words": index.shingle_words,
+            "num_perm": index.num_perm,
+            "bands": index.bands,
+        },
+        "fragments_indexed": len(index),
+        "max_fragment_id": index.watermark,
+        "group_count": len(groups),
+        "groups": groups,
+    }
+    if report_path is not None:
+        Path(report_path).parent.mkdir(parents=True, exist_ok=True)
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    run_near_duplicates()
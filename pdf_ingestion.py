@@ -6,23 +6,43 @@ Rules:
 - One or more fragments per page
 - No semantic interpretation
 - Conservative text extraction
+- A page that fails to extract is treated as empty, never fatal
+
+Sources may be raw bytes, a filesystem path or a seekable binary file;
+paths are opened and read through the file handle, so pages are parsed
+lazily instead of loading the whole file.
 """
 
+import os
+from contextlib import contextmanager
 from io import BytesIO
 from PyPDF2 import PdfReader
 
 
-def extract_pdf_fragments(pdf_bytes: bytes, filename: str):
+@contextmanager
+def _reader(source):
     """
-    Accept raw PDF bytes, wrap in BytesIO for PyPDF2 compatibility.
+    PdfReader over ``source``. Paths are opened here and handed over as a
+    file: given a path, PdfReader would read the whole file into memory.
     """
-    stream = BytesIO(pdf_bytes)
-    reader = PdfReader(stream)
+    if isinstance(source, (bytes, bytearray)):
+        yield PdfReader(BytesIO(source))
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield PdfReader(f)
+    else:
+        yield PdfReader(source)
+
+
+def count_pdf_pages(source) -> int:
+    with _reader(source) as reader:
+        return len(reader.pages)
 
-    fragments = []
-    for idx, page in enumerate(reader.pages, start=1):
+
+def _iter_pages(reader: PdfReader, filename: str, start: int, stop: int):
+    for idx in range(start, stop + 1):
         try:
-            text = page.extract_text() or ""
+            text = reader.pages[idx - 1].extract_text() or ""
         except Exception:
             text = ""
 
@@ -30,10 +50,33 @@ def extract_pdf_fragments(pdf_bytes: bytes, filename: str):
         if not text:
             continue
 
-        fragments.append({
+        yield {
             "content": text,
             "source": filename,
             "source_page": idx,
-        })
+        }
+
+
+def iter_pdf_fragments(source, filename: str):
+    """
+    Yield fragments one page at a time, so only the current page's text is
+    held in memory.
+    """
+    with _reader(source) as reader:
+        yield from _iter_pages(reader, filename, 1, len(reader.pages))
 
-    return fragments
+
+def extract_pdf_page_range(source, filename: str, start: int, stop: int):
+    """
+    Fragments for pages ``start``..``stop`` (1-based, inclusive). Used to
+    split one PDF across worker processes.
+    """
+    with _reader(source) as reader:
+        return list(_iter_pages(reader, filename, start, min(stop, len(reader.pages))))
+
+
+def extract_pdf_fragments(pdf_bytes: bytes, filename: str):
+    """
+    Accept raw PDF bytes, wrap in BytesIO for PyPDF2 compatibility.
+    """
+    return list(iter_pdf_fragments(pdf_bytes, filename))
@@ -8,41 +8,171 @@ Guarantees:
 - Read-only access to fragments
 - No database writes
 - No persistence of outputs
+
+Streaming:
+- iter_* functions yield output incrementally from a live cursor, so memory
+  stays flat regardless of export size
+- assemble_* functions return the same bytes, fully materialized
 """
 
-from typing import List
+import io
+import json
+from typing import Iterable, Iterator, List
 from io import BytesIO
 import zipfile
-from storage import get_connection
+
+import metrics
+from storage import reader
+
+# Ids per IN (...) query; stays well below SQLite's bound-variable limit.
+FETCH_BATCH_SIZE = 500
+
+# Target size of chunks handed to the HTTP layer.
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+FRAGMENT_COLUMNS = "id, content, created_at, source"
+
+# Member timestamp for ZIP exports. Fixed, so the same fragments always give
+# the same archive bytes (export responses carry a strong ETag).
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+
+def iter_fragments_by_ids(ids: Iterable[int]) -> Iterator:
+    """
+    Stream the selected fragments in id order, one batch of ids at a time.
+    """
+    ids = sorted(set(ids))
+    conn = reader()
+    for start in range(0, len(ids), FETCH_BATCH_SIZE):
+        batch = ids[start : start + FETCH_BATCH_SIZE]
+        placeholders = ",".join("?" for _ in batch)
+        yield from conn.execute(
+            f"SELECT {FRAGMENT_COLUMNS} FROM fragments "
+            f"WHERE id IN ({placeholders}) ORDER BY id",
+            batch,
+        )
+
+
+def iter_all_fragments(max_id: int | None = None) -> Iterator:
+    """
+    Stream every fragment in id order straight from the cursor, stopping
+    at id ``max_id`` if given.
+    """
+    if max_id is None:
+        yield from reader().execute(
+            f"SELECT {FRAGMENT_COLUMNS} FROM fragments ORDER BY id"
+        )
+        return
+    yield from reader().execute(
+        f"SELECT {FRAGMENT_COLUMNS} FROM fragments WHERE id <= ? ORDER BY id",
+        (max_id,),
+    )
 
 
 def fetch_fragments_by_ids(ids: List[int]):
     if not ids:
         return []
+    return list(iter_fragments_by_ids(ids))
+
+
+def _joined(parts: Iterable[str]) -> Iterator[str]:
+    """Yield ``"\\n".join(parts)`` piecewise."""
+    for i, part in enumerate(parts):
+        yield part if i == 0 else "\n" + part
+
 
-    placeholders = ",".join("?" for _ in ids)
-    query = f"SELECT id, content, created_at, source FROM fragments WHERE id IN ({placeholders}) ORDER BY id"
+def iter_markdown(fragments) -> Iterator[str]:
+    return _joined(f"---\nFragment #{f['id']}\n\n{f['content']}\n" for f in fragments)
 
-    conn = get_connection()
-    try:
-        cur = conn.execute(query, ids)
-        return cur.fetchall()
-    finally:
-        conn.close()
+
+def iter_text(fragments) -> Iterator[str]:
+    return _joined(f"[Fragment #{f['id']}]\n{f['content']}\n" for f in fragments)
+
+
+def iter_json(fragments) -> Iterator[str]:
+    """
+    JSON array of {id, content, created_at, source}, one element at a time.
+    """
+    yield "["
+    for i, f in enumerate(fragments):
+        yield ("," if i else "") + json.dumps(
+            {k: f[k] for k in ("id", "content", "created_at", "source")}
+        )
+    yield "]"
 
 
 def assemble_markdown(fragments) -> str:
-    parts = []
-    for f in fragments:
-        parts.append(f"---\nFragment #{f['id']}\n\n{f['content']}\n")
-    return "\n".join(parts)
+    return "".join(iter_markdown(fragments))
 
 
 def assemble_text(fragments) -> str:
-    parts = []
-    for f in fragments:
-        parts.append(f"[Fragment #{f['id']}]\n{f['content']}\n")
-    return "\n".join(parts)
+    return "".join(iter_text(fragments))
+
+
+class _ZipSink(io.RawIOBase):
+    """
+    Write-only stream for ZipFile that hands out bytes as they are produced.
+
+    It reports itself seekable so ZipFile writes the same local headers as it
+    would to a BytesIO (sizes patched in place, no data descriptors). Seeks
+    only ever target the member being written, which is still buffered;
+    drain() is called between members.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._base = 0
+        self._pos = 0
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_END:
+            offset += self._base + len(self._buf)
+        elif whence == io.SEEK_CUR:
+            offset += self._pos
+        if offset < self._base:
+            raise io.UnsupportedOperation("cannot seek into drained output")
+        self._pos = offset
+        return offset
+
+    def write(self, data):
+        start = self._pos - self._base
+        self._buf[start : start + len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def pending(self) -> int:
+        return len(self._buf)
+
+    def drain(self) -> bytes:
+        data = bytes(self._buf)
+        self._base += len(self._buf)
+        self._buf.clear()
+        return data
+
+
+def iter_zip(fragments, chunk_bytes: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    ZIP archive with one file per fragment, yielded in chunks of roughly
+    ``chunk_bytes``. Filenames are stable and ordered.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+        for f in fragments:
+            info = zipfile.ZipInfo(f"fragment_{f['id']}.md", ZIP_DATE_TIME)
+            info.external_attr = 0o600 << 16
+            zf.writestr(info, assemble_markdown([f]), zipfile.ZIP_DEFLATED)
+            if sink.pending() >= chunk_bytes:
+                yield sink.drain()
+    yield sink.drain()
 
 
 def assemble_zip(fragments) -> BytesIO:
@@ -51,10 +181,44 @@ def assemble_zip(fragments) -> BytesIO:
     Filenames are stable and ordered.
     """
     buf = BytesIO()
-    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
-        for f in fragments:
-            filename = f"fragment_{f['id']}.md"
-            content = assemble_markdown([f])
-            zf.writestr(filename, content)
+    for chunk in iter_zip(fragments):
+        buf.write(chunk)
     buf.seek(0)
     return buf
+
+
+def encode_chunks(parts: Iterable[str], chunk_bytes: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    UTF-8 encode a stream of strings, coalescing into ~``chunk_bytes``.
+    """
+    buf = []
+    size = 0
+    for part in parts:
+        data = part.encode("utf-8")
+        buf.append(data)
+        size += len(data)
+        if size >= chunk_bytes:
+            yield b"".join(buf)
+            buf, size = [], 0
+    if buf:
+        yield b"".join(buf)
+
+
+# format -> (streamer, mimetype, file extension)
+EXPORT_FORMATS = {
+    "zip": (iter_zip, "application/zip", "zip"),
+    "md": (lambda fs: encode_chunks(iter_markdown(fs)), "text/markdown; charset=utf-8", "md"),
+    "txt": (lambda fs: encode_chunks(iter_text(fs)), "text/plain; charset=utf-8", "txt"),
+    "json": (lambda fs: encode_chunks(iter_json(fs)), "application/json", "json"),
+}
+
+
+def stream_export(fragments, format: str) -> Iterator[bytes]:
+    """
+    Encoded export in ``format`` (a key of EXPORT_FORMATS), recording
+    production time and bytes in the export metrics.
+    """
+    streamer = EXPORT_FORMATS[format][0]
+    for chunk in metrics.timed_iter(streamer(fragments), "export_seconds", format=format):
+        metrics.count("export_bytes_total", len(chunk), format=format)
+        yield chunk
@@ -0,0 +1,133 @@
+"""
+Fragment Page Cache
+-------------------
+
+Bounded LRU cache of fetch_page() results for the browse and search views.
+
+The store is append-only, so a page depends only on its arguments and on
+the newest fragment id. Each entry remembers that id (the watermark) and
+is served only while the store's current MAX(id) still matches it.
+
+Rules:
+- One cheap MAX(id) lookup per call (the rightmost primary-key entry)
+  replaces the page query on a hit
+- Entries are dropped when the watermark moves, after TTL seconds, or
+  least-recently-used first once SIZE entries are held
+- Keys include storage.DB_PATH, so switching stores never serves a page
+  from another database
+- Hits, misses and evictions are counted (stats() and /metrics)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+import storage
+
+# Cached pages held per process.
+SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "1024"))
+
+# Seconds an entry may be served even if the watermark has not moved.
+TTL = float(os.environ.get("RESULT_CACHE_TTL", "300"))
+
+
+class ResultCache:
+    """
+    LRU mapping of key -> (watermark, expires_at, value).
+    """
+
+    def __init__(self, size: int = SIZE, ttl: float = TTL):
+        self.size = size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "expired": 0, "evicted": 0}
+
+    def _count(self, outcome: str):
+        self._stats[outcome] += 1
+        metrics.count("result_cache_total", outcome=outcome)
+
+    def get(self, key, watermark):
+        """
+        The cached value for ``key`` at ``watermark``, or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._count("misses")
+                return None
+            if entry[0] != watermark:
+                del self._entries[key]
+                self._count("stale")
+                self._count("misses")
+                return None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                self._count("expired")
+                self._count("misses")
+                return None
+            self._entries.move_to_end(key)
+            self._count("hits")
+            return entry[2]
+
+    def put(self, key, watermark, value):
+        if self.size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (watermark, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self._count("evicted")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            for outcome in self._stats:
+                self._stats[outcome] = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+pages = ResultCache()
+
+
+def fetch_page(
+    query: str | None = None,
+    cursor: str | None = None,
+    limit: int = 25,
+    offset: int = 0,
+    max_id: int | None = None,
+    **search_options,
+):
+    """
+    storage.fetch_page(), served from ``pages`` while no fragment has been
+    added since the result was computed.
+
+    The page is read as of watermark ``max_id`` (by default the current
+    MAX(id)), so a caller that derives an ETag from the same watermark
+    gets exactly the rows that tag stands for.
+    """
+    key = (
+        str(storage.DB_PATH), query, cursor, limit, offset,
+        tuple(sorted(search_options.items())),
+    )
+    watermark = storage.max_fragment_id() if max_id is None else max_id
+    result = pages.get(key, watermark)
+    if result is None:
+        result = storage.fetch_page(
+            query, cursor, limit, offset, max_id=watermark, **search_options
+        )
+        pages.put(key, watermark, result)
+    return result
@@ -1,16 +1,30 @@
 import uuid, datetime, re
-from runtime.storage.fragment_store import FragmentStore
+from runtime.storage.fragment_store import get_store
 from runtime.logging.logger import log_event
 
-def ingest_text(text, source_id):
+# Sentence boundary; compiled once, not per call.
+SPLITTER = re.compile(r"[.!?]\s+")
+
+def split_text(text):
+    return [part.strip() for part in SPLITTER.split(text) if part.strip()]
+
+def make_fragments(text, source_id, author_id=None):
+    timestamp = datetime.datetime.utcnow().isoformat()
+    return [
+        {
+            "fragment_id": str(uuid.uuid4()),
+            "raw_text": part,
+            "source_id": source_id,
+            "timestamp": timestamp,
+            "author_id": author_id,
+        }
+        for part in split_text(text)
+    ]
+
+def ingest_text(text, source_id, store=None):
+    """Split one document and store its fragments; returns them."""
     log_event("ingestion.start","info","ingestion","start",{"source":source_id})
-    store = FragmentStore()
-    for part in re.split(r"[.!?]\s+", text):
-        if part.strip():
-            store.append({
-                "fragment_id": str(uuid.uuid4()),
-                "raw_text": part.strip(),
-                "source_id": source_id,
-                "timestamp": datetime.datetime.utcnow().isoformat()
-            })
-    log_event("ingestion.complete","info","ingestion","done")
+    fragments = make_fragments(text, source_id)
+    (store or get_store()).append_many(fragments)
+    log_event("ingestion.complete","info","ingestion","done",{"source":source_id,"fragments":len(fragments)})
+    return fragments
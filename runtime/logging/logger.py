@@ -1,12 +1,183 @@
-import json, sys, uuid, datetime
+"""
+Operational event log (see LOGGING_SCHEMA.md).
+
+log_event() only filters and enqueues; a background thread stamps each
+event with its id, formats it as one JSON line and writes in batches.
+
+- Events below MIN_SEVERITY are dropped before any work is done
+- sample(event_type, rate) keeps every 1/rate-th event of a type
+- rate_limit(event_type, per_sec) caps a type's events per second
+- Every call is counted per event type (counters()); events removed by
+  sampling or rate limiting, or refused by a full queue, are reported in
+  a periodic "logging.suppressed" event instead of being lost silently
+- Events that cannot be formatted or written are counted (dropped()) and
+  reported on stderr
+
+``context`` is serialized on the flusher thread; do not mutate it after
+logging.
+"""
+
+import atexit, collections, datetime, json, os, queue, sys, threading, time, uuid
+
+SEVERITIES = {"debug": 10, "info": 20, "warning": 30, "error": 40, "critical": 50}
+
+MIN_SEVERITY = SEVERITIES.get(os.environ.get("LOG_LEVEL", "info").lower(), 20)
+
+# Seconds between background flushes.
+FLUSH_INTERVAL = 0.25
+
+# Queued events beyond this are dropped (and counted) rather than blocking.
+MAX_QUEUE = 100_000
+
+_queue = queue.Queue(MAX_QUEUE)
+_dropped = 0
+_counts = collections.Counter()
+_suppressed = collections.Counter()
+_sample_every = {}
+_limits = {}
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_wakeup = threading.Event()
+_flusher = None
+
+
+def configure(min_severity=None, sample_rates=None, rate_limits=None):
+    """Set the severity floor and per-type sampling / rate limits."""
+    global MIN_SEVERITY
+    if min_severity is not None:
+        MIN_SEVERITY = SEVERITIES[min_severity]
+    for event_type, rate in (sample_rates or {}).items():
+        sample(event_type, rate)
+    for event_type, per_sec in (rate_limits or {}).items():
+        rate_limit(event_type, per_sec)
+
+
+def sample(event_type, rate):
+    """
+    Keep roughly ``rate`` (0 < rate <= 1) of ``event_type`` events. A rate
+    of 0 only counts them.
+    """
+    _sample_every[event_type] = max(1, round(1 / rate)) if rate > 0 else 0
+
+
+def rate_limit(event_type, per_sec):
+    """Write at most ``per_sec`` ``event_type`` events per second."""
+    # [tokens, capacity, last refill]
+    _limits[event_type] = [float(per_sec), float(per_sec), time.monotonic()]
+
+
+def _allowed(event_type, seen):
+    every = _sample_every.get(event_type)
+    if every is not None and (every == 0 or seen % every):
+        return False
+    bucket = _limits.get(event_type)
+    if bucket is not None:
+        now = time.monotonic()
+        bucket[0] = min(bucket[1], bucket[0] + (now - bucket[2]) * bucket[1])
+        bucket[2] = now
+        if bucket[0] < 1:
+            return False
+        bucket[0] -= 1
+    return True
+
 
 def log_event(event_type, severity, source, message, context=None):
-    sys.stdout.write(json.dumps({
+    if SEVERITIES.get(severity, 20) < MIN_SEVERITY:
+        return
+    with _lock:
+        seen = _counts[event_type]
+        _counts[event_type] = seen + 1
+        if (event_type in _sample_every or event_type in _limits) and not _allowed(event_type, seen):
+            _suppressed[event_type] += 1
+            return
+    try:
+        _queue.put_nowait((time.time(), event_type, severity, source, message, context))
+    except queue.Full:
+        with _lock:
+            _suppressed["logging.queue_full"] += 1
+        return
+    if _flusher is None:
+        _start()
+
+
+def counters():
+    """Events logged per type, including sampled-out and rate-limited ones."""
+    with _lock:
+        return dict(_counts)
+
+
+def dropped():
+    """Events lost because they could not be formatted or written."""
+    with _lock:
+        return _dropped
+
+
+def _drop(count, exc):
+    global _dropped
+    with _lock:
+        _dropped += count
+    try:
+        sys.stderr.write(f"logger: dropped {count} event(s): {exc!r}\n")
+        sys.stderr.flush()
+    except Exception:
+        pass
+
+
+def _format(event):
+    ts, event_type, severity, source, message, context = event
+    return json.dumps({
         "event_id": str(uuid.uuid4()),
-        "timestamp": datetime.datetime.utcnow().isoformat(),
+        "timestamp": datetime.datetime.utcfromtimestamp(ts).isoformat(),
         "event_type": event_type,
         "severity": severity,
         "source": source,
         "message": message,
-        "context": context or {}
-    }) + "\n")
+        "context": context or {},
+    })
+
+
+def flush():
+    """Write everything queued so far, plus a suppression summary."""
+    with _flush_lock:
+        lines = []
+        while True:
+            try:
+                event = _queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                lines.append(_format(event))
+            except Exception as exc:
+                _drop(1, exc)
+        with _lock:
+            suppressed = dict(_suppressed)
+            _suppressed.clear()
+        if suppressed:
+            lines.append(_format((time.time(), "logging.suppressed", "info", "logging",
+                                  "events sampled out or rate limited", suppressed)))
+        if lines:
+            try:
+                sys.stdout.write("\n".join(lines) + "\n")
+                sys.stdout.flush()
+            except Exception as exc:
+                _drop(len(lines), exc)
+
+
+def _run():
+    while True:
+        _wakeup.wait(FLUSH_INTERVAL)
+        _wakeup.clear()
+        try:
+            flush()
+        except Exception as exc:
+            # flush() accounts for lost events itself; keep the thread alive.
+            _drop(0, exc)
+
+
+def _start():
+    global _flusher
+    with _lock:
+        if _flusher is None:
+            _flusher = threading.Thread(target=_run, name="log-flusher", daemon=True)
+            _flusher.start()
+            atexit.register(flush)
@@ -1,12 +1,27 @@
 import sqlite3
+import threading
+from itertools import islice
 from pathlib import Path
 
 DB_PATH = Path("data/fragments.db")
 
+# Rows per executemany() call; each call is one group commit.
+BATCH_SIZE = 2000
+
+INSERT_SQL = "INSERT INTO fragments VALUES (?, ?, ?, ?, ?, ?)"
+
 class FragmentStore:
-    def __init__(self):
-        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-        self.conn = sqlite3.connect(DB_PATH)
+    """
+    Append-only fragment table. One instance is meant to live for the whole
+    process (see get_store); writes from any thread are serialized on a lock.
+    """
+
+    def __init__(self, db_path=None):
+        db_path = Path(db_path or DB_PATH)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
         self.conn.execute("""CREATE TABLE IF NOT EXISTS fragments (
             fragment_id TEXT PRIMARY KEY,
             raw_text TEXT,
@@ -16,17 +31,45 @@ class FragmentStore:
             signals_json TEXT
         )""")
         self.conn.commit()
+        self.lock = threading.Lock()
 
-    def append(self, fragment):
-        self.conn.execute(
-            "INSERT INTO fragments VALUES (?, ?, ?, ?, ?, ?)",
-            (
-                fragment["fragment_id"],
-                fragment["raw_text"],
-                fragment["source_id"],
-                fragment["timestamp"],
-                fragment.get("author_id"),
-                "{}",
-            ),
+    @staticmethod
+    def _row(fragment):
+        return (
+            fragment["fragment_id"],
+            fragment["raw_text"],
+            fragment["source_id"],
+            fragment["timestamp"],
+            fragment.get("author_id"),
+            "{}",
         )
-        self.conn.commit()
+
+    def append(self, fragment):
+        self.append_many([fragment])
+
+    def append_many(self, fragments, batch_size=BATCH_SIZE):
+        """
+        Insert fragments with executemany(), committing once per
+        ``batch_size`` rows. Returns the number inserted.
+        """
+        rows = map(self._row, fragments)
+        total = 0
+        while batch := list(islice(rows, batch_size)):
+            with self.lock, self.conn:
+                self.conn.executemany(INSERT_SQL, batch)
+            total += len(batch)
+        return total
+
+    def close(self):
+        self.conn.close()
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store():
+    """Process-wide FragmentStore, opened on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = FragmentStore()
+        return _store
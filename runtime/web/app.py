@@ -1,6 +1,8 @@
-from fastapi import FastAPI
-from pydantic import BaseModel
-from runtime.ingestion.minimal_ingest import ingest_text
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+from runtime.ingestion.minimal_ingest import ingest_text, make_fragments
+from runtime.storage.fragment_store import BATCH_SIZE, get_store
 
 app = FastAPI()
 
@@ -8,7 +10,80 @@ class IngestRequest(BaseModel):
     text: str
     source_id: str
 
+class BatchDocument(IngestRequest):
+    author_id: str | None = None
+
 @app.post("/ingest")
 def ingest(req: IngestRequest):
     fragments = ingest_text(req.text, req.source_id)
     return {"fragments_created": len(fragments)}
+
+# Longest NDJSON line /ingest/batch buffers; longer lines are reported.
+MAX_LINE_BYTES = 1024 * 1024
+
+async def _ndjson_lines(request):
+    """
+    Yield the lines of a streamed NDJSON body. Each chunk is searched for
+    newlines only past what earlier searches covered, so a line split over
+    many chunks costs linear time. A line longer than MAX_LINE_BYTES is not
+    buffered; it is yielded as None once its end arrives.
+    """
+    buffer = bytearray()
+    oversized = False
+    async for chunk in request.stream():
+        scanned = len(buffer)
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", scanned)) != -1:
+            if oversized or end - start > MAX_LINE_BYTES:
+                yield None
+            else:
+                yield bytes(buffer[start:end])
+            oversized = False
+            start = scanned = end + 1
+        del buffer[:start]
+        if len(buffer) > MAX_LINE_BYTES:
+            oversized = True
+            buffer.clear()
+    yield None if oversized else bytes(buffer)
+
+@app.post("/ingest/batch")
+async def ingest_batch(request: Request):
+    """
+    NDJSON body, one {"text", "source_id"[, "author_id"]} per line, read as
+    it streams in. Fragments are written in group commits of BATCH_SIZE
+    off the event loop. Malformed lines, and lines over MAX_LINE_BYTES, are
+    reported, not fatal.
+    """
+    store = get_store()
+    pending = []
+    counts = {"documents": 0, "fragments_created": 0}
+    errors = []
+
+    async def flush():
+        counts["fragments_created"] += await run_in_threadpool(store.append_many, pending[:])
+        pending.clear()
+
+    line_no = 0
+    async for line in _ndjson_lines(request):
+        line_no += 1
+        if line is None:
+            errors.append({"line": line_no, "error": f"line exceeds {MAX_LINE_BYTES} bytes"})
+            continue
+        if not line.strip():
+            continue
+        try:
+            doc = BatchDocument.model_validate_json(line)
+        except ValidationError as exc:
+            errors.append({"line": line_no, "error": exc.errors(include_url=False)[0]["msg"]})
+            continue
+        counts["documents"] += 1
+        pending.extend(make_fragments(doc.text, doc.source_id, doc.author_id))
+        if len(pending) >= BATCH_SIZE:
+            await flush()
+    if pending:
+        await flush()
+
+    if errors and not counts["documents"]:
+        raise HTTPException(status_code=400, detail={"errors": errors[:100]})
+    return {**counts, "errors": errors[:100], "error_count": len(errors)}
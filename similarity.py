@@ -8,41 +8,124 @@ Safety constraints:
 - No ontology
 - Similarity is local to the current view
 - Weak signals are suppressed
+
+Scaling:
+- The TF-IDF matrix stays sparse
+- Similarities are computed one row block at a time, never all n² at once
+- Memory: the sparse TF-IDF matrix and the result dict (n × top_k pairs),
+  plus one block of block_size × n scores. With threshold ≤ 0 that block
+  is dense, at about 20 bytes per score counting argpartition and masks:
+  about 20 MB at the default BLOCK_ELEMENTS, whatever n is. An explicit
+  ``block_size`` bypasses that cap; 256 rows at 100k fragments is about
+  500 MB. A block is never narrower than one row, so past BLOCK_ELEMENTS
+  fragments each block is a single n-wide row
+- Threshold and top-k selection are vectorized per block
+- A FragmentSnapshot is accepted in place of (id, text) tuples; its texts
+  are decoded one at a time while the vectorizer reads them, and its ids
+  stay a NumPy array
 """
 
 from typing import List, Tuple
+
+import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+
+import metrics
+from fragment_snapshot import FragmentSnapshot
 
 DEFAULT_SIMILARITY_THRESHOLD = 0.25
 DEFAULT_TOP_K = 5
 
+# Upper bound on similarity scores materialized at once (block rows × n);
+# at ~20 bytes per dense score this is ~20 MB of working memory.
+BLOCK_ELEMENTS = 1 << 20
+
+
+def _candidates(block, start: int, threshold: float, top_k: int):
+    """
+    Candidate (row, col, score) triples for one row block of the sparse
+    similarity matrix, excluding each fragment's score against itself.
+
+    With a positive threshold only stored (non-zero) scores can qualify, so
+    the block never leaves sparse form. Otherwise zeros qualify too, and the
+    block is densified and pre-cut with argpartition: every column scoring at
+    least a row's k-th best is kept, so ties at the cut-off survive.
+    """
+    if threshold > 0:
+        coo = block.tocoo()
+        keep = (coo.data >= threshold) & (coo.row + start != coo.col)
+        return coo.row[keep], coo.col[keep], coo.data[keep]
 
+    dense = block.toarray()
+    dense[np.arange(dense.shape[0]), np.arange(start, start + dense.shape[0])] = -np.inf
+    n = dense.shape[1]
+    k = min(top_k, n)
+    kth_col = np.argpartition(dense, n - k, axis=1)[:, n - k]
+    kth = dense[np.arange(dense.shape[0]), kth_col]
+    rows, cols = np.nonzero(dense >= np.maximum(kth, threshold)[:, None])
+    return rows, cols, dense[rows, cols]
+
+
+def _top_k(rows, cols, scores, top_k: int):
+    """
+    Order candidates by row, then score descending, then column ascending
+    (the order a stable sort over columns gives), and keep ``top_k`` per row.
+    """
+    order = np.lexsort((cols, -scores, rows))
+    rows, cols, scores = rows[order], cols[order], scores[order]
+    rank = np.arange(rows.size) - np.searchsorted(rows, rows)
+    keep = rank < top_k
+    return rows[keep], cols[keep], scores[keep]
+
+
+@metrics.timer("similarity_seconds")
 def compute_similarity(
-    fragments: List[Tuple[int, str]],
+    fragments: List[Tuple[int, str]] | FragmentSnapshot,
     threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
     top_k: int = DEFAULT_TOP_K,
+    block_size: int | None = None,
 ):
-    ids = [f[0] for f in fragments]
-    texts = [f[1] for f in fragments]
+    """
+    Map each fragment id to its ``top_k`` most similar other fragments,
+    ``{id: [(other_id, score), ...]}``, keeping only scores ≥ ``threshold``.
+
+    ``block_size`` is the number of rows scored per step; by default it is
+    derived from BLOCK_ELEMENTS.
+    """
+    if isinstance(fragments, FragmentSnapshot):
+        ids = fragments.ids
+        texts = fragments.texts()
+    else:
+        ids = np.array([f[0] for f in fragments], dtype=np.int64)
+        texts = [f[1] for f in fragments]
+    metrics.count("similarity_fragments_total", len(ids))
 
-    if len(texts) < 2:
+    if len(ids) < 2:
         return {}
 
     vectorizer = TfidfVectorizer(stop_words="english")
-    tfidf = vectorizer.fit_transform(texts)
-    sim_matrix = cosine_similarity(tfidf)
+    tfidf = normalize(vectorizer.fit_transform(texts))
+    tfidf_t = tfidf.T.tocsr()
+
+    n = len(ids)
+    if block_size is None:
+        block_size = max(1, BLOCK_ELEMENTS // n)
 
     results = {}
-    for i, fid in enumerate(ids):
-        scores = []
-        for j, other_id in enumerate(ids):
-            if i == j:
-                continue
-            score = float(sim_matrix[i, j])
-            if score >= threshold:
-                scores.append((other_id, score))
-        scores.sort(key=lambda x: x[1], reverse=True)
-        results[fid] = scores[:top_k]
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        for fid in ids[start:stop].tolist():
+            results[fid] = []
+        if top_k <= 0:
+            continue
+        block = tfidf[start:stop] @ tfidf_t
+        rows, cols, scores = _top_k(
+            *_candidates(block, start, threshold, top_k), top_k
+        )
+        # Ids are looked up per block, so no n-long list of Python ints.
+        a_ids, b_ids = ids[start + rows].tolist(), ids[cols].tolist()
+        for a, b, score in zip(a_ids, b_ids, scores.tolist()):
+            results[a].append((b, score))
 
     return results
@@ -2,14 +2,41 @@
 SQLite Fragment Store
 ---------------------
 Append-only, Stage 1 safe persistence.
+
+Connections:
+- reader(): thread-local, read-only (mode=ro) handle
+- writer(): thread-local read/write handle
+- Both are opened once per thread and tuned (WAL, synchronous, cache, mmap)
 """
 
+import base64
+import binascii
+import hashlib
+import json
+import re
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
+from typing import Iterable, Mapping
+
+import metrics
 
 DB_PATH = Path("data/fragments.db")
 
+# Rows per executemany() call inside a bulk insert transaction.
+INSERT_BATCH_SIZE = 5000
+
+INSERT_SQL = """
+INSERT INTO fragments (
+    content, created_at, source, source_type, source_page, ingestion_batch_id,
+    content_hash, source_hash, archive_hash
+)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
 SCHEMA = """
 CREATE TABLE IF NOT EXISTS fragments (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -18,41 +45,233 @@ CREATE TABLE IF NOT EXISTS fragments (
     source TEXT,
     source_type TEXT,
     source_page INTEGER,
-    ingestion_batch_id TEXT
+    ingestion_batch_id TEXT,
+    content_hash TEXT,
+    source_hash TEXT,
+    archive_hash TEXT
 );
 """
 
+# Dedup columns: SHA-256 (hex) of the fragment text, of the uploaded file
+# it came from and, for ZIP members, of the archive that held that file.
+# Stores created before they existed get them via ALTER TABLE; their old
+# rows keep NULL hashes, since stored rows are never updated.
+HASH_COLUMNS = ("content_hash", "source_hash", "archive_hash")
 
-def get_connection():
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+HASH_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_fragments_content_hash ON fragments (content_hash)",
+    "CREATE INDEX IF NOT EXISTS idx_fragments_source_hash ON fragments (source_hash)",
+    "CREATE INDEX IF NOT EXISTS idx_fragments_archive_hash ON fragments (archive_hash)",
+)
+
+# Fragments are append-only, and the store enforces it: UPDATE and DELETE
+# on fragments abort with an IntegrityError. The FTS index below is only fed
+# on INSERT, so a changed or removed row would otherwise leave it stale.
+IMMUTABILITY_TRIGGERS = (
+    """
+CREATE TRIGGER IF NOT EXISTS fragments_no_update BEFORE UPDATE ON fragments BEGIN
+    SELECT RAISE(ABORT, 'fragments are immutable');
+END
+""",
+    """
+CREATE TRIGGER IF NOT EXISTS fragments_no_delete BEFORE DELETE ON fragments BEGIN
+    SELECT RAISE(ABORT, 'fragments are append-only');
+END
+""",
+)
+
+# Full-text index over fragments.content. External-content FTS5 stores only
+# the index; rows are added by an AFTER INSERT trigger. There are no UPDATE or
+# DELETE triggers because IMMUTABILITY_TRIGGERS rejects both.
+FTS_SCHEMA = (
+    """
+CREATE VIRTUAL TABLE IF NOT EXISTS fragments_fts USING fts5(
+    content,
+    content='fragments',
+    content_rowid='id'
+)
+""",
+    """
+CREATE TRIGGER IF NOT EXISTS fragments_fts_ai AFTER INSERT ON fragments BEGIN
+    INSERT INTO fragments_fts (rowid, content) VALUES (new.id, new.content);
+END
+""",
+)
+
+# Tables SQLite maintains on its own: the AUTOINCREMENT counter and the
+# FTS5 index with its shadow tables. Derived from fragments, never data.
+DERIVED_TABLES = (
+    "sqlite_sequence",
+    "fragments_fts",
+    "fragments_fts_config",
+    "fragments_fts_data",
+    "fragments_fts_docsize",
+    "fragments_fts_idx",
+)
+
+SNIPPET_TOKENS = 12
+
+
+def _probe_fts5() -> bool:
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+# False when the linked SQLite was built without FTS5; search then uses LIKE.
+FTS5_AVAILABLE = _probe_fts5()
+
+# Applied to every connection. journal_mode=WAL is persistent and is set once
+# by the writer in init_db(); WAL lets readers proceed while a write is open.
+CONNECTION_PRAGMAS = (
+    ("synchronous", "NORMAL"),  # durable with WAL, no fsync per commit
+    ("cache_size", -64000),  # ~64 MB page cache
+    ("mmap_size", 256 * 1024 * 1024),
+    ("temp_store", "MEMORY"),
+)
+
+# Seconds a connection waits on a lock before raising "database is locked".
+BUSY_TIMEOUT = 5.0
+
+_local = threading.local()
+
+
+def _tune(conn: sqlite3.Connection) -> sqlite3.Connection:
     conn.row_factory = sqlite3.Row
+    for name, value in CONNECTION_PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
     return conn
 
 
-def init_db():
-    conn = get_connection()
+def get_connection():
+    """
+    Open a new, caller-owned read/write connection.
+
+    Prefer reader() / writer() inside the application; this remains for
+    callers that manage (and close) their own connection.
+    """
+    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+    return _tune(sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT))
+
+
+def _cached(mode: str) -> sqlite3.Connection:
+    """
+    Return this thread's persistent connection for ``mode``, reopening it
+    if DB_PATH has changed since it was opened.
+    """
+    cache = _local.__dict__.setdefault("connections", {})
+    entry = cache.get(mode)
+    if entry is not None and entry[0] == DB_PATH:
+        return entry[1]
+    if entry is not None:
+        entry[1].close()
+
+    if mode == "ro":
+        conn = sqlite3.connect(
+            f"{DB_PATH.resolve().as_uri()}?mode=ro", uri=True, timeout=BUSY_TIMEOUT
+        )
+    else:
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT)
+
+    cache[mode] = (DB_PATH, _tune(conn))
+    return cache[mode][1]
+
+
+def reader() -> sqlite3.Connection:
+    """
+    Thread-local read-only connection. Do not close it.
+    """
+    return _cached("ro")
+
+
+def writer() -> sqlite3.Connection:
+    """
+    Thread-local read/write connection. Do not close it; use
+    write_transaction() to group writes.
+    """
+    return _cached("rw")
+
+
+@contextmanager
+def write_transaction():
+    """
+    Run a block of writes as one IMMEDIATE transaction on the writer handle.
+    Commits on success, rolls back on any exception.
+    """
+    conn = writer()
+    conn.execute("BEGIN IMMEDIATE")
     try:
-        conn.execute(SCHEMA)
-        conn.commit()
-    finally:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+
+def close_connections():
+    """
+    Close the calling thread's cached connections.
+    """
+    cache = _local.__dict__.pop("connections", {})
+    for _, conn in cache.values():
         conn.close()
 
 
+def init_db():
+    conn = writer()
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute(SCHEMA)
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(fragments)")}
+    for column in HASH_COLUMNS:
+        if column not in columns:
+            conn.execute(f"ALTER TABLE fragments ADD COLUMN {column} TEXT")
+    for statement in HASH_INDEXES + IMMUTABILITY_TRIGGERS:
+        conn.execute(statement)
+    conn.commit()
+    if FTS5_AVAILABLE:
+        _init_fts(conn)
+
+
+def _init_fts(conn: sqlite3.Connection):
+    """
+    Create the FTS index and, the first time only, backfill it from
+    fragments already in the store.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'fragments_fts'"
+    ).fetchone()
+    with write_transaction():
+        for statement in FTS_SCHEMA:
+            conn.execute(statement)
+        if not exists:
+            conn.execute("INSERT INTO fragments_fts (fragments_fts) VALUES ('rebuild')")
+
+
+def content_hash(data: str | bytes) -> str:
+    """
+    Hex SHA-256 used for the content_hash / source_hash / archive_hash
+    columns.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
 def add_fragment(
     content: str,
     source: str | None = None,
     source_type: str | None = None,
     source_page: int | None = None,
     ingestion_batch_id: str | None = None,
+    source_hash: str | None = None,
+    archive_hash: str | None = None,
 ) -> int:
-    conn = get_connection()
-    try:
+    with write_transaction() as conn:
         cur = conn.execute(
-            """
-            INSERT INTO fragments (content, created_at, source, source_type, source_page, ingestion_batch_id)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
+            INSERT_SQL,
             (
                 content,
                 datetime.utcnow().isoformat() + "Z",
@@ -60,43 +279,414 @@ def add_fragment(
                 source_type,
                 source_page,
                 ingestion_batch_id,
+                content_hash(content),
+                source_hash,
+                archive_hash,
             ),
         )
-        conn.commit()
         return cur.lastrowid
-    finally:
-        conn.close()
 
 
-def list_fragments(limit: int = 25, offset: int = 0):
-    conn = get_connection()
-    try:
-        cur = conn.execute(
-            """
-            SELECT * FROM fragments
-            ORDER BY id DESC
-            LIMIT ? OFFSET ?
-            """,
-            (limit, offset),
-        )
-        return cur.fetchall()
-    finally:
-        conn.close()
+def _fragment_row(fragment: Mapping) -> tuple:
+    return (
+        fragment["content"],
+        datetime.utcnow().isoformat() + "Z",
+        fragment.get("source"),
+        fragment.get("source_type"),
+        fragment.get("source_page"),
+        fragment.get("ingestion_batch_id"),
+        content_hash(fragment["content"]),
+        fragment.get("source_hash"),
+        fragment.get("archive_hash"),
+    )
 
 
-def search_fragments(query: str, limit: int = 25, offset: int = 0):
-    q = f"%{query}%"
-    conn = get_connection()
+# Index of content_hash within a row from _fragment_row().
+_HASH_FIELD = 6
+
+
+def _existing(
+    conn: sqlite3.Connection,
+    column: str,
+    hashes: Iterable[str],
+    exclude_batch: str | None = None,
+) -> set:
+    """
+    The subset of ``hashes`` already stored in ``column``, ignoring rows of
+    ingestion batch ``exclude_batch`` if given: one indexed query, however
+    many hashes, with the list passed as a single JSON parameter.
+    """
+    sql = (
+        f"SELECT DISTINCT {column} FROM fragments "
+        f"WHERE {column} IN (SELECT value FROM json_each(?))"
+    )
+    params = [json.dumps(list(hashes))]
+    if exclude_batch is not None:
+        sql += " AND ingestion_batch_id IS NOT ?"
+        params.append(exclude_batch)
+    return {row[0] for row in conn.execute(sql, params)}
+
+
+def existing_source_hashes(hashes: Iterable[str], exclude_batch: str | None = None) -> set:
+    """
+    Which of the given upload hashes have already been ingested, as a file
+    (source_hash) or as a ZIP archive whose members were (archive_hash),
+    ignoring rows of ingestion batch ``exclude_batch`` if given.
+    """
+    hashes = set(hashes)
+    conn = reader()
+    return (
+        _existing(conn, "source_hash", hashes, exclude_batch)
+        | _existing(conn, "archive_hash", hashes, exclude_batch)
+    )
+
+
+def batch_source_counts(batch_id: str, hashes: Iterable[str]) -> dict:
+    """
+    ``{source_hash: fragments stored}`` for rows of ingestion batch
+    ``batch_id`` that came from the given uploads.
+    """
+    cur = reader().execute(
+        "SELECT source_hash, COUNT(*) FROM fragments "
+        "WHERE source_hash IN (SELECT value FROM json_each(?)) "
+        "AND ingestion_batch_id = ? GROUP BY source_hash",
+        (json.dumps(list(hashes)), batch_id),
+    )
+    return dict(cur.fetchall())
+
+
+def _insert_batch(conn: sqlite3.Connection, batch: list, skip_duplicates: bool):
+    """
+    executemany() one chunk of rows. Returns (inserted, duplicates).
+    """
+    # Earlier chunks of this call are visible to the lookup, so only
+    # repeats within the chunk need tracking here.
+    seen = _existing(conn, "content_hash", {row[_HASH_FIELD] for row in batch})
+    fresh = []
+    duplicates = 0
+    for row in batch:
+        if row[_HASH_FIELD] in seen:
+            duplicates += 1
+            if skip_duplicates:
+                continue
+        else:
+            seen.add(row[_HASH_FIELD])
+        fresh.append(row)
+    with metrics.timed("db_insert_batch_seconds"):
+        conn.executemany(INSERT_SQL, fresh)
+    return len(fresh), duplicates
+
+
+def add_fragments(
+    fragments: Iterable[Mapping],
+    batch_size: int = INSERT_BATCH_SIZE,
+    skip_duplicates: bool = False,
+    report: dict | None = None,
+    atomic: bool = True,
+) -> tuple[int, int] | None:
+    """
+    Append many fragments.
+
+    Accepts any iterable (including generators) of fragment dicts as produced
+    by the *_ingestion extractors. Unknown keys (e.g. CSV ``header``) are
+    ignored. Rows are written with executemany() in chunks of ``batch_size``.
+
+    By default everything is committed once, so either every fragment is
+    stored or none is; the write lock is held while ``fragments`` is being
+    consumed. With ``atomic=False`` each chunk is pulled from ``fragments``
+    first and then written in its own short transaction, so a slow producer
+    (an extractor working through a large PDF) never holds the lock. A
+    failure then leaves the chunks before it stored.
+
+    Each chunk is checked against content_hash with one query. Fragments
+    whose text is already stored, or repeats earlier text in this call, are
+    counted in ``report["duplicate_count"]``; with ``skip_duplicates`` they
+    are also left out of the insert.
+
+    Returns the inclusive (first_id, last_id) range assigned, or None if
+    nothing was inserted. Atomic calls get contiguous ids; otherwise other
+    writers' rows may fall inside the range.
+    """
+    rows = map(_fragment_row, fragments)
+    total = duplicates = 0
+    first_id = last_id = None
+
+    def chunks():
+        while batch := list(islice(rows, batch_size)):
+            yield batch
+
+    if atomic:
+        # The IMMEDIATE transaction holds the write lock, so ids are contiguous.
+        with write_transaction() as conn:
+            for batch in chunks():
+                inserted, dup = _insert_batch(conn, batch, skip_duplicates)
+                total += inserted
+                duplicates += dup
+            if total:
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                first_id = last_id - total + 1
+    else:
+        for batch in chunks():
+            with write_transaction() as conn:
+                inserted, dup = _insert_batch(conn, batch, skip_duplicates)
+                if inserted:
+                    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            if inserted:
+                if first_id is None:
+                    first_id = last_id - inserted + 1
+                metrics.count("fragments_inserted_total", inserted)
+            total += inserted
+            duplicates += dup
+
+    if report is not None:
+        report["duplicate_count"] = report.get("duplicate_count", 0) + duplicates
+    if not total:
+        return None
+    if atomic:
+        metrics.count("fragments_inserted_total", total)
+    return first_id, last_id
+
+
+def encode_cursor(row, max_id: int | None = None) -> str:
+    """
+    Opaque keyset cursor pointing just past ``row`` (the last row of a page).
+    Ranked search rows also carry their BM25 ``score``, and search cursors
+    the ``max_id`` watermark the first page was read at.
+    """
+    key = {"id": row["id"]}
+    if "score" in row.keys() and row["score"] is not None:
+        key["score"] = row["score"]
+    if max_id is not None:
+        key["max_id"] = max_id
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> dict:
+    """
+    Inverse of encode_cursor(). Raises ValueError for malformed tokens.
+    """
     try:
-        cur = conn.execute(
-            """
-            SELECT * FROM fragments
-            WHERE content LIKE ?
-            ORDER BY id DESC
-            LIMIT ? OFFSET ?
-            """,
-            (q, limit, offset),
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        key = json.loads(raw)
+        if not isinstance(key.get("id"), int):
+            raise ValueError
+        if "score" in key and not isinstance(key["score"], (int, float)):
+            raise ValueError
+        if "max_id" in key and not isinstance(key["max_id"], int):
+            raise ValueError
+    except (ValueError, TypeError, AttributeError, binascii.Error):
+        raise ValueError(f"invalid cursor: {token!r}") from None
+    return key
+
+
+@metrics.timer("query_seconds", query="list")
+def list_fragments(
+    limit: int = 25,
+    offset: int = 0,
+    cursor: str | None = None,
+    max_id: int | None = None,
+):
+    """
+    Newest fragments first, up to id ``max_id`` if given.
+
+    With ``cursor`` (from encode_cursor) this is a keyset seek on the primary
+    key, so every page costs the same. ``offset`` is kept for compatibility
+    and is ignored when a cursor is given.
+    """
+    conditions, params = _id_bounds(cursor, max_id)
+    where = "WHERE " + " AND ".join(conditions) if conditions else ""
+    if cursor is not None:
+        offset = 0
+    cur = reader().execute(
+        f"""
+        SELECT * FROM fragments
+        {where}
+        ORDER BY id DESC
+        LIMIT ? OFFSET ?
+        """,
+        (*params, limit, offset),
+    )
+    return cur.fetchall()
+
+
+def _id_bounds(cursor: str | None, max_id: int | None):
+    """
+    Conditions and parameters for a newest-first keyset page: ids below
+    ``cursor``'s and at most ``max_id``.
+    """
+    conditions, params = [], []
+    if cursor is not None:
+        conditions.append("id < ?")
+        params.append(decode_cursor(cursor)["id"])
+    if max_id is not None:
+        conditions.append("id <= ?")
+        params.append(max_id)
+    return conditions, params
+
+
+_FTS_TERM = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def to_fts_query(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    - "quoted text" is a phrase query
+    - a trailing * makes a word a prefix query (``arch*``)
+    - everything else is ANDed; FTS5 operators in user input are quoted away
+    """
+    terms = []
+    for phrase, word in _FTS_TERM.findall(query):
+        if phrase:
+            terms.append('"' + phrase.replace('"', "") + '"')
+            continue
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+@metrics.timer("query_seconds", query="search")
+def search_fragments(
+    query: str,
+    limit: int = 25,
+    offset: int = 0,
+    highlight: tuple[str, str] = ("<mark>", "</mark>"),
+    cursor: str | None = None,
+    max_id: int | None = None,
+):
+    """
+    Ranked full-text search over fragments up to id ``max_id`` if given.
+    Rows carry an extra ``snippet`` column with matches wrapped in
+    ``highlight`` and a ``score`` column; best matches (lowest BM25) come
+    first, ties broken by newest id.
+
+    ``cursor`` continues after the (score, id) of the previous page's last
+    row; ``offset`` is the compatibility path.
+
+    BM25 scores move as fragments are appended. A cursor therefore also
+    carries the watermark its first page was read at, and later pages are
+    limited to ``id <= max_id`` (see fetch_page), so newly appended matches
+    never enter a walk that is under way. The boundary row is re-scored on
+    each page, so a uniform shift in scores does not move the cursor.
+    bm25 uses corpus-wide statistics, so appends can still reorder rows
+    of different lengths relative to each other; such rows may then be
+    repeated or skipped at a page boundary.
+
+    Falls back to a LIKE scan in id order when FTS5 is unavailable, in which
+    case ``snippet`` and ``score`` are NULL.
+    """
+    if not FTS5_AVAILABLE:
+        return _search_fragments_like(query, limit, offset, cursor, max_id)
+
+    match = to_fts_query(query)
+    if not match:
+        return []
+
+    where = "fragments_fts MATCH ?"
+    params = [highlight[0], highlight[1], SNIPPET_TOKENS, match]
+    if cursor is not None:
+        key = decode_cursor(cursor)
+        if "score" not in key:
+            raise ValueError(f"invalid search cursor: {cursor!r}")
+        # Compare against the boundary row's score as ranked now, not as
+        # stored in the cursor: appends rescale every bm25 score.
+        boundary = reader().execute(
+            "SELECT bm25(fragments_fts) FROM fragments_fts "
+            "WHERE fragments_fts MATCH ? AND rowid = ?",
+            (match, key["id"]),
+        ).fetchone()
+        score = key["score"] if boundary is None else boundary[0]
+        where += """
+          AND (bm25(fragments_fts) > ?
+               OR (bm25(fragments_fts) = ? AND f.id < ?))"""
+        params += [score, score, key["id"]]
+        offset = 0
+        max_id = _pinned(key, max_id)
+    if max_id is not None:
+        where += " AND f.id <= ?"
+        params.append(max_id)
+
+    cur = reader().execute(
+        f"""
+        SELECT f.*,
+               snippet(fragments_fts, 0, ?, ?, '…', ?) AS snippet,
+               bm25(fragments_fts) AS score
+        FROM fragments_fts
+        JOIN fragments f ON f.id = fragments_fts.rowid
+        WHERE {where}
+        ORDER BY score, f.id DESC
+        LIMIT ? OFFSET ?
+        """,
+        (*params, limit, offset),
+    )
+    return cur.fetchall()
+
+
+def _search_fragments_like(
+    query: str, limit: int, offset: int, cursor: str | None, max_id: int | None
+):
+    conditions, params = _id_bounds(cursor, max_id)
+    where = " AND ".join(["content LIKE ?", *conditions])
+    if cursor is not None:
+        offset = 0
+    cur = reader().execute(
+        f"""
+        SELECT *, NULL AS snippet, NULL AS score FROM fragments
+        WHERE {where}
+        ORDER BY id DESC
+        LIMIT ? OFFSET ?
+        """,
+        (f"%{query}%", *params, limit, offset),
+    )
+    return cur.fetchall()
+
+
+def fetch_page(
+    query: str | None = None,
+    cursor: str | None = None,
+    limit: int = 25,
+    offset: int = 0,
+    max_id: int | None = None,
+    **search_options,
+):
+    """
+    One page of fragments (search results when ``query`` is set), as the
+    store stood at watermark ``max_id`` if given.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    Search pages are pinned to the watermark of their first page, which
+    travels in the cursor.
+    """
+    if query:
+        if cursor is not None:
+            max_id = _pinned(decode_cursor(cursor), max_id)
+        elif max_id is None:
+            max_id = max_fragment_id()
+        rows = search_fragments(
+            query, limit + 1, offset, cursor=cursor, max_id=max_id, **search_options
         )
-        return cur.fetchall()
-    finally:
-        conn.close()
+    else:
+        rows = list_fragments(limit + 1, offset, cursor=cursor, max_id=max_id)
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1], max_id if query else None)
+
+
+def _pinned(key: dict, max_id: int | None) -> int | None:
+    """The tighter of ``max_id`` and the watermark stored in cursor ``key``."""
+    if "max_id" not in key:
+        return max_id
+    return key["max_id"] if max_id is None else min(max_id, key["max_id"])
+
+
+def max_fragment_id() -> int:
+    """
+    Id of the newest fragment (0 for an empty store). Ids only grow, so
+    this is a watermark for results computed from the store.
+    """
+    return reader().execute("SELECT COALESCE(MAX(id), 0) FROM fragments").fetchone()[0]
@@ -0,0 +1,42 @@
+import pytest
+
+import ingestion_jobs
+import result_cache
+import storage
+
+
+@pytest.fixture(autouse=True)
+def fragment_db(tmp_path, monkeypatch):
+    """Give every test its own freshly initialized fragment store."""
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "fragments.db")
+    storage.init_db()
+    result_cache.pages.clear()
+    yield storage.DB_PATH
+    storage.close_connections()
+
+
+@pytest.fixture
+def seed(fragment_db):
+    """
+    Append fragments to the test store and return their id range.
+    ``seed(n)`` adds ``n`` fragments "{text} {i}" numbered from ``start``;
+    ``seed(texts)`` adds the given texts as they are.
+    """
+    def seed(fragments, text="fragment", start=0):
+        if isinstance(fragments, int):
+            fragments = [f"{text} {i}" for i in range(start, start + fragments)]
+        return storage.add_fragments(
+            {"content": content, "source": "t", "source_type": "txt"}
+            for content in fragments
+        )
+
+    return seed
+
+
+@pytest.fixture(autouse=True)
+def job_store(tmp_path, monkeypatch):
+    """Keep the ingestion job table and spooled job uploads per test."""
+    monkeypatch.setattr(ingestion_jobs, "JOBS_DB_PATH", tmp_path / "jobs.db")
+    monkeypatch.setattr(ingestion_jobs, "JOBS_DIR", tmp_path / "jobs")
+    yield
+    ingestion_jobs.stop_workers()
@@ -0,0 +1,16 @@
+"""
+Shared test helpers.
+"""
+
+import io
+
+# One minimal-PDF generator for tests and benchmarks.
+from benchmarks.corpus import text_pdf as make_text_pdf
+
+
+class Upload(io.BytesIO):
+    """Stand-in for an uploaded file: a readable stream with a ``filename``."""
+
+    def __init__(self, filename, data):
+        super().__init__(data)
+        self.filename = filename
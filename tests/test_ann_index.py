@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from concept_emergence.ann_index import AnnIndex
+from concept_emergence.embeddings_offline import MODEL_ID
+from concept_emergence.stage1 import generate_ann_signals, generate_similarity_signals
+
+
+def clustered(n=400, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((20, dim))
+    return centres[rng.integers(0, 20, n)] + 0.1 * rng.standard_normal((n, dim))
+
+
+def test_query_returns_exact_similarities_best_first():
+    vectors = clustered()
+    index = AnnIndex(dim=16)
+    index.add_many(range(len(vectors)), vectors)
+
+    hits = index.query(vectors[0], k=5, min_sim=0.5)
+
+    assert hits[0] == (0, pytest.approx(1.0))
+    sims = [s for _, s in hits]
+    assert sims == sorted(sims, reverse=True)
+    for fid, sim in hits:
+        a, b = vectors[0], vectors[fid]
+        assert sim == pytest.approx(a @ b / np.linalg.norm(a) / np.linalg.norm(b), abs=1e-5)
+
+
+def test_incremental_add_skips_known_ids_and_survives_reload(tmp_path):
+    vectors = clustered()
+    index = AnnIndex(dim=16)
+    assert index.add_many(range(200), vectors[:200]) == 200
+    assert index.add_many(range(400), vectors) == 200
+    assert len(index) == 400
+
+    path = tmp_path / "ann.npz"
+    index.save(path)
+    reloaded = AnnIndex.open(path, dim=16)
+
+    assert len(reloaded) == 400
+    assert reloaded.query(vectors[7], k=3) == index.query(vectors[7], k=3)
+    # Different parameters: the stale file is ignored, not reused.
+    assert len(AnnIndex.open(path, dim=16, n_bits=4)) == 0
+
+
+def test_index_built_with_another_embedding_model_is_discarded(tmp_path):
+    path = tmp_path / "ann.npz"
+    old = AnnIndex(dim=16, model_id="offline_hash_v0")
+    old.add_many(range(10), clustered(10))
+    old.save(path)
+
+    assert AnnIndex.load(path).model_id == "offline_hash_v0"
+    assert len(AnnIndex.open(path, dim=16, model_id="offline_hash_v0")) == 10
+    fresh = AnnIndex.open(path, dim=16)
+    assert len(fresh) == 0
+    assert fresh.model_id == MODEL_ID
+
+
+def test_ann_signals_are_a_high_recall_subset_of_exact():
+    vectors = clustered()
+    embeddings = [
+        {"fragment_id": i, "embedding": v} for i, v in enumerate(vectors.tolist())
+    ]
+
+    exact = generate_similarity_signals(embeddings, 0.95)
+    ann = generate_ann_signals(embeddings, 0.95, AnnIndex(dim=16), k=50)
+
+    exact_pairs = {(s["a"], s["b"]) for s in exact}
+    ann_pairs = [(s["a"], s["b"]) for s in ann]
+    assert set(ann_pairs) <= exact_pairs
+    assert len(ann_pairs) >= 0.9 * len(exact_pairs)
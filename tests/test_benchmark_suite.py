@@ -0,0 +1,31 @@
+from benchmarks import corpus, suite
+from pdf_ingestion import extract_pdf_fragments
+
+
+def test_corpus_is_deterministic():
+    assert corpus.fragment_list(50, seed=3) == corpus.fragment_list(50, seed=3)
+    assert corpus.fragment_list(50, seed=3) != corpus.fragment_list(50, seed=4)
+
+
+def test_corpus_pdf_has_one_fragment_per_page():
+    texts = corpus.fragment_list(3)
+
+    fragments = extract_pdf_fragments(corpus.text_pdf(texts), "c.pdf")
+
+    assert [f["content"] for f in fragments] == texts
+
+
+def test_compare_flags_regressions_in_the_right_direction():
+    baseline = {"metrics": {
+        "ingest.txt": {"value": 100.0, "better": "higher"},
+        "search.common.p50": {"value": 10.0, "better": "lower"},
+        "export.md": {"value": 50.0, "better": "higher"},
+    }}
+    current = {"metrics": {
+        "ingest.txt": {"value": 70.0, "better": "higher"},
+        "search.common.p50": {"value": 11.0, "better": "lower"},
+    }}
+
+    rows = {name: regressed for name, *_, regressed in suite.compare(baseline, current, 0.2)}
+
+    assert rows == {"ingest.txt": True, "search.common.p50": False}
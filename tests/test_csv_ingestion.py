@@ -0,0 +1,47 @@
+import io
+import types
+
+from csv_ingestion import extract_csv_fragments, iter_csv_fragments
+
+CSV = "name,note\nada,\"multi\nline\"\n\nbjörk,ünïcode\n".encode("utf-8")
+
+
+def test_csv_rows_become_fragments_with_provenance():
+    fragments = extract_csv_fragments(CSV, "people.csv")
+
+    assert [(f["source_page"], f["content"]) for f in fragments] == [
+        (2, "ada, multi\nline"),
+        (4, "björk, ünïcode"),
+    ]
+    assert {f["header"] for f in fragments} == {"name, note"}
+    assert {f["source_type"] for f in fragments} == {"csv"}
+
+
+def test_csv_streams_from_path(tmp_path):
+    path = tmp_path / "people.csv"
+    path.write_bytes(CSV)
+
+    fragments = iter_csv_fragments(path, "people.csv")
+
+    assert isinstance(fragments, types.GeneratorType)
+    assert list(fragments) == extract_csv_fragments(CSV, "people.csv")
+
+
+def test_csv_rows_are_produced_lazily():
+    class Tracked(io.BytesIO):
+        lines = 0
+
+        def __next__(self):
+            Tracked.lines += 1
+            return super().__next__()
+
+    data = b"h\n" + b"".join(b"row %d\n" % i for i in range(1000))
+    first = next(iter_csv_fragments(Tracked(data), "big.csv"))
+
+    assert first["content"] == "row 0"
+    assert Tracked.lines < 10
+
+
+def test_invalid_utf8_is_ignored_and_empty_file_yields_nothing():
+    assert [f["content"] for f in iter_csv_fragments(io.BytesIO(b"h\nab\xffc\n"), "x.csv")] == ["abc"]
+    assert list(iter_csv_fragments(io.BytesIO(b""), "empty.csv")) == []
@@ -0,0 +1,106 @@
+import sqlite3
+
+import storage
+from ingestion import ingest_files
+from storage import add_fragments, existing_source_hashes, list_fragments
+from tests.helpers import Upload
+
+
+def count():
+    return len(list_fragments(limit=1000))
+
+
+def test_fragments_store_content_hash():
+    add_fragments([{"content": "hello"}])
+
+    row = list_fragments(limit=1)[0]
+
+    assert row["content_hash"] == storage.content_hash("hello")
+
+
+def test_duplicates_are_reported_and_optionally_skipped():
+    add_fragments([{"content": "a"}, {"content": "b"}])
+
+    report = {}
+    assert add_fragments([{"content": "a"}, {"content": "c"}, {"content": "c"}], report=report)
+    assert report == {"duplicate_count": 2}
+    assert count() == 5
+
+    report = {}
+    ids = add_fragments(
+        [{"content": "a"}, {"content": "d"}, {"content": "d"}],
+        skip_duplicates=True,
+        report=report,
+    )
+    assert report == {"duplicate_count": 2}
+    assert ids[1] - ids[0] == 0
+    assert list_fragments(limit=1)[0]["content"] == "d"
+
+
+def test_duplicates_across_insert_chunks_are_seen():
+    report = {}
+    add_fragments(
+        [{"content": "x"}, {"content": "y"}, {"content": "x"}],
+        batch_size=2,
+        skip_duplicates=True,
+        report=report,
+    )
+
+    assert report == {"duplicate_count": 1}
+    assert count() == 2
+
+
+def test_one_lookup_query_per_chunk(monkeypatch):
+    queries = []
+    real = storage._existing
+    monkeypatch.setattr(
+        storage, "_existing", lambda *args: queries.append(args[1]) or real(*args)
+    )
+
+    add_fragments(({"content": str(i)} for i in range(10)), batch_size=4)
+
+    assert queries == ["content_hash"] * 3
+
+
+def test_identical_upload_is_skipped_before_extraction():
+    first = ingest_files([Upload("a.txt", b"one\n\ntwo")], workers=1)
+    again = ingest_files(
+        [Upload("copy-of-a.txt", b"one\n\ntwo"), Upload("b.txt", b"two\n\nthree")],
+        workers=1,
+    )
+
+    assert first["fragment_count"] == 2 and first["skipped_file_count"] == 0
+    assert again["skipped_files"] == ["copy-of-a.txt"]
+    assert again["fragment_count"] == 2
+    assert again["duplicate_fragment_count"] == 1
+    assert len(existing_source_hashes([storage.content_hash(b"one\n\ntwo")])) == 1
+    assert count() == 4
+
+
+def test_repeated_file_within_one_upload_is_skipped():
+    result = ingest_files([Upload("a.txt", b"same"), Upload("b.txt", b"same")], workers=1)
+
+    assert result["file_count"] == 1
+    assert result["skipped_files"] == ["b.txt"]
+
+
+def test_init_db_adds_hash_columns_to_existing_store(tmp_path, monkeypatch):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE fragments (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+        "content TEXT NOT NULL, created_at TEXT NOT NULL, source TEXT, "
+        "source_type TEXT, source_page INTEGER, ingestion_batch_id TEXT)"
+    )
+    conn.execute("INSERT INTO fragments (content, created_at) VALUES ('old', 'then')")
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(storage, "DB_PATH", path)
+
+    storage.init_db()
+    add_fragments([{"content": "old"}, {"content": "new"}], report=(report := {}))
+
+    rows = {r["content"]: r["content_hash"] for r in list_fragments(limit=10)}
+    assert rows["new"] == storage.content_hash("new")
+    assert report == {"duplicate_count": 0}
+    assert len(list_fragments(limit=10)) == 3
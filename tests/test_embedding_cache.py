@@ -0,0 +1,61 @@
+import json
+
+import numpy as np
+
+from concept_emergence.embedding_cache import EmbeddingCache
+from concept_emergence.embeddings_offline import embed
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([embed(t) for t in texts], dtype=np.float32)
+
+
+def test_only_unseen_content_is_embedded(tmp_path):
+    embedder = CountingEmbedder()
+    cache = EmbeddingCache(tmp_path, embed_fn=embedder)
+
+    first = cache.embed(["a", "b", "a"])
+    second = cache.embed(["b", "c"])
+
+    assert embedder.calls == [["a", "b"], ["c"]]
+    np.testing.assert_allclose(first[0], embed("a"), rtol=1e-6)
+    np.testing.assert_array_equal(first[1], second[0])
+
+
+def test_cache_persists_across_instances(tmp_path):
+    EmbeddingCache(tmp_path).embed(["x", "y"])
+
+    embedder = CountingEmbedder()
+    cache = EmbeddingCache(tmp_path, embed_fn=embedder)
+    vectors = cache.embed(["y", "x"])
+
+    assert embedder.calls == []
+    assert len(cache) == 2
+    np.testing.assert_allclose(vectors[0], embed("y"), rtol=1e-6)
+
+
+def test_model_change_invalidates_cache(tmp_path):
+    EmbeddingCache(tmp_path, model_id="m1").embed(["x"])
+
+    embedder = CountingEmbedder()
+    cache = EmbeddingCache(tmp_path, model_id="m2", embed_fn=embedder)
+    cache.embed(["x"])
+
+    assert embedder.calls == [["x"]]
+    assert json.loads((tmp_path / "meta.json").read_text())["model_id"] == "m2"
+
+
+def test_uncommitted_tail_is_discarded(tmp_path):
+    EmbeddingCache(tmp_path).embed(["x"])
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(b"\0" * 16)
+
+    cache = EmbeddingCache(tmp_path)
+
+    assert len(cache) == 1
+    assert (tmp_path / "vectors.f32").stat().st_size == cache.dim * 4
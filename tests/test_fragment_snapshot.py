@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from concept_emergence.embedding_cache import EmbeddingCache
+from concept_emergence.stage1 import generate_embeddings
+from fragment_snapshot import FragmentSnapshot
+from similarity import compute_similarity
+from storage import add_fragments
+
+ROWS = [
+    (1, "river stone", "a.pdf", "pdf"),
+    (2, "café — naïve ünïcode", "a.pdf", "pdf"),
+    (5, "", None, None),
+    (7, "river stone archive", "b.csv", "csv"),
+]
+
+
+def test_columns_and_lazy_text():
+    snap = FragmentSnapshot.from_rows(ROWS)
+
+    assert snap.ids.tolist() == [1, 2, 5, 7]
+    assert snap.offsets[-1] == len(snap.data) == sum(len(r[1].encode()) for r in ROWS)
+    assert snap.sources == ["a.pdf", "b.csv"]
+    assert snap.source_codes.tolist() == [0, 0, -1, 1]
+    assert [snap.source_type(i) for i in range(4)] == ["pdf", "pdf", None, "csv"]
+    assert snap[1] == (2, "café — naïve ünïcode")
+    assert snap[-1] == (7, "river stone archive")
+    assert list(snap) == [(r[0], r[1]) for r in ROWS]
+
+
+def test_slices_share_buffers():
+    snap = FragmentSnapshot.from_rows(ROWS)
+
+    tail = snap[1:3]
+
+    assert list(tail) == [(2, ROWS[1][1]), (5, "")]
+    assert np.shares_memory(tail.ids, snap.ids)
+    assert tail.data.obj is snap.data.obj
+    assert len(snap[3:1]) == 0
+    with pytest.raises(ValueError):
+        snap[::2]
+
+
+def test_from_store_streams_every_fragment():
+    add_fragments(
+        {"content": f"fragment {i}", "source": f"s{i % 3}", "source_type": "txt"}
+        for i in range(2500)
+    )
+
+    snap = FragmentSnapshot.from_store()
+
+    assert len(snap) == 2500
+    assert snap.sources == ["s0", "s1", "s2"]
+    assert snap.text(2499) == "fragment 2499"
+    assert snap.nbytes < 2500 * 40
+
+
+def test_similarity_accepts_snapshot():
+    rows = [(i, text) for i, text, *_ in ROWS] + [(9, "stone river")]
+
+    assert compute_similarity(FragmentSnapshot.from_rows(rows)) == compute_similarity(rows)
+
+
+def test_stage1_embeddings_accept_snapshot(tmp_path):
+    rows = [(i, text) for i, text, *_ in ROWS]
+    cache = EmbeddingCache(tmp_path / "cache")
+
+    from_snapshot = generate_embeddings(cache, FragmentSnapshot.from_rows(rows))
+    from_rows = generate_embeddings(cache, rows)
+
+    ids, matrix = from_snapshot
+    assert ids.dtype == np.int64 and ids.tolist() == [1, 2, 5, 7]
+    assert matrix.shape == (4, cache.dim)
+    assert np.array_equal(ids, from_rows[0])
+    assert np.array_equal(matrix, from_rows[1])
@@ -0,0 +1,88 @@
+import io
+import zipfile
+
+import pytest
+
+from app import app
+from ui import read_only
+
+
+@pytest.mark.parametrize("client, url", [
+    (app.test_client(), "/fragments?q=river"),
+    (read_only.app.test_client(), "/fragments?q=river"),
+    (app.test_client(), "/export/all?format=md"),
+])
+def test_revalidation_returns_304_until_an_append(seed, client, url):
+    seed(5, text="river note")
+    first = client.get(url)
+    first.get_data()
+    tag = first.headers["ETag"]
+    assert first.status_code == 200
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    again = client.get(url, headers={"If-None-Match": tag})
+    assert again.status_code == 304
+    assert again.get_data() == b""
+    assert again.headers["ETag"] == tag
+
+    seed(1, text="river note", start=5)
+    changed = client.get(url, headers={"If-None-Match": tag})
+    changed.get_data()
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != tag
+
+
+def test_etag_depends_on_query_parameters(seed):
+    seed(3, text="river note")
+    client = app.test_client()
+
+    a = client.get("/fragments?q=river").headers["ETag"]
+    b = client.get("/fragments?q=note").headers["ETag"]
+
+    assert a != b
+    assert client.get("/fragments?q=note", headers={"If-None-Match": a}).status_code == 200
+
+
+def test_read_only_etag_changes_with_signal_log(seed, tmp_path, monkeypatch):
+    seed(3, text="river note")
+    log = tmp_path / "stage1.json"
+    monkeypatch.setattr(read_only, "STAGE1_ADJACENCY", tmp_path / "adj")
+    monkeypatch.setattr(read_only, "STAGE1_LOG", str(log))
+    client = read_only.app.test_client()
+    tag = client.get("/fragments").headers["ETag"]
+
+    log.write_text('{"signals": [{"a": 1, "b": 2, "similarity": 0.9}]}')
+
+    assert client.get("/fragments", headers={"If-None-Match": tag}).status_code == 200
+
+
+def test_zip_export_bytes_are_repeatable(seed):
+    seed(3, text="river note")
+    client = app.test_client()
+
+    first = client.get("/export/all?format=zip").get_data()
+    second = client.get("/export/all?format=zip").get_data()
+
+    assert first == second
+    with zipfile.ZipFile(io.BytesIO(first)) as zf:
+        assert zf.namelist() == ["fragment_1.md", "fragment_2.md", "fragment_3.md"]
+        assert all(info.compress_type == zipfile.ZIP_DEFLATED for info in zf.infolist())
+
+
+@pytest.mark.parametrize("url", ["/fragments", "/fragments?q=river", "/export/all?format=json"])
+def test_body_stops_at_the_watermark_the_etag_names(seed, url, monkeypatch):
+    import app as app_module
+
+    seed(3, text="river note")
+    client = app.test_client()
+    tag = client.get(url).headers["ETag"]
+    # Rows appended after the watermark was read must not reach the body.
+    monkeypatch.setattr(app_module, "max_fragment_id", lambda: 3)
+    seed(2, text="river note", start=3)
+
+    response = client.get(url)
+    body = response.get_data(as_text=True)
+
+    assert response.headers["ETag"] == tag
+    assert "river note 2" in body
+    assert "river note 3" not in body and "river note 4" not in body
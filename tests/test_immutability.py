@@ -13,6 +13,8 @@ if future changes violate preservation constraints.
 import sqlite3
 import pytest
 
+import storage
+
 DB_PATH = "fragments.db"
 
 
@@ -38,7 +40,7 @@ def test_fragments_are_append_only():
 
 def test_fragment_immutability_by_id():
     """Ensure an existing fragment cannot be mutated by ID."""
-    conn = get_connection()
+    conn = storage.get_connection()
     cur = conn.cursor()
 
     cur.execute("SELECT id, content FROM fragments LIMIT 1")
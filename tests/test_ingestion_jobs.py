@@ -0,0 +1,122 @@
+import json
+
+import ingestion_jobs
+from app import app
+from storage import add_fragments, list_fragments
+from tests.helpers import Upload
+
+
+def test_submit_queues_job_without_ingesting():
+    job_id = ingestion_jobs.submit([Upload("a.txt", b"one\n\ntwo")])
+
+    job = ingestion_jobs.get_job(job_id)
+    assert job["status"] == "queued"
+    assert job["files_total"] == 1
+    assert list_fragments() == []
+
+
+def test_run_pending_ingests_and_reports_progress():
+    job_id = ingestion_jobs.submit(
+        [Upload("a.txt", b"one\n\ntwo"), Upload("b.txt", b"three")]
+    )
+
+    assert ingestion_jobs.run_pending() == 1
+
+    job = ingestion_jobs.get_job(job_id)
+    assert job["status"] == "done"
+    assert (job["files_done"], job["fragment_count"], job["file_count"]) == (2, 3, 2)
+    assert job["fragments_per_sec"] is None or job["fragments_per_sec"] > 0
+    assert {r["ingestion_batch_id"] for r in list_fragments()} == {job_id}
+    assert not (ingestion_jobs.JOBS_DIR / job_id).exists()
+
+
+def test_interrupted_job_resumes_at_first_unfinished_file(monkeypatch):
+    job_id = ingestion_jobs.submit(
+        [Upload("a.txt", b"first"), Upload("b.txt", b"second")]
+    )
+    # Simulate a crash after the first file: claimed by a dead process.
+    row = ingestion_jobs._claim()
+    first = json.loads(row["files"])[0]
+    ingestion_jobs.ingest_spooled(
+        [(first["filename"], ingestion_jobs.Path(first["path"]), first["hash"])],
+        batch_id=job_id,
+    )
+    ingestion_jobs._update(job_id, files_done=1, fragment_count=1, file_count=1)
+    monkeypatch.setattr(ingestion_jobs, "_pid_alive", lambda pid: False)
+
+    assert ingestion_jobs.recover() == 1
+    ingestion_jobs.run_pending()
+
+    job = ingestion_jobs.get_job(job_id)
+    assert job["status"] == "done"
+    assert job["fragment_count"] == 2
+    assert [r["content"] for r in reversed(list_fragments())] == ["first", "second"]
+
+
+def test_job_interrupted_mid_file_stores_the_rest_of_that_file_once(monkeypatch):
+    job_id = ingestion_jobs.submit(
+        [Upload("a.txt", b"one\n\ntwo\n\nthree"), Upload("b.txt", b"four")]
+    )
+    # Simulate a crash after the first chunk of a.txt was committed.
+    row = ingestion_jobs._claim()
+    first = json.loads(row["files"])[0]
+    add_fragments([{
+        "content": "one", "source": "a.txt", "source_type": "txt",
+        "ingestion_batch_id": job_id, "source_hash": first["hash"],
+    }])
+    monkeypatch.setattr(ingestion_jobs, "_pid_alive", lambda pid: False)
+
+    assert ingestion_jobs.recover() == 1
+    ingestion_jobs.run_pending()
+
+    job = ingestion_jobs.get_job(job_id)
+    assert job["status"] == "done"
+    assert (job["files_done"], job["fragment_count"], job["skipped_files"]) == (2, 4, [])
+    assert [r["content"] for r in reversed(list_fragments())] == ["one", "two", "three", "four"]
+
+
+def test_job_files_share_one_parallel_extraction(monkeypatch):
+    calls, progress = [], []
+    real_ingest, real_update = ingestion_jobs.ingest_spooled, ingestion_jobs._update
+
+    def ingest(spooled, **kwargs):
+        calls.append(len(spooled))
+        return real_ingest(spooled, workers=2, **kwargs)
+
+    def update(job_id, **fields):
+        if "files_done" in fields:
+            progress.append((fields["files_done"], fields["fragment_count"]))
+        real_update(job_id, **fields)
+
+    monkeypatch.setattr(ingestion_jobs, "ingest_spooled", ingest)
+    monkeypatch.setattr(ingestion_jobs, "_update", update)
+    job_id = ingestion_jobs.submit(
+        [Upload("a.txt", b"one\n\ntwo"), Upload("b.txt", b"three"), Upload("c.txt", b"four")]
+    )
+
+    ingestion_jobs.run_pending()
+
+    assert calls == [3]
+    assert progress == [(1, 2), (2, 3), (3, 4)]
+    assert ingestion_jobs.get_job(job_id)["status"] == "done"
+
+
+def test_disassembler_post_returns_job_id_and_status_route():
+    client = app.test_client()
+
+    response = client.post(
+        "/disassembler",
+        data={"files": [(Upload("a.txt", b"hello"), "a.txt")]},
+        content_type="multipart/form-data",
+        headers={"Accept": "application/json"},
+    )
+
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+    assert ingestion_jobs.wait_for(job_id)["status"] == "done"
+
+    status = client.get(f"/jobs/{job_id}?format=json").get_json()
+    assert status["fragment_count"] == 1
+    page = client.get(f"/jobs/{job_id}")
+    assert b"Fragments created" in page.data
+    assert client.get("/jobs/unknown").status_code == 404
@@ -0,0 +1,56 @@
+import logging
+import sqlite3
+
+from benchmarks import loadtest
+
+
+def test_percentiles_and_throughput():
+    recorder = loadtest.Recorder()
+    for ms in range(1, 101):
+        recorder.record("read", ms / 1000)
+    recorder.record("read", 0.5, ok=False)
+
+    row = recorder.report(duration=2.0)["read"]
+
+    assert row["requests"] == 101
+    assert row["errors"] == 1
+    assert row["p50_ms"] == 51
+    assert row["p99_ms"] == 100
+    assert row["throughput_rps"] == 50.5
+
+
+def test_only_lock_errors_are_counted():
+    recorder = loadtest.Recorder()
+    handler = loadtest.LockErrorHandler(recorder)
+    try:
+        raise sqlite3.OperationalError("database is locked")
+    except sqlite3.OperationalError as exc:
+        locked = logging.LogRecord("x", logging.ERROR, "", 0, "boom", (), (type(exc), exc, None))
+    try:
+        raise sqlite3.OperationalError("no such table: fragments")
+    except sqlite3.OperationalError as exc:
+        other = logging.LogRecord("x", logging.ERROR, "", 0, "boom", (), (type(exc), exc, None))
+
+    handler.emit(locked)
+    handler.emit(other)
+
+    assert dict(recorder.lock_errors) == {"upload.job": 1}
+
+
+def test_scenario_runs_against_in_process_server():
+    scenario = {
+        "duration": 1,
+        "seed_fragments": 200,
+        "upload": {"format": "txt", "fragments": 20},
+        "groups": [
+            {"users": 2, "mix": {"read": 2, "search": 1, "export": 1}},
+            {"users": 1, "mix": {"upload": 1}},
+        ],
+    }
+
+    result = loadtest.run(scenario)
+
+    routes = result["routes"]
+    assert {"read", "search", "export", "upload", "upload.job"} <= set(routes)
+    assert all(row["errors"] == 0 for row in routes.values())
+    assert all(row["lock_errors"] == 0 for row in routes.values())
@@ -0,0 +1,57 @@
+import pytest
+
+import metrics
+from app import app
+from storage import add_fragments, fetch_page
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_histogram_renders_cumulative_buckets():
+    for seconds in (0.0001, 0.003, 0.003, 100.0):
+        metrics.observe("query_seconds", seconds, query="list")
+
+    text = metrics.render()
+
+    assert "# TYPE query_seconds histogram" in text
+    assert 'query_seconds_bucket{query="list",le="0.0005"} 1' in text
+    assert 'query_seconds_bucket{query="list",le="0.005"} 3' in text
+    assert 'query_seconds_bucket{query="list",le="60.0"} 3' in text
+    assert 'query_seconds_bucket{query="list",le="+Inf"} 4' in text
+    assert 'query_seconds_count{query="list"} 4' in text
+
+
+def test_counters_and_label_escaping():
+    metrics.count("export_bytes_total", 10, format='a"b')
+    metrics.count("export_bytes_total", 5, format='a"b')
+
+    assert 'export_bytes_total{format="a\\"b"} 15' in metrics.render()
+
+
+def test_timed_iter_observes_once_when_exhausted():
+    assert list(metrics.timed_iter(iter([1, 2, 3]), "export_seconds", format="md")) == [1, 2, 3]
+
+    assert 'export_seconds_count{format="md"} 1' in metrics.render()
+
+
+def test_metrics_route_reports_hot_paths():
+    add_fragments([{"content": "hello world"}, {"content": "goodbye"}])
+    fetch_page()
+    fetch_page(query="hello")
+    client = app.test_client()
+    client.get("/export/all?format=md").get_data()
+
+    response = client.get("/metrics")
+
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    assert "fragments_inserted_total 2" in text
+    assert 'query_seconds_count{query="list"} 1' in text
+    assert 'query_seconds_count{query="search"} 1' in text
+    assert 'export_seconds_count{format="md"} 1' in text
+    assert "db_insert_batch_seconds_count 1" in text
@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+
+from near_duplicates import MinHashIndex, run_near_duplicates, shingles
+from storage import get_connection
+
+BASE = [
+    "The harbour ledger for the winter of the quarry records every lantern shipped north",
+    "Marginalia in the third folio gloss the rubric with a later hand and a different ink",
+    "Orchard accounts list granary stores, foundry wages and the meridian survey costs",
+]
+
+
+def test_short_and_empty_texts():
+    hashed, counts = shingles(["one two", "", "a b c d"], k=3)
+
+    assert counts.tolist() == [1, 0, 2]
+    assert len(hashed) == 3
+
+
+def test_estimate_tracks_true_jaccard():
+    words = [f"w{i}" for i in range(200)]
+    a, b = " ".join(words), " ".join(words[:150] + [f"x{i}" for i in range(50)])
+    index = MinHashIndex(num_perm=256, bands=32)
+    signatures, _ = index.sign([a, b])
+
+    estimate = (signatures[0] == signatures[1]).mean()
+
+    # 148 shared of 248 distinct 3-word shingles.
+    assert abs(estimate - 148 / 248) < 0.1
+
+
+def test_groups_near_duplicates_only():
+    texts = BASE + [
+        BASE[0] + " again",
+        BASE[1],
+        "Completely unrelated words about papyrus tablets and cuneiform styluses here",
+    ]
+    index = MinHashIndex()
+    index.add_many(range(1, len(texts) + 1), texts)
+
+    groups = index.groups(threshold=0.7)
+
+    assert [g["fragment_ids"] for g in groups] == [[1, 4], [2, 5]]
+    assert groups[1]["estimated_jaccard"] == [1.0, 1.0]
+
+
+def test_incremental_run_signs_only_new_fragments(seed, tmp_path):
+    index_path = tmp_path / "nd.npz"
+    report_path = tmp_path / "nd.json"
+    seed(BASE)
+
+    first = run_near_duplicates(report_path, index_path)
+    assert first["group_count"] == 0
+    assert first["fragments_indexed"] == 3
+
+    seed([BASE[2]])
+    before = MinHashIndex.load(index_path).signatures.copy()
+    second = run_near_duplicates(report_path, index_path)
+
+    assert second["groups"] == [{"fragment_ids": [3, 4], "estimated_jaccard": [1.0, 1.0]}]
+    assert np.array_equal(MinHashIndex.load(index_path).signatures[:3], before)
+    assert json.loads(report_path.read_text()) == second
+
+
+def test_report_does_not_touch_the_database(seed, tmp_path):
+    seed(BASE + BASE)
+    conn = get_connection()
+    tables = conn.execute("SELECT name FROM sqlite_master").fetchall()
+    count = conn.execute("SELECT COUNT(*) FROM fragments").fetchone()
+
+    run_near_duplicates(tmp_path / "r.json", tmp_path / "i.npz")
+
+    assert conn.execute("SELECT name FROM sqlite_master").fetchall() == tables
+    assert conn.execute("SELECT COUNT(*) FROM fragments").fetchone() == count
+    conn.close()
+
+
+def test_index_from_another_store_is_discarded(seed, tmp_path):
+    stale = MinHashIndex()
+    stale.watermark = 10_000
+    stale.save(tmp_path / "i.npz")
+    seed(BASE)
+
+    report = run_near_duplicates(None, tmp_path / "i.npz")
+
+    assert report["max_fragment_id"] == 3
+    assert MinHashIndex.load(tmp_path / "i.npz").watermark == 3
@@ -0,0 +1,83 @@
+import pytest
+
+from app import app
+from storage import add_fragments, decode_cursor, fetch_page, list_fragments
+from ui import read_only
+
+
+def walk(query=None, limit=4):
+    seen, cursor = [], None
+    while True:
+        rows, cursor = fetch_page(query=query, cursor=cursor, limit=limit)
+        seen.extend(r["id"] for r in rows)
+        if cursor is None:
+            return seen
+
+
+def test_cursor_pages_match_offset_pages(seed):
+    seed(10)
+
+    assert walk() == [r["id"] for r in list_fragments(limit=100)]
+    assert walk() == list(range(10, 0, -1))
+
+
+def test_search_cursor_walks_every_match_once_in_rank_order():
+    add_fragments(
+        [{"content": "river " * (i % 3 + 1)} for i in range(9)]
+        + [{"content": "unrelated"}]
+    )
+
+    ids = walk(query="river", limit=2)
+
+    assert sorted(ids) == list(range(1, 10))
+    assert ids == [r["id"] for r in fetch_page(query="river", limit=100)[0]]
+
+
+def test_cursor_is_stable_across_appends(seed):
+    seed(6)
+    first, cursor = fetch_page(limit=3)
+    seed(5, text="appended later")
+
+    second, _ = fetch_page(cursor=cursor, limit=3)
+
+    assert [r["id"] for r in first + second] == [6, 5, 4, 3, 2, 1]
+
+
+def test_search_cursor_is_pinned_to_the_first_page_watermark():
+    add_fragments({"content": "river " * (i % 3 + 1)} for i in range(6))
+    first, cursor = fetch_page(query="river", limit=3)
+    assert decode_cursor(cursor)["max_id"] == 6
+    # Strong matches appended mid-walk would otherwise rank ahead of the cursor.
+    add_fragments({"content": "river river river river"} for _ in range(4))
+
+    rest = []
+    while cursor is not None:
+        rows, cursor = fetch_page(query="river", cursor=cursor, limit=3)
+        rest.extend(rows)
+
+    assert sorted(r["id"] for r in first + rest) == [1, 2, 3, 4, 5, 6]
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+    assert app.test_client().get("/fragments?cursor=%%%").status_code == 400
+    assert read_only.app.test_client().get("/fragments?cursor=xyz").status_code == 400
+
+
+def test_malformed_page_and_similarity_are_rejected():
+    assert app.test_client().get("/fragments?page=two").status_code == 400
+    assert read_only.app.test_client().get("/fragments?page=two").status_code == 400
+    assert read_only.app.test_client().get("/fragments?sim=high").status_code == 400
+
+
+@pytest.mark.parametrize("client", [app.test_client(), read_only.app.test_client()])
+def test_fragments_routes_emit_next_cursor(client, seed):
+    seed(40)
+
+    first = client.get("/fragments").get_data(as_text=True)
+    assert "cursor=" in first
+
+    _, cursor = fetch_page(limit=read_only.PAGE_SIZE)
+    page = client.get(f"/fragments?cursor={cursor}")
+    assert page.status_code == 200
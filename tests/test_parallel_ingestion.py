@@ -0,0 +1,78 @@
+import os
+
+import pytest
+
+import ingestion
+import storage
+from ingestion import ingest_files
+from pdf_ingestion import extract_pdf_fragments
+from storage import list_fragments
+from tests.helpers import Upload, make_text_pdf
+
+
+def uploads():
+    return [
+        Upload("long.pdf", make_text_pdf([f"page {i}" for i in range(1, 21)])),
+        Upload("notes.txt", b"first\n\nsecond"),
+        Upload("broken.pdf", b"%PDF-1.4 not really"),
+        Upload("short.pdf", make_text_pdf(["alpha", "", "gamma"])),
+    ]
+
+
+def stored():
+    return [
+        (r["source"], r["source_page"], r["content"])
+        for r in reversed(list_fragments(limit=1000))
+    ]
+
+
+def test_text_pdf_fixture_extracts():
+    fragments = extract_pdf_fragments(make_text_pdf(["one", "two"]), "f.pdf")
+    assert [(f["source_page"], f["content"]) for f in fragments] == [(1, "one"), (2, "two")]
+
+
+def test_parallel_matches_serial_order(monkeypatch, tmp_path):
+    monkeypatch.setattr(ingestion, "MIN_PAGES_PER_TASK", 3)
+
+    serial = ingest_files(uploads(), workers=1)
+    expected = stored()
+    # Fresh store, or the identical uploads would be skipped as duplicates.
+    monkeypatch.setattr(storage, "DB_PATH", tmp_path / "parallel.db")
+    storage.init_db()
+    parallel = ingest_files(uploads(), workers=3)
+
+    assert parallel["fragment_count"] == serial["fragment_count"] == 24
+    assert parallel["file_count"] == serial["file_count"] == 3
+    assert stored() == expected
+    assert [p for s, p, _ in expected if s == "long.pdf"] == list(range(1, 21))
+
+
+def test_page_range_plan_covers_every_page(monkeypatch):
+    monkeypatch.setattr(ingestion, "MIN_PAGES_PER_TASK", 4)
+    data = make_text_pdf([f"p{i}" for i in range(1, 12)])
+
+    plan = ingestion._plan(data, "x.pdf", "batch", workers=2)
+
+    assert [args[3:] for _, args in plan] == [(1, 6), (7, 12)]
+
+
+def test_failing_and_crashing_files_are_skipped(monkeypatch):
+    plan = ingestion._plan
+
+    def faulty_plan(path, filename, batch_id, workers):
+        if filename == "raises.txt":
+            return [(int, ("not a number",))]
+        if filename == "crashes.txt":
+            return [(os._exit, (1,))]
+        return plan(path, filename, batch_id, workers)
+
+    monkeypatch.setattr(ingestion, "_plan", faulty_plan)
+    files = [Upload(f"{name}.txt", name.encode()) for name in
+             ("before", "raises", "crashes", "after", "last")]
+
+    result = ingest_files(files, workers=2)
+
+    assert result["file_count"] == 3
+    assert [content for _, _, content in stored()] == ["before", "after", "last"]
+    # The broken pool was replaced, so the next ingest still runs in parallel.
+    assert ingest_files([Upload("again.txt", b"again")], workers=2)["file_count"] == 1
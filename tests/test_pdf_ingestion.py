@@ -1,7 +1,8 @@
 import io
 import zipfile
 from app import app
-from storage import get_connection
+from storage import DERIVED_TABLES, get_connection
+from tests.helpers import make_text_pdf
 
 
 def count_fragments():
@@ -15,14 +16,8 @@ def count_fragments():
 def test_pdf_ingestion_creates_multiple_fragments():
     client = app.test_client()
 
-    # Minimal fake PDF structure using PyPDF2 expectations
-    from PyPDF2 import PdfWriter
-    buf = io.BytesIO()
-    writer = PdfWriter()
-    writer.add_blank_page(width=72, height=72)
-    writer.add_blank_page(width=72, height=72)
-    writer.write(buf)
-    buf.seek(0)
+    # Two pages with extractable text; blank pages yield no fragments.
+    buf = io.BytesIO(make_text_pdf(["first page", "second page"]))
 
     before = count_fragments()
 
@@ -44,6 +39,6 @@ def test_pdf_ingestion_does_not_create_tables():
         tables = conn.execute(
             "SELECT name FROM sqlite_master WHERE type='table'"
         ).fetchall()
-        assert [t[0] for t in tables] == ["fragments"]
+        assert [t[0] for t in tables if t[0] not in DERIVED_TABLES] == ["fragments"]
     finally:
         conn.close()
@@ -0,0 +1,76 @@
+import json
+import zipfile
+from io import BytesIO
+
+import pytest
+
+import recombulator
+from app import app
+from recombulator import (
+    assemble_markdown,
+    assemble_text,
+    assemble_zip,
+    fetch_fragments_by_ids,
+    iter_all_fragments,
+    iter_zip,
+)
+from storage import add_fragments
+
+
+def reference_markdown(fragments):
+    return "\n".join(f"---\nFragment #{f['id']}\n\n{f['content']}\n" for f in fragments)
+
+
+def reference_text(fragments):
+    return "\n".join(f"[Fragment #{f['id']}]\n{f['content']}\n" for f in fragments)
+
+
+def reference_zip(fragments):
+    """The original in-memory assembler, with fixed member timestamps."""
+    buf = BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for f in fragments:
+            info = zipfile.ZipInfo(f"fragment_{f['id']}.md", (1980, 1, 1, 0, 0, 0))
+            info.external_attr = 0o600 << 16
+            zf.writestr(info, reference_markdown([f]), zipfile.ZIP_DEFLATED)
+    return buf.getvalue()
+
+
+@pytest.fixture
+def fragments():
+    add_fragments({"content": f"fragment {i} é " + "x" * (i * 37)} for i in range(300))
+    return list(iter_all_fragments())
+
+
+def test_streamed_exports_are_byte_identical(fragments):
+    assert assemble_markdown(fragments) == reference_markdown(fragments)
+    assert assemble_text(fragments) == reference_text(fragments)
+    assert assemble_zip(fragments).getvalue() == reference_zip(fragments)
+    assert b"".join(iter_zip(fragments, chunk_bytes=1)) == reference_zip(fragments)
+
+
+def test_fetch_by_ids_batches_and_orders(fragments, monkeypatch):
+    monkeypatch.setattr(recombulator, "FETCH_BATCH_SIZE", 7)
+    rows = fetch_fragments_by_ids([250, 3, 3, 120, 9999] + list(range(40, 60)))
+    assert [r["id"] for r in rows] == [3] + list(range(40, 60)) + [120, 250]
+
+
+@pytest.mark.parametrize("fmt", ["zip", "md", "txt", "json"])
+def test_export_all_streams_every_fragment(fragments, fmt):
+    response = app.test_client().get(f"/export/all?format={fmt}")
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    body = response.get_data()
+    if fmt == "zip":
+        assert body == reference_zip(fragments)
+    elif fmt == "md":
+        assert body.decode() == reference_markdown(fragments)
+    elif fmt == "txt":
+        assert body.decode() == reference_text(fragments)
+    else:
+        assert [f["id"] for f in json.loads(body)] == [f["id"] for f in fragments]
+
+
+def test_export_all_rejects_unknown_format():
+    assert app.test_client().get("/export/all?format=exe").status_code == 400
@@ -0,0 +1,59 @@
+import result_cache
+import storage
+from app import app
+from result_cache import ResultCache, fetch_page
+
+
+def test_repeated_page_is_served_from_cache(seed, monkeypatch):
+    seed(30, text="river note")
+    calls = []
+    real = storage.fetch_page
+    monkeypatch.setattr(storage, "fetch_page", lambda *a, **k: calls.append(a) or real(*a, **k))
+
+    first = fetch_page(query="river", limit=10)
+    again = fetch_page(query="river", limit=10)
+
+    assert again == first
+    assert len(calls) == 1
+    assert result_cache.pages.stats()["hits"] == 1
+
+
+def test_append_moves_the_watermark_and_invalidates(seed):
+    seed(5, text="river note")
+    before, _ = fetch_page(limit=10)
+
+    seed(1, text="river note", start=5)
+    after, _ = fetch_page(limit=10)
+
+    assert len(after) == len(before) + 1
+    assert result_cache.pages.stats()["stale"] == 1
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = ResultCache(size=2, ttl=10)
+    now = [100.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+
+    cache.put("a", 1, "A")
+    cache.put("b", 1, "B")
+    assert cache.get("a", 1) == "A"
+    cache.put("c", 1, "C")
+
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) == "A"
+    now[0] += 11
+    assert cache.get("a", 1) is None
+    stats = cache.stats()
+    assert (stats["evicted"], stats["expired"]) == (1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_route_sees_new_fragments_after_cached_render(seed):
+    seed(3, text="river note")
+    client = app.test_client()
+    client.get("/fragments")
+
+    seed(1, text="river note", start=3)
+    body = client.get("/fragments").get_data(as_text=True)
+
+    assert "river note 3" in body
@@ -0,0 +1,124 @@
+import json
+
+import pytest
+
+from runtime.ingestion.minimal_ingest import SPLITTER, ingest_text, split_text
+from runtime.storage import fragment_store
+from runtime.storage.fragment_store import FragmentStore
+
+
+def rows(store):
+    return store.conn.execute("SELECT raw_text, source_id FROM fragments ORDER BY rowid").fetchall()
+
+
+def test_ingest_text_returns_stored_fragments(tmp_path):
+    store = FragmentStore(tmp_path / "runtime.db")
+
+    fragments = ingest_text("One. Two!  Three?", "doc-1", store=store)
+
+    assert [f["raw_text"] for f in fragments] == ["One", "Two", "Three?"]
+    assert rows(store) == [("One", "doc-1"), ("Two", "doc-1"), ("Three?", "doc-1")]
+
+
+def test_splitter_is_precompiled():
+    assert SPLITTER.pattern == r"[.!?]\s+"
+    assert split_text("  ") == []
+
+
+def test_append_many_commits_in_groups(tmp_path):
+    store = FragmentStore(tmp_path / "runtime.db")
+    commits = []
+    store.conn.set_trace_callback(lambda sql: sql == "COMMIT" and commits.append(sql))
+
+    fragments = (
+        {"fragment_id": str(i), "raw_text": "x", "source_id": "s", "timestamp": "t"}
+        for i in range(5)
+    )
+
+    assert store.append_many(fragments, batch_size=2) == 5
+    assert len(commits) == 3
+    assert len(rows(store)) == 5
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = FragmentStore(tmp_path / "runtime.db")
+    monkeypatch.setattr(fragment_store, "_store", store)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def client(store):
+    from fastapi.testclient import TestClient
+
+    from runtime.web import app
+
+    return TestClient(app.app)
+
+
+def test_post_ingest_stores_fragments(client, store):
+    response = client.post("/ingest", json={"text": "One. Two.", "source_id": "doc"})
+
+    assert response.status_code == 200
+    assert response.json() == {"fragments_created": 2}
+    assert rows(store) == [("One", "doc"), ("Two.", "doc")]
+
+
+def test_post_ingest_rejects_missing_fields(client, store):
+    response = client.post("/ingest", json={"text": "One."})
+
+    assert response.status_code == 422
+    assert rows(store) == []
+
+
+def test_batch_ingest_streams_ndjson_and_reports_bad_lines(client, store, monkeypatch):
+    monkeypatch.setattr("runtime.web.app.BATCH_SIZE", 2)
+    lines = [
+        json.dumps({"text": "A. B. C.", "source_id": "a", "author_id": "x"}),
+        "{not json",
+        "",
+        json.dumps({"text": "D.", "source_id": "b"}),
+        json.dumps({"source_id": "c"}),
+    ]
+    body = ("\n".join(lines)).encode()
+    # Chunk boundaries that fall inside lines.
+    chunks = [body[i:i + 7] for i in range(0, len(body), 7)]
+
+    response = client.post("/ingest/batch", content=iter(chunks))
+
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["documents"], result["fragments_created"]) == (2, 4)
+    assert result["error_count"] == 2
+    assert [e["line"] for e in result["errors"]] == [2, 5]
+    assert rows(store) == [("A", "a"), ("B", "a"), ("C.", "a"), ("D.", "b")]
+    authors = store.conn.execute("SELECT author_id FROM fragments ORDER BY rowid").fetchall()
+    assert [a for (a,) in authors] == ["x", "x", "x", None]
+
+
+def test_batch_ingest_without_valid_lines_is_a_400(client, store):
+    response = client.post("/ingest/batch", content=b"{bad\n[]\n")
+
+    assert response.status_code == 400
+    assert [e["line"] for e in response.json()["detail"]["errors"]] == [1, 2]
+    assert rows(store) == []
+
+
+def test_batch_ingest_reports_overlong_lines_without_buffering_them(client, store, monkeypatch):
+    monkeypatch.setattr("runtime.web.app.MAX_LINE_BYTES", 40)
+    long_line = json.dumps({"text": "x" * 200, "source_id": "big"})
+    body = "\n".join([
+        json.dumps({"text": "A.", "source_id": "a"}),
+        long_line,
+        json.dumps({"text": "B.", "source_id": "b"}),
+        long_line,
+    ]).encode()
+
+    response = client.post("/ingest/batch", content=iter([body[i:i + 3] for i in range(0, len(body), 3)]))
+
+    assert response.status_code == 200
+    result = response.json()
+    assert result["documents"] == 2
+    assert [e["line"] for e in result["errors"]] == [2, 4]
+    assert rows(store) == [("A.", "a"), ("B.", "b")]
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from runtime.logging import logger
+
+
+@pytest.fixture(autouse=True)
+def fresh_logger(monkeypatch):
+    monkeypatch.setattr(logger, "MIN_SEVERITY", logger.SEVERITIES["info"])
+    monkeypatch.setattr(logger, "_sample_every", {})
+    monkeypatch.setattr(logger, "_limits", {})
+    monkeypatch.setattr(logger, "_counts", logger.collections.Counter())
+    monkeypatch.setattr(logger, "_suppressed", logger.collections.Counter())
+    logger.flush()
+
+
+def written(capsys):
+    logger.flush()
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+
+
+def test_events_are_written_as_schema_lines(capsys):
+    logger.log_event("ingestion.start", "info", "ingestion", "start", {"source": "s"})
+
+    (event,) = written(capsys)
+    assert set(event) == {
+        "event_id", "timestamp", "event_type", "severity", "source", "message", "context",
+    }
+    assert event["context"] == {"source": "s"}
+
+
+def test_events_below_min_severity_are_dropped(capsys):
+    logger.log_event("noise", "debug", "x", "m")
+    logger.log_event("kept", "warning", "x", "m")
+
+    assert [e["event_type"] for e in written(capsys)] == ["kept"]
+    assert logger.counters() == {"kept": 1}
+
+
+def test_sampling_keeps_every_nth_and_reports_the_rest(capsys):
+    logger.sample("fragment.stored", 0.25)
+    for i in range(8):
+        logger.log_event("fragment.stored", "info", "x", "m", {"i": i})
+
+    events = written(capsys)
+    assert [e["context"]["i"] for e in events if e["event_type"] == "fragment.stored"] == [0, 4]
+    assert events[-1]["event_type"] == "logging.suppressed"
+    assert events[-1]["context"] == {"fragment.stored": 6}
+    assert logger.counters() == {"fragment.stored": 8}
+
+
+def test_zero_rate_only_counts(capsys):
+    logger.sample("hot", 0)
+    for _ in range(3):
+        logger.log_event("hot", "info", "x", "m")
+
+    assert [e["context"] for e in written(capsys)] == [{"hot": 3}]
+
+
+def test_rate_limit_caps_burst(capsys):
+    logger.rate_limit("burst", 5)
+    for _ in range(50):
+        logger.log_event("burst", "info", "x", "m")
+
+    events = written(capsys)
+    assert 5 <= sum(e["event_type"] == "burst" for e in events) <= 6
+    assert events[-1]["event_type"] == "logging.suppressed"
+
+
+def test_full_queue_refuses_events_and_reports_them(capsys, monkeypatch):
+    monkeypatch.setattr(logger, "_queue", logger.queue.Queue(2))
+    for i in range(5):
+        logger.log_event("busy", "info", "x", "m", {"i": i})
+
+    events = written(capsys)
+    assert [e["context"]["i"] for e in events if e["event_type"] == "busy"] == [0, 1]
+    assert events[-1]["context"] == {"logging.queue_full": 3}
+
+
+def test_failed_writes_are_counted_and_reported_on_stderr(capsys, monkeypatch):
+    class Broken:
+        def write(self, data):
+            raise OSError("disk full")
+
+    before = logger.dropped()
+    monkeypatch.setattr(logger.sys, "stdout", Broken())
+    logger.log_event("lost", "info", "x", "m")
+    logger.log_event("bad", "info", "x", "m", {"value": object()})
+    logger.flush()
+
+    assert logger.dropped() - before == 2
+    err = capsys.readouterr().err
+    assert "dropped 1 event(s)" in err and "disk full" in err
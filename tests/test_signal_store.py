@@ -0,0 +1,51 @@
+import json
+
+from concept_emergence.signal_store import load_adjacency, write_adjacency
+from ui import read_only
+
+SIGNALS = [
+    {"a": 1, "b": 2, "similarity": 0.9},
+    {"a": 1, "b": 5, "similarity": 0.8},
+    {"a": 2, "b": 5, "similarity": 0.76},
+    {"a": 7, "b": 1, "similarity": 0.95},
+]
+
+
+def test_adjacency_matches_json_log_lookup(tmp_path, monkeypatch):
+    log = tmp_path / "stage1.json"
+    log.write_text(json.dumps({"signals": SIGNALS}))
+    monkeypatch.setattr(read_only, "STAGE1_LOG", str(log))
+    write_adjacency(SIGNALS, tmp_path / "adj")
+    adjacency = load_adjacency(tmp_path / "adj")
+
+    for min_sim in (None, 0.85):
+        from_json = read_only.load_similarity(min_sim)
+        for fid in (1, 2, 5, 7, 99):
+            assert adjacency.related(fid, min_sim) == sorted(from_json.get(fid, []))
+
+
+def test_adjacency_reloads_when_rewritten(tmp_path):
+    directory = tmp_path / "adj"
+    write_adjacency(SIGNALS, directory)
+    first = load_adjacency(directory)
+    assert load_adjacency(directory) is first
+
+    write_adjacency([{"a": 1, "b": 3, "similarity": 0.99}], directory)
+    second = load_adjacency(directory)
+
+    assert second is not first
+    assert second.related(1) == [3]
+    assert len(list(directory.glob("*.npy"))) == 4
+
+
+def test_read_only_view_uses_adjacency(tmp_path, monkeypatch):
+    from storage import add_fragments
+
+    add_fragments({"content": f"fragment {i}"} for i in range(3))
+    write_adjacency([{"a": 1, "b": 3, "similarity": 0.9}], tmp_path / "adj")
+    monkeypatch.setattr(read_only, "STAGE1_ADJACENCY", tmp_path / "adj")
+    monkeypatch.setattr(read_only, "STAGE1_LOG", str(tmp_path / "missing.json"))
+
+    assert read_only.load_related([1, 2, 3]) == {1: [3], 2: [], 3: [1]}
+    page = read_only.app.test_client().get("/fragments").get_data(as_text=True)
+    assert "Related fragments" in page
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from similarity import compute_similarity
+
+
+def dense_reference(fragments, threshold=0.25, top_k=5):
+    """The original dense n×n implementation, kept as an oracle."""
+    ids = [f[0] for f in fragments]
+    texts = [f[1] for f in fragments]
+    if len(texts) < 2:
+        return {}
+    tfidf = TfidfVectorizer(stop_words="english").fit_transform(texts)
+    sim_matrix = cosine_similarity(tfidf)
+    results = {}
+    for i, fid in enumerate(ids):
+        scores = []
+        for j, other_id in enumerate(ids):
+            if i == j:
+                continue
+            score = float(sim_matrix[i, j])
+            if score >= threshold:
+                scores.append((other_id, score))
+        scores.sort(key=lambda x: x[1], reverse=True)
+        results[fid] = scores[:top_k]
+    return results
+
+
+def corpus(n, seed=7):
+    rnd = random.Random(seed)
+    words = ["river", "stone", "archive", "signal", "paper", "light", "memory",
+             "fragment", "window", "garden", "engine", "harbor"]
+    frags = [(100 + i, " ".join(rnd.choices(words, k=rnd.randint(2, 8))))
+             for i in range(n)]
+    # Exact duplicates produce tied scores at the top-k cut-off.
+    frags += [(900 + i, "river stone archive") for i in range(8)]
+    return frags
+
+
+def assert_equivalent(got, expected):
+    assert got.keys() == expected.keys()
+    for fid in expected:
+        assert [o for o, _ in got[fid]] == [o for o, _ in expected[fid]]
+        assert [s for _, s in got[fid]] == pytest.approx(
+            [s for _, s in expected[fid]]
+        )
+
+
+@pytest.mark.parametrize("block_size", [None, 1, 7, 1000])
+@pytest.mark.parametrize("threshold,top_k", [(0.25, 5), (0.0, 3), (0.6, 50)])
+def test_matches_dense_reference(block_size, threshold, top_k):
+    frags = corpus(60)
+
+    got = compute_similarity(frags, threshold, top_k, block_size=block_size)
+
+    assert_equivalent(got, dense_reference(frags, threshold, top_k))
+
+
+def test_fewer_than_two_fragments():
+    assert compute_similarity([]) == {}
+    assert compute_similarity([(1, "only one")]) == {}
@@ -3,7 +3,7 @@ import tempfile
 import os
 import shutil
 from app import app
-from storage import init_db, get_connection
+from storage import DERIVED_TABLES, init_db, get_connection
 
 
 def snapshot_fragment_count():
@@ -43,7 +43,7 @@ def test_recombulator_does_not_modify_database():
 
 def test_only_fragment_table_exists():
     tables = list_tables()
-    assert tables == ["fragments"]
+    assert [t for t in tables if t not in DERIVED_TABLES] == ["fragments"]
 
 
 def test_zip_ingestion_skips_unsupported_files():
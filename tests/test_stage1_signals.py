@@ -0,0 +1,64 @@
+import random
+
+import numpy as np
+import pytest
+
+from concept_emergence.stage1 import cosine_similarity, generate_similarity_signals
+
+
+def pairwise_reference(embeddings, threshold):
+    """The original nested-loop implementation, kept as an oracle."""
+    signals = []
+    for i in range(len(embeddings)):
+        for j in range(i + 1, len(embeddings)):
+            sim = cosine_similarity(
+                embeddings[i]["embedding"], embeddings[j]["embedding"]
+            )
+            if sim >= threshold:
+                signals.append({
+                    "a": embeddings[i]["fragment_id"],
+                    "b": embeddings[j]["fragment_id"],
+                    "similarity": round(sim, 4),
+                })
+    return signals
+
+
+def random_embeddings(n, dim=8, seed=3):
+    rnd = random.Random(seed)
+    embeddings = [
+        {"fragment_id": 10 + i, "embedding": [rnd.gauss(0, 1) for _ in range(dim)]}
+        for i in range(n)
+    ]
+    embeddings.append({"fragment_id": 999, "embedding": [0.0] * dim})
+    return embeddings
+
+
+@pytest.mark.parametrize("block_rows", [1, 7, 4096])
+@pytest.mark.parametrize("threshold", [0.5, 0.0])
+def test_matches_pairwise_reference(block_rows, threshold):
+    embeddings = random_embeddings(120)
+
+    got = generate_similarity_signals(embeddings, threshold, block_rows=block_rows)
+    expected = pairwise_reference(embeddings, threshold)
+
+    assert [(s["a"], s["b"]) for s in got] == [(s["a"], s["b"]) for s in expected]
+    assert [s["similarity"] for s in got] == pytest.approx(
+        [s["similarity"] for s in expected], abs=2e-4
+    )
+
+
+def test_no_signals_for_fewer_than_two_embeddings():
+    assert generate_similarity_signals([]) == []
+    assert generate_similarity_signals(random_embeddings(0)) == []
+
+
+def test_id_matrix_pair_matches_dict_form():
+    embeddings = random_embeddings(50)
+    pair = (
+        np.array([e["fragment_id"] for e in embeddings]),
+        np.array([e["embedding"] for e in embeddings], dtype=np.float32),
+    )
+
+    assert generate_similarity_signals(pair, 0.3) == generate_similarity_signals(embeddings, 0.3)
+    # The caller's matrix is normalized in a copy, not in place.
+    assert np.linalg.norm(pair[1][0]) != pytest.approx(1.0)
@@ -0,0 +1,193 @@
+import sqlite3
+import threading
+
+import pytest
+
+import storage
+from storage import (
+    add_fragment,
+    add_fragments,
+    get_connection,
+    list_fragments,
+    init_db,
+    reader,
+    search_fragments,
+    writer,
+)
+
+
+def all_rows():
+    conn = get_connection()
+    try:
+        return conn.execute("SELECT * FROM fragments ORDER BY id").fetchall()
+    finally:
+        conn.close()
+
+
+def test_add_fragments_accepts_generator_and_returns_id_range():
+    add_fragment("existing")
+
+    def gen():
+        for i in range(12):
+            yield {"content": f"row {i}", "source": "a.csv", "source_page": i}
+
+    first, last = add_fragments(gen(), batch_size=5)
+
+    rows = all_rows()
+    assert (first, last) == (2, 13)
+    assert [r["id"] for r in rows[1:]] == list(range(first, last + 1))
+    assert rows[-1]["content"] == "row 11"
+    assert rows[-1]["source_page"] == 11
+
+
+def test_add_fragments_empty_iterable_writes_nothing():
+    assert add_fragments([]) is None
+    assert all_rows() == []
+
+
+def test_add_fragments_is_all_or_nothing():
+    fragments = [{"content": "ok"}, {"content": None}]
+
+    with pytest.raises(Exception):
+        add_fragments(fragments, batch_size=1)
+
+    assert all_rows() == []
+
+
+def _write_from_another_connection(content):
+    conn = sqlite3.connect(storage.DB_PATH, timeout=0)
+    try:
+        conn.execute(
+            "INSERT INTO fragments (content, created_at) VALUES (?, 'now')", (content,)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def test_chunked_add_fragments_does_not_hold_the_lock_while_producing():
+    def gen():
+        for i in range(6):
+            if i == 3:
+                # Mid-extraction: another writer must get in without waiting.
+                _write_from_another_connection("concurrent")
+            yield {"content": f"row {i}"}
+
+    first, last = add_fragments(gen(), batch_size=2, atomic=False)
+
+    contents = [r["content"] for r in all_rows()]
+    assert contents == ["row 0", "row 1", "concurrent", "row 2", "row 3", "row 4", "row 5"]
+    assert (first, last) == (1, 7)
+
+
+def test_atomic_add_fragments_holds_the_lock_while_producing():
+    def gen():
+        yield {"content": "row 0"}
+        _write_from_another_connection("concurrent")
+
+    with pytest.raises(sqlite3.OperationalError, match="locked"):
+        add_fragments(gen())
+
+    assert all_rows() == []
+
+
+def test_store_rejects_update_and_delete():
+    add_fragments([{"content": "original"}])
+    conn = writer()
+
+    with pytest.raises(sqlite3.IntegrityError, match="immutable"):
+        conn.execute("UPDATE fragments SET content = 'mutated'")
+    with pytest.raises(sqlite3.IntegrityError, match="append-only"):
+        conn.execute("DELETE FROM fragments")
+    conn.rollback()
+
+    assert [r["content"] for r in all_rows()] == ["original"]
+    assert [r["content"] for r in search_fragments("original")] == ["original"]
+
+
+def test_store_uses_wal_and_tuned_pragmas():
+    conn = writer()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+
+
+def test_reader_is_read_only_and_reused():
+    assert reader() is reader()
+
+    with pytest.raises(sqlite3.OperationalError):
+        reader().execute("INSERT INTO fragments (content, created_at) VALUES ('x', 'y')")
+
+
+def test_connections_are_per_thread():
+    seen = []
+    t = threading.Thread(target=lambda: seen.append(reader()))
+    t.start()
+    t.join()
+
+    assert seen[0] is not reader()
+
+
+def test_reader_sees_committed_writes():
+    assert list_fragments() == []
+    add_fragment("after first read")
+    assert [r["content"] for r in list_fragments()] == ["after first read"]
+
+
+def test_search_ranks_best_match_first_with_snippet():
+    add_fragments([
+        {"content": "archive notes about a river"},
+        {"content": "archive archive archive"},
+        {"content": "unrelated text"},
+    ])
+
+    rows = search_fragments("archive")
+
+    assert [r["content"] for r in rows] == [
+        "archive archive archive",
+        "archive notes about a river",
+    ]
+    assert "<mark>archive</mark>" in rows[0]["snippet"]
+
+
+def test_search_supports_prefix_and_phrase_queries():
+    add_fragments([
+        {"content": "preservation first"},
+        {"content": "first preservation"},
+        {"content": "preserve nothing"},
+    ])
+
+    assert len(search_fragments("preserv*")) == 3
+    assert [r["content"] for r in search_fragments('"preservation first"')] == [
+        "preservation first"
+    ]
+
+
+def test_search_ignores_fts_operators_in_user_input():
+    add_fragment("this OR that")
+    assert len(search_fragments('this OR "')) == 1
+
+
+def test_init_db_backfills_existing_fragments(fragment_db):
+    conn = get_connection()
+    conn.execute("DROP TRIGGER fragments_fts_ai")
+    conn.execute("DROP TABLE fragments_fts")
+    conn.execute(
+        "INSERT INTO fragments (content, created_at) VALUES ('legacy row', 'now')"
+    )
+    conn.commit()
+    conn.close()
+
+    init_db()
+
+    assert [r["content"] for r in search_fragments("legacy")] == ["legacy row"]
+
+
+def test_search_falls_back_to_like_without_fts5(monkeypatch):
+    monkeypatch.setattr(storage, "FTS5_AVAILABLE", False)
+    add_fragments([{"content": "alpha"}, {"content": "alphabet"}])
+
+    rows = search_fragments("alpha")
+
+    assert [r["content"] for r in rows] == ["alphabet", "alpha"]
+    assert rows[0]["snippet"] is None
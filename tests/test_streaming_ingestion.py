@@ -0,0 +1,74 @@
+import hashlib
+import io
+import types
+
+import ingestion
+import pdf_ingestion
+from ingestion import ingest_files, iter_file_fragments, spool_upload
+from pdf_ingestion import iter_pdf_fragments
+from storage import list_fragments
+from tests.helpers import Upload, make_text_pdf
+
+
+def test_pdf_fragments_stream_from_path(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(make_text_pdf(["one", "", "three"]))
+
+    fragments = iter_pdf_fragments(path, "doc.pdf")
+
+    assert isinstance(fragments, types.GeneratorType)
+    assert [(f["source_page"], f["content"]) for f in fragments] == [(1, "one"), (3, "three")]
+
+
+def test_pdf_paths_are_handed_to_the_reader_as_open_files(tmp_path, monkeypatch):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(make_text_pdf(["one", "two"]))
+    streams = []
+    real = pdf_ingestion.PdfReader
+
+    def reader(stream):
+        streams.append(stream)
+        return real(stream)
+
+    monkeypatch.setattr(pdf_ingestion, "PdfReader", reader)
+
+    assert pdf_ingestion.count_pdf_pages(path) == 2
+    assert len(pdf_ingestion.extract_pdf_page_range(path, "doc.pdf", 2, 2)) == 1
+    assert len(list(iter_pdf_fragments(str(path), "doc.pdf"))) == 2
+
+    assert len(streams) == 3
+    for stream in streams:
+        assert isinstance(stream, io.BufferedReader)
+        assert stream.closed
+
+
+def test_spool_upload_copies_in_chunks(tmp_path, monkeypatch):
+    monkeypatch.setattr(ingestion, "SPOOL_CHUNK_BYTES", 7)
+    data = bytes(range(256)) * 10
+
+    path, digest = spool_upload(Upload("blob.bin", data), tmp_path)
+
+    assert path.parent == tmp_path
+    assert path.read_bytes() == data
+    assert digest == hashlib.sha256(data).hexdigest()
+
+
+def test_file_fragments_are_stamped(tmp_path):
+    path = tmp_path / "spooled"
+    path.write_bytes(b"a\n\nb")
+
+    fragments = list(iter_file_fragments(path, "notes.md", "batch-1"))
+
+    assert [f["content"] for f in fragments] == ["a", "b"]
+    assert {(f["source_type"], f["ingestion_batch_id"]) for f in fragments} == {("md", "batch-1")}
+
+
+def test_ingest_streams_into_batched_writer():
+    pdf = make_text_pdf([f"page {i}" for i in range(1, 6)])
+
+    result = ingest_files([Upload("a.pdf", pdf), Upload("b.txt", b"x\n\ny")], workers=1)
+
+    assert result["fragment_count"] == 7
+    assert result["file_count"] == 2
+    rows = list(reversed(list_fragments(limit=10)))
+    assert [r["content"] for r in rows] == [f"page {i}" for i in range(1, 6)] + ["x", "y"]
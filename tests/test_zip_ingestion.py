@@ -0,0 +1,95 @@
+import io
+import zipfile
+
+import pytest
+
+import ingestion
+from ingestion import flatten_member_name, ingest_files
+from storage import list_fragments
+from tests.helpers import Upload, make_text_pdf
+
+
+def make_zip(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    return buf.getvalue()
+
+
+def stored():
+    return [(r["source"], r["source_type"], r["content"]) for r in reversed(list_fragments(limit=100))]
+
+
+ARCHIVE = {
+    "notes/a.txt": b"alpha\n\nbeta",
+    "notes/deep/b.md": b"gamma",
+    "table.csv": b"h\nrow one\n",
+    "report.pdf": make_text_pdf(["page one"]),
+    "image.png": b"\x89PNG",
+    "notes/": b"",
+}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_zip_members_ingest_with_flattened_provenance(workers):
+    result = ingest_files([Upload("bundle.zip", make_zip(ARCHIVE))], workers=workers)
+
+    assert result["file_count"] == 4
+    assert result["fragment_count"] == 5
+    assert stored() == [
+        ("bundle.zip/notes/a.txt", "txt", "alpha"),
+        ("bundle.zip/notes/a.txt", "txt", "beta"),
+        ("bundle.zip/notes/deep/b.md", "md", "gamma"),
+        ("bundle.zip/table.csv", "csv", "row one"),
+        ("bundle.zip/report.pdf", "pdf", "page one"),
+    ]
+
+
+def test_unsupported_members_are_logged_and_skipped(caplog):
+    caplog.set_level("INFO", logger="ingestion")
+
+    ingest_files([Upload("bundle.zip", make_zip(ARCHIVE))], workers=1)
+
+    assert "Skipping unsupported file: bundle.zip/image.png" in caplog.text
+
+
+def test_member_names_cannot_escape():
+    assert flatten_member_name("x.zip", "../../etc/passwd.txt") == "x.zip/etc/passwd.txt"
+    assert flatten_member_name("x.zip", "/abs\\win\\a.txt") == "x.zip/abs/win/a.txt"
+
+
+def test_archive_over_member_limit_is_rejected(monkeypatch):
+    monkeypatch.setattr(ingestion, "MAX_ZIP_MEMBERS", 2)
+
+    result = ingest_files([Upload("many.zip", make_zip({f"{i}.txt": b"x" for i in range(3)}))])
+
+    assert result["rejected_archives"] == ["many.zip"]
+    assert stored() == []
+
+
+def test_archive_over_size_limit_is_rejected(monkeypatch):
+    monkeypatch.setattr(ingestion, "MAX_ZIP_BYTES", 1000)
+
+    result = ingest_files([Upload("bomb.zip", make_zip({"big.txt": b"0" * 10_000}))])
+
+    assert result["rejected_archives"] == ["bomb.zip"]
+    assert stored() == []
+
+
+def test_reuploaded_archive_is_skipped_as_a_whole():
+    data = make_zip(ARCHIVE)
+    ingest_files([Upload("bundle.zip", data)], workers=1)
+
+    result = ingest_files([Upload("copy.zip", data)], workers=1)
+
+    assert result["skipped_files"] == ["copy.zip"]
+    assert result["file_count"] == 0
+    assert len(stored()) == 5
+
+
+def test_identical_members_are_deduplicated():
+    result = ingest_files([Upload("z.zip", make_zip({"a.txt": b"same", "b/a.txt": b"same"}))])
+
+    assert result["file_count"] == 1
+    assert result["skipped_files"] == ["z.zip/b/a.txt"]
@@ -2,17 +2,31 @@
 Read-Only UI for Fragment Exploration
 
 UPDATED:
-- Pagination
+- Keyset (cursor) pagination
 - Similarity threshold filtering
+- Ranked full-text search with highlighted snippets (via storage)
+- Related fragments from the Stage 1 adjacency store (per page, not per log)
+- Pages and searches served from the watermark-validated result cache
+- Template compiled once at import; strong ETags (newest fragment id,
+  query parameters, Stage 1 signal version) answer revalidations with 304
 - Still strictly read-only
 """
 
-import sqlite3
 import json
-from flask import Flask, request, render_template_string
+import os
+from flask import Flask, abort, make_response, request
+from markupsafe import Markup, escape
+
+from concept_emergence.signal_store import DEFAULT_ADJACENCY_DIR, load_adjacency
+from http_cache import not_modified, request_etag, validated
+from result_cache import fetch_page
+from storage import max_fragment_id
+
+# Snippet highlight sentinels; swapped for <mark> after HTML-escaping.
+_HL_OPEN, _HL_CLOSE = "\x02", "\x03"
 
-DB_PATH = "fragments.db"
 STAGE1_LOG = "logs/concept_stage1.json"
+STAGE1_ADJACENCY = DEFAULT_ADJACENCY_DIR
 PAGE_SIZE = 10
 
 app = Flask(__name__)
@@ -30,6 +44,7 @@ TEMPLATE = """
 {% for f in fragments %}
   <div style="margin-bottom:1em;">
     <strong>Fragment {{ f['id'] }}</strong><br/>
+    {% if f['snippet'] %}<div>{{ f['snippet'] }}</div>{% endif %}
     <pre>{{ f['content'] }}</pre>
     {% if f['related'] %}
       <em>Related fragments:</em>
@@ -42,35 +57,62 @@ TEMPLATE = """
   </div>
 {% endfor %}
 <div>
-{% if page > 1 %}<a href="?page={{ page - 1 }}">Prev</a>{% endif %}
-Page {{ page }}
-{% if has_more %}<a href="?page={{ page + 1 }}">Next</a>{% endif %}
+{% if not first_page %}<a href="{{ url_for('fragments_view', q=query or None, sim=sim or None) }}">First</a>{% endif %}
+{% if next_cursor %}<a href="{{ url_for('fragments_view', q=query or None, sim=sim or None, cursor=next_cursor) }}">Next</a>{% endif %}
 </div>
 """
 
+# Compiled once; url_for and request resolve per render via the app context.
+_template = app.jinja_env.from_string(TEMPLATE)
 
-def load_fragments(query=None, page=1):
-    offset = (page - 1) * PAGE_SIZE
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cur = conn.cursor()
 
-    if query:
-        cur.execute(
-            "SELECT id, content FROM fragments WHERE content LIKE ? LIMIT ? OFFSET ?",
-            (f"%{query}%", PAGE_SIZE + 1, offset),
-        )
-    else:
-        cur.execute(
-            "SELECT id, content FROM fragments LIMIT ? OFFSET ?",
-            (PAGE_SIZE + 1, offset),
-        )
+def highlight_snippet(snippet):
+    if not snippet:
+        return None
+    return Markup(
+        str(escape(snippet))
+        .replace(_HL_OPEN, "<mark>")
+        .replace(_HL_CLOSE, "</mark>")
+    )
 
-    rows = cur.fetchall()
-    conn.close()
 
-    has_more = len(rows) > PAGE_SIZE
-    return [dict(r) for r in rows[:PAGE_SIZE]], has_more
+def load_fragments(query=None, page=1, cursor=None, max_id=None):
+    """
+    Returns (fragments, next_cursor). ``cursor`` pages by keyset; ``page``
+    is the legacy offset path and is ignored when a cursor is given.
+    ``max_id`` reads the store as of that watermark.
+    """
+    rows, next_cursor = fetch_page(
+        query=query,
+        cursor=cursor,
+        limit=PAGE_SIZE,
+        offset=(page - 1) * PAGE_SIZE,
+        max_id=max_id,
+        highlight=(_HL_OPEN, _HL_CLOSE),
+    )
+
+    fragments = []
+    for r in rows:
+        snippet = r["snippet"] if "snippet" in r.keys() else None
+        fragments.append({
+            "id": r["id"],
+            "content": r["content"],
+            "snippet": highlight_snippet(snippet),
+        })
+    return fragments, next_cursor
+
+
+def load_related(fragment_ids, min_sim=None):
+    """
+    Related fragment ids for just ``fragment_ids`` (one page), from the
+    memory-mapped adjacency store. Falls back to parsing the JSON audit log
+    when no adjacency store has been written yet.
+    """
+    adjacency = load_adjacency(STAGE1_ADJACENCY)
+    if adjacency is None:
+        related_map = load_similarity(min_sim)
+        return {fid: related_map.get(fid, []) for fid in fragment_ids}
+    return adjacency.related_many(fragment_ids, min_sim)
 
 
 def load_similarity(min_sim=None):
@@ -90,27 +132,52 @@ def load_similarity(min_sim=None):
     return related
 
 
+def signal_version():
+    """
+    Identifies the Stage 1 data behind related-fragment links: the
+    adjacency manifest and the JSON log, by mtime and size.
+    """
+    version = []
+    for path in (os.path.join(STAGE1_ADJACENCY, "manifest.json"), STAGE1_LOG):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            version.append(None)
+        else:
+            version.append((st.st_mtime_ns, st.st_size))
+    return tuple(version)
+
+
 @app.route("/fragments")
 def fragments_view():
+    watermark = max_fragment_id()
+    tag = request_etag(watermark, signal_version())
+    unchanged = not_modified(tag)
+    if unchanged is not None:
+        return unchanged
+
     query = request.args.get("q")
-    page = int(request.args.get("page", 1))
+    cursor = request.args.get("cursor")
     sim = request.args.get("sim")
-    min_sim = float(sim) if sim else None
 
-    fragments, has_more = load_fragments(query, page)
-    related_map = load_similarity(min_sim)
+    try:
+        page = int(request.args.get("page", 1))
+        min_sim = float(sim) if sim else None
+        fragments, next_cursor = load_fragments(query, page, cursor, watermark)
+    except ValueError:
+        abort(400)
+    related_map = load_related([f["id"] for f in fragments], min_sim)
 
     for f in fragments:
         f["related"] = related_map.get(f["id"], [])
 
-    return render_template_string(
-        TEMPLATE,
+    return validated(make_response(_template.render(
         fragments=fragments,
         query=query or "",
-        page=page,
-        has_more=has_more,
+        first_page=cursor is None and page == 1,
+        next_cursor=next_cursor,
         sim=sim or "",
-    )
+    )), tag)
 
 
 if __name__ == "__main__":